@@ -2,18 +2,37 @@ import os
 import json
 import time
 import re
+import openai
 from openai import OpenAI
 from openai.types.chat import ChatCompletion
-from .config import get_openai_api_key, DEFAULT_MODEL
+from .config import get_openai_api_key, DEFAULT_MODEL, FIELD_OF_INTEREST_VARIABLES, OPENAI_BASE_URL, OPENAI_MAX_RETRIES
 from .logger import CLIPSLogger
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED
+from .prompt_budget import PromptDataReducer
+from .catalog import lookup_items
+
+
+def is_service_failure(error):
+    """Whether an API error means the service is unhealthy rather than that the request was bad
+
+    Connection errors, timeouts, rate limits (429) and server errors (5xx)
+    count against the circuit breaker; other 4xx responses such as invalid
+    requests or authentication failures do not.
+    """
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return True
 
 class AIIntegration:
     """Class to handle interactions with OpenAI API"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, base_url=None):
         self.logger = logger or CLIPSLogger()
         self.client = None
         self.api_key = get_openai_api_key()
+        self.base_url = base_url or OPENAI_BASE_URL
+        self.circuit_breaker = CircuitBreaker("openai", logger=self.logger)
+        self.data_reducer = PromptDataReducer()
         self.initialize_client()
     
     def initialize_client(self, api_key=None):
@@ -25,7 +44,7 @@ class AIIntegration:
             return False
         
         try:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=OPENAI_MAX_RETRIES)
             return True
         except Exception as e:
             self.logger.log_error("Failed to initialize OpenAI client", 
@@ -43,17 +62,31 @@ class AIIntegration:
         endpoint = "ChatCompletion"
         
         for attempt in range(retries + 1):
+            try:
+                # Fast-fail without touching the API while the breaker is open
+                self.circuit_breaker.before_call()
+            except CircuitOpenError as e:
+                error = e
+                break
+            
             try:
                 response = self.client.chat.completions.create(
                     model=model,
                     messages=messages,
                     temperature=temperature
                 )
+                self.circuit_breaker.record_success()
                 error = None
                 break
             except Exception as e:
                 error = e
-                if attempt < retries:
+                # A bad request fails the same way every time, so it is neither retried nor held against the service
+                service_failure = is_service_failure(e)
+                if service_failure:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.release_call()
+                if service_failure and attempt < retries and self.circuit_breaker.state == CLOSED:
                     # Exponential backoff
                     wait_time = 2 ** attempt
                     self.logger.get_logger().warning(f"API call failed, retrying in {wait_time}s: {str(e)}")
@@ -61,8 +94,9 @@ class AIIntegration:
                 else:
                     self.logger.log_error("API call failed after retries", 
                                          {"type": "api_error", "source": endpoint}, e)
+                    break
         
-        # Log the API interaction
+        # Log the API interaction, including calls the open breaker short-circuited
         self.logger.log_ai_interaction(
             endpoint=endpoint,
             prompt=json.dumps(messages),
@@ -76,6 +110,10 @@ class AIIntegration:
             
         return response
     
+    def get_circuit_status(self):
+        """Get the state of the circuit breaker guarding the OpenAI API"""
+        return self.circuit_breaker.get_status()
+    
     def distill_variation_instructions(self, original_notes):
         """Distill user's original variation application instructions into concise, actionable form"""
         messages = [
@@ -139,8 +177,27 @@ class AIIntegration:
                                 {"type": "api_error", "function": "interpret_feedback"}, e)
             return {}
     
-    def generate_draft(self, original_copy, instructions, variation_levels=None, json_data=None):
-        """Generate a single draft based on original copy, instructions, and variation data"""
+    def generate_draft(self, original_copy, instructions, variation_levels=None, json_data=None, metadata=None):
+        """Generate a single draft based on original copy, instructions, and variation data
+        
+        If a metadata dict is passed it receives details about how the prompt was
+        built, such as the "data_reduction" report for program and club data.
+        """
+        messages = self.build_draft_messages(original_copy, instructions, variation_levels, json_data, metadata)
+        
+        try:
+            response = self._make_api_call(messages, temperature=0.7)
+            return response.choices[0].message.content.strip()
+        except CircuitOpenError:
+            # Let callers such as the bulk generator decide whether to pause or stop
+            raise
+        except Exception as e:
+            self.logger.log_error("Failed to generate draft", 
+                                {"type": "api_error", "function": "generate_draft"}, e)
+            return f"Error generating draft: {str(e)}"
+    
+    def build_draft_messages(self, original_copy, instructions, variation_levels=None, json_data=None, metadata=None):
+        """Build the chat messages generate_draft sends, without calling the API"""
         # Prepare the prompt with all the necessary components
         prompt_parts = [
             "You are an expert copywriter creating personalized marketing content for college enrollment.",
@@ -170,13 +227,21 @@ class AIIntegration:
         
         # Add JSON data if available and relevant
         if json_data and variation_levels:
-            field_of_interest_var = next((var for var in variation_levels if var.lower() in ['field of interest', 'program', 'major']), None)
-            if field_of_interest_var and 'data' in variation_levels[field_of_interest_var]:
+            field_of_interest_var = next((var for var in variation_levels if var.lower() in FIELD_OF_INTEREST_VARIABLES), None)
+            if field_of_interest_var and isinstance(variation_levels[field_of_interest_var], dict) \
+                    and 'data' in variation_levels[field_of_interest_var]:
                 cip_code = variation_levels[field_of_interest_var]['data']
-                program_data = json_data.get('programs', {}).get('by_cip_code', {}).get(cip_code, [])
-                club_data = json_data.get('clubs', {}).get('by_cip_code', {}).get(cip_code, [])
+                program_data = lookup_items(json_data.get('programs'), cip_code)
+                club_data = lookup_items(json_data.get('clubs'), cip_code)
                 
                 if program_data or club_data:
+                    # Keep the data block within the prompt token budget
+                    program_data, club_data, reduction = self.data_reducer.reduce(
+                        program_data, club_data, variation_levels[field_of_interest_var].get('value', '')
+                    )
+                    if metadata is not None:
+                        metadata["data_reduction"] = reduction
+                    
                     prompt_parts.append("\n## Available Content Data:\n")
                     
                     if program_data:
@@ -204,15 +269,7 @@ class AIIntegration:
         # Combine all parts into the final prompt
         full_prompt = "\n".join(prompt_parts)
         
-        messages = [
+        return [
             {"role": "developer", "content": "You are an expert copywriter for college enrollment marketing."},
             {"role": "user", "content": full_prompt}
         ]
-        
-        try:
-            response = self._make_api_call(messages, temperature=0.7)
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            self.logger.log_error("Failed to generate draft", 
-                                {"type": "api_error", "function": "generate_draft"}, e)
-            return f"Error generating draft: {str(e)}"
@@ -2,6 +2,8 @@ import os
 import json
 from flask import Flask, request, jsonify
 from .parsing import PDFParser
+from .memory import MemoryLimitError
+from .parser_pool import ParserPoolBusyError, ParserPoolTimeoutError, BUSY_RETRY_AFTER, dispatch_parse, get_parser_pool
 from .logger import CLIPSLogger
 
 app = Flask(__name__)
@@ -24,8 +26,8 @@ def parse_variation_pdf():
         # Get optional format type hint
         format_type = data.get('format_type')
         
-        # Process PDF
-        variation_set = parser.parse_variation_pdf(pdf_source, format_type)
+        # Process PDF on the warm parser pool, with a per-stage timing report when debugging
+        variation_set, timing = dispatch_parse(parser, pdf_source, format_type, timed=bool(data.get('debug')))
         
         # Apply field updates if provided
         field_updates = data.get('field_updates', [])
@@ -42,8 +44,16 @@ def parse_variation_pdf():
             if var_name and value:
                 variation_set = parser.add_field_value(variation_set, var_name, value, data_id)
         
+        if timing:
+            return jsonify(dict(variation_set, timing=timing))
         return jsonify(variation_set)
     
+    except ParserPoolBusyError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(BUSY_RETRY_AFTER)}
+    except ParserPoolTimeoutError as e:
+        return jsonify({"error": str(e)}), 504
+    except MemoryLimitError as e:
+        return jsonify({"error": f"PDF is too large to parse within the memory limit: {str(e)}"}), 413
     except Exception as e:
         logger.error(f"API error: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -102,6 +112,8 @@ def add_field():
 
 def run_api(host='0.0.0.0', port=5000, debug=False):
     """Run the API server"""
+    # Start the parser workers before serving so the first parse does not pay for it
+    get_parser_pool(logger)
     app.run(host=host, port=port, debug=debug)
 
 if __name__ == '__main__':
@@ -0,0 +1,429 @@
+import os
+import re
+import json
+import mmap
+import struct
+import hashlib
+import time
+import tempfile
+import threading
+import functools
+from .config import CATALOG_DIR, CATALOG_GC_GRACE_SECONDS
+
+# File layout, all integers little-endian:
+#   header   magic, format version, code count, and the offset/length of each section
+#   records  for each CIP code, its items as compact UTF-8 JSON
+#   index    one entry per code, sorted by code: key offset/length, record offset/length
+#   keys     the CIP codes, UTF-8, back to back
+#   meta     JSON with the data type, source file and item count
+CATALOG_MAGIC = b"CLIPSCAT"
+CATALOG_FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHxxIQQQQQQ")
+INDEX_ENTRY = struct.Struct("<IIQI")
+
+CATALOG_SUFFIX = ".catalog"
+
+# Catalogs are named by the SHA-256 hex digest of their contents
+CATALOG_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Which owners (session files) reference each catalog, kept next to the catalogs
+CATALOG_REFS_FILE = "refs.json"
+
+# CIP codes are a 2-digit series, optionally followed by a 2-digit and then a
+# 2-digit detail: 52 (series), 52.02 (4-digit family), 52.0201 (6-digit code).
+# Only dotted codes are padded; a bare number could as well be a level ID
+CIP_CODE_PATTERN = re.compile(r"(\d{1,2})\.(\d{1,4})")
+CIP_UNDOTTED_PATTERN = re.compile(r"\d{4}|\d{6}")
+CIP_SIX_DIGIT_PATTERN = re.compile(r"(\d{2})\.(\d{2})(\d{2})?")
+
+
+def catalog_path(content_hash, catalog_dir=None):
+    """Where the catalog with this content hash is stored
+
+    Hashes come from session files, so anything but a SHA-256 hex digest is
+    rejected before it becomes part of a path.
+
+    Raises:
+        ValueError: If content_hash is not 64 lowercase hex characters
+    """
+    if not isinstance(content_hash, str) or not CATALOG_HASH_PATTERN.fullmatch(content_hash):
+        raise ValueError(f"Invalid catalog hash: {content_hash!r}")
+    return os.path.join(catalog_dir or CATALOG_DIR, content_hash + CATALOG_SUFFIX)
+
+
+def normalize_cip_code(cip_code):
+    """Canonical NN, NN.NN or NN.NNNN form of a CIP code
+
+    Spreadsheet exports drop leading and trailing zeros and sometimes the
+    dot, so "5.02", "52.2", "5202" and "520201" become "05.02", "52.20",
+    "52.02" and "52.0201". Anything else, including bare 1- and 2-digit
+    numbers such as a level ID "1" (which must not match series "01"), is
+    only stripped of surrounding whitespace.
+    """
+    code = str(cip_code).strip()
+    if CIP_UNDOTTED_PATTERN.fullmatch(code):
+        code = f"{code[:2]}.{code[2:]}"
+    match = CIP_CODE_PATTERN.fullmatch(code)
+    if not match:
+        return code
+    series, detail = match.groups()
+    return f"{series.zfill(2)}.{detail.ljust(2 if len(detail) <= 2 else 4, '0')}"
+
+
+@functools.lru_cache(maxsize=4096)
+def cip_fallback_chain(cip_code):
+    """Codes to try for a CIP code, most specific first
+
+    The normalized code is followed by its 4-digit and 2-digit families, so
+    "52.0201" falls back to "52.02" and then "52". The code as written comes
+    first when it differs, for datasets indexed before codes were normalized.
+    """
+    code = normalize_cip_code(cip_code)
+    chain = [code]
+    match = CIP_SIX_DIGIT_PATTERN.fullmatch(code)
+    if match:
+        series, family, detail = match.groups()
+        if detail:
+            chain.append(f"{series}.{family}")
+        chain.append(series)
+
+    raw = str(cip_code).strip()
+    if raw != code:
+        chain.insert(0, raw)
+    return tuple(chain)
+
+
+def _write_atomic(path, content):
+    """Write bytes to a temporary file first so a reader never sees a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_catalog(indexed_data, catalog_dir=None):
+    """Write an indexed programs/clubs dataset as a catalog file and return a reference to it
+
+    The file is named by the SHA-256 of its bytes, and its contents depend only
+    on the data, so importing the same data again reuses the existing file.
+
+    Args:
+        indexed_data (dict): JSONParser.parse_json_file output
+        catalog_dir (str, optional): Directory to write to (default CATALOG_DIR)
+
+    Returns:
+        dict: Reference for the session: type, source_file, catalog (content
+            hash), cip_codes and item_count
+    """
+    by_cip_code = indexed_data.get("by_cip_code", {})
+    codes = sorted(by_cip_code)
+    item_count = sum(len(items) for items in by_cip_code.values())
+
+    records = bytearray()
+    keys = bytearray()
+    index = bytearray()
+    for code in codes:
+        record = json.dumps(by_cip_code[code], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        key = code.encode("utf-8")
+        index += INDEX_ENTRY.pack(len(keys), len(key), HEADER.size + len(records), len(record))
+        records += record
+        keys += key
+    meta = json.dumps({
+        "type": indexed_data.get("type"),
+        "source_file": indexed_data.get("source_file"),
+        "item_count": item_count
+    }, sort_keys=True).encode("utf-8")
+
+    index_offset = HEADER.size + len(records)
+    keys_offset = index_offset + len(index)
+    meta_offset = keys_offset + len(keys)
+    header = HEADER.pack(CATALOG_MAGIC, CATALOG_FORMAT_VERSION, len(codes),
+                         index_offset, len(index), keys_offset, len(keys), meta_offset, len(meta))
+    content = b"".join([header, records, index, keys, meta])
+    content_hash = hashlib.sha256(content).hexdigest()
+
+    path = catalog_path(content_hash, catalog_dir)
+    if os.path.exists(path):
+        # Restart the unused grace period for a catalog imported again
+        os.utime(path)
+    else:
+        _write_atomic(path, content)
+
+    return {
+        "type": indexed_data.get("type"),
+        "source_file": indexed_data.get("source_file"),
+        "catalog": content_hash,
+        "cip_codes": codes,
+        "item_count": item_count
+    }
+
+
+class Catalog:
+    """Read-only, memory-mapped catalog of program or club items keyed by CIP code
+
+    Opening reads only the header and the offset table; each get() decodes the
+    items of one CIP code straight from the mapped file, so the rest of the
+    catalog is never loaded into Python objects.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, count, index_offset, index_length, keys_offset, keys_length,
+             meta_offset, meta_length) = HEADER.unpack_from(self._map, 0)
+            if magic != CATALOG_MAGIC:
+                raise ValueError(f"Not a catalog file: {path}")
+            if version != CATALOG_FORMAT_VERSION:
+                raise ValueError(f"Unsupported catalog format version {version} (expected {CATALOG_FORMAT_VERSION})")
+
+            keys = self._map[keys_offset:keys_offset + keys_length]
+            self._offsets = {}
+            for entry in range(count):
+                key_offset, key_length, record_offset, record_length = INDEX_ENTRY.unpack_from(
+                    self._map, index_offset + entry * INDEX_ENTRY.size)
+                code = keys[key_offset:key_offset + key_length].decode("utf-8")
+                # Catalogs written before codes were normalized may hold two spellings of one code
+                self._offsets.setdefault(normalize_cip_code(code), []).append((record_offset, record_length))
+            self.metadata = json.loads(self._map[meta_offset:meta_offset + meta_length])
+        except Exception:
+            self.close()
+            raise
+
+        # Requested code -> catalog code it resolved to (or None), so each level's
+        # fallback chain is walked once
+        self._matches = {}
+
+    def match(self, cip_code):
+        """The catalog code holding items for a CIP code or its nearest family, or None"""
+        try:
+            return self._matches[cip_code]
+        except KeyError:
+            pass
+        matched = next((code for code in cip_fallback_chain(cip_code) if code in self._offsets), None)
+        self._matches[cip_code] = matched
+        return matched
+
+    def get(self, cip_code, default=None):
+        """Items for a CIP code, falling back to its 4- and 2-digit families
+        (default, or an empty list, if none of them have any)"""
+        matched = self.match(cip_code)
+        if matched is None:
+            return [] if default is None else default
+        items = []
+        for offset, length in self._offsets[matched]:
+            items.extend(json.loads(self._map[offset:offset + length]))
+        return items
+
+    def __contains__(self, cip_code):
+        return self.match(cip_code) is not None
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def cip_codes(self):
+        """Every (normalized) CIP code in the catalog, sorted"""
+        return sorted(self._offsets)
+
+    def close(self):
+        """Unmap and close the catalog file"""
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_open_catalogs = {}
+# Handles taken by open_catalog() and not yet released, by catalog path
+_catalog_handles = {}
+_open_catalogs_lock = threading.Lock()
+
+
+def _touch(path):
+    """Restart a catalog's unused grace period"""
+    try:
+        os.utime(path)
+    except OSError:
+        # A read-only store still serves lookups; the catalog just ages from its last write
+        pass
+
+
+def open_catalog(content_hash, catalog_dir=None):
+    """Shared open Catalog for a content hash; each catalog file is mapped once per process
+
+    Every call takes a handle that keeps collect_catalogs() from deleting or
+    unmapping the catalog until it is given back with release_catalog().
+    """
+    path = catalog_path(content_hash, catalog_dir)
+    with _open_catalogs_lock:
+        catalog = _open_catalogs.get(path)
+        if catalog is None:
+            catalog = Catalog(path)
+            _open_catalogs[path] = catalog
+        _catalog_handles[path] = _catalog_handles.get(path, 0) + 1
+    _touch(path)
+    return catalog
+
+
+def release_catalog(catalog):
+    """Give back a handle taken by open_catalog(); the catalog stays mapped for reuse"""
+    with _open_catalogs_lock:
+        handles = _catalog_handles.get(catalog.path, 0) - 1
+        if handles > 0:
+            _catalog_handles[catalog.path] = handles
+        else:
+            _catalog_handles.pop(catalog.path, None)
+    # The grace period counts from the last use, not from when a long run started
+    _touch(catalog.path)
+
+
+def resolve_dataset(dataset, catalog_dir=None):
+    """Turn a session's imported programs/clubs entry into something lookup_items can read
+
+    Catalog references are opened (memory-mapped) on demand and hold a handle
+    until release_dataset(); datasets saved by older sessions with an embedded
+    by_cip_code dict are returned unchanged.
+    """
+    if isinstance(dataset, dict) and dataset.get("catalog"):
+        return open_catalog(dataset["catalog"], catalog_dir)
+    return dataset
+
+
+def release_dataset(dataset):
+    """Release the handle resolve_dataset() took on a catalog (embedded datasets hold none)"""
+    if isinstance(dataset, Catalog):
+        release_catalog(dataset)
+
+
+def match_cip_code(dataset, cip_code):
+    """The code a dataset holds items under for a CIP code or its nearest family, or None"""
+    if not dataset:
+        return None
+    if isinstance(dataset, Catalog):
+        return dataset.match(cip_code)
+    by_cip_code = dataset.get("by_cip_code", {})
+    return next((code for code in cip_fallback_chain(cip_code) if by_cip_code.get(code)), None)
+
+
+def lookup_items(dataset, cip_code):
+    """Items for a CIP code from an open Catalog or an embedded by_cip_code dataset,
+    falling back to the code's 4- and 2-digit families"""
+    if not dataset:
+        return []
+    if isinstance(dataset, Catalog):
+        return dataset.get(cip_code)
+    matched = match_cip_code(dataset, cip_code)
+    return dataset["by_cip_code"][matched] if matched else []
+
+
+_refs_lock = threading.Lock()
+
+
+def _refs_path(catalog_dir=None):
+    return os.path.join(catalog_dir or CATALOG_DIR, CATALOG_REFS_FILE)
+
+
+def load_catalog_refs(catalog_dir=None):
+    """Owners referencing each catalog ({content hash: [owner, ...]}), or None if none have been recorded"""
+    path = _refs_path(catalog_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_catalog_refs(owner_catalogs, catalog_dir=None):
+    """Record which catalogs each owner references, replacing what was recorded before
+
+    Args:
+        owner_catalogs (dict): {owner: iterable of content hashes}; an empty
+            iterable releases every catalog the owner held
+        catalog_dir (str, optional): Catalog directory (default CATALOG_DIR)
+
+    Returns:
+        list: Content hashes whose last reference was released
+    """
+    with _refs_lock:
+        refs = load_catalog_refs(catalog_dir) or {}
+        before = {content_hash for content_hash, owners in refs.items() if owners}
+        for owner, catalogs in owner_catalogs.items():
+            catalogs = set(catalogs)
+            for content_hash in set(refs) | catalogs:
+                owners = [o for o in refs.get(content_hash, []) if o != owner]
+                if content_hash in catalogs:
+                    owners.append(owner)
+                refs[content_hash] = sorted(owners)
+        refs = {content_hash: owners for content_hash, owners in sorted(refs.items()) if owners}
+        _write_atomic(_refs_path(catalog_dir), json.dumps(refs, indent=2).encode("utf-8"))
+        return sorted(before - set(refs))
+
+
+def collect_catalogs(catalog_dir=None, grace_seconds=None):
+    """Delete catalogs that no owner references and that have gone unused past the grace period
+
+    Owners whose file no longer exists (a session deleted outside the app) are
+    dropped first, so their catalogs become collectable. Catalogs with open
+    handles (in use by a request or a generation run) are never collected.
+
+    Returns:
+        list: Content hashes of the deleted catalogs
+    """
+    catalog_dir = catalog_dir or CATALOG_DIR
+    grace_seconds = CATALOG_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    if not os.path.isdir(catalog_dir):
+        return []
+
+    with _refs_lock:
+        refs = load_catalog_refs(catalog_dir) or {}
+        gone = {owner for owners in refs.values() for owner in owners if not os.path.exists(owner)}
+    if gone:
+        update_catalog_refs({owner: [] for owner in gone}, catalog_dir)
+
+    removed = []
+    now = time.time()
+    with _refs_lock:
+        refs = load_catalog_refs(catalog_dir) or {}
+        for filename in sorted(os.listdir(catalog_dir)):
+            if not filename.endswith(CATALOG_SUFFIX):
+                continue
+            content_hash = filename[:-len(CATALOG_SUFFIX)]
+            path = os.path.join(catalog_dir, filename)
+            if refs.get(content_hash) or now - os.path.getmtime(path) < grace_seconds:
+                continue
+            # Held under the lock so the catalog cannot be opened between the check and the removal
+            with _open_catalogs_lock:
+                if _catalog_handles.get(path):
+                    continue
+                catalog = _open_catalogs.pop(path, None)
+                if catalog is not None:
+                    catalog.close()
+                os.remove(path)
+            removed.append(content_hash)
+    return removed
+
+
+def catalog_store_status(catalog_dir=None):
+    """Catalog count, total size and reference counts for status endpoints"""
+    catalog_dir = catalog_dir or CATALOG_DIR
+    filenames = [f for f in os.listdir(catalog_dir) if f.endswith(CATALOG_SUFFIX)] if os.path.isdir(catalog_dir) else []
+    refs = load_catalog_refs(catalog_dir) or {}
+    with _open_catalogs_lock:
+        open_count = len(_open_catalogs)
+        in_use = len(_catalog_handles)
+    return {
+        "catalogs": len(filenames),
+        "bytes": sum(os.path.getsize(os.path.join(catalog_dir, f)) for f in filenames),
+        "open": open_count,
+        "in_use": in_use,
+        "references": {content_hash: len(owners) for content_hash, owners in refs.items()}
+    }
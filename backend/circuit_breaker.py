@@ -0,0 +1,169 @@
+import time
+import threading
+from collections import deque
+from .config import (
+    CIRCUIT_BREAKER_FAILURE_RATE,
+    CIRCUIT_BREAKER_WINDOW,
+    CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_RECOVERY_SECONDS,
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for calls to an external service
+
+    The breaker tracks the outcome of the last ``window`` calls. Once at least
+    ``min_calls`` outcomes are recorded and the failure rate reaches
+    ``failure_rate``, it opens and rejects calls for ``recovery_seconds``. After
+    that it goes half-open and lets ``half_open_calls`` trial calls through:
+    if they all succeed the breaker closes again, any failure re-opens it.
+    """
+
+    def __init__(self, name="openai", failure_rate=None, window=None, min_calls=None,
+                 recovery_seconds=None, half_open_calls=None, logger=None):
+        self.name = name
+        self.failure_rate = CIRCUIT_BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+        self.window = CIRCUIT_BREAKER_WINDOW if window is None else window
+        self.min_calls = CIRCUIT_BREAKER_MIN_CALLS if min_calls is None else min_calls
+        self.recovery_seconds = CIRCUIT_BREAKER_RECOVERY_SECONDS if recovery_seconds is None else recovery_seconds
+        self.half_open_calls = CIRCUIT_BREAKER_HALF_OPEN_CALLS if half_open_calls is None else half_open_calls
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes = deque(maxlen=self.window)
+        self._opened_at = None
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def before_call(self):
+        """Reserve a call slot, raising CircuitOpenError if the call must not be made"""
+        with self._lock:
+            self._refresh_state()
+
+            if self._state == OPEN:
+                self._rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit breaker '{self.name}' is open; refusing call",
+                    retry_after=self._retry_after()
+                )
+
+            if self._state == HALF_OPEN:
+                if self._trial_calls >= self.half_open_calls:
+                    self._rejected += 1
+                    raise CircuitOpenError(
+                        f"Circuit breaker '{self.name}' is half-open; trial call already in progress",
+                        retry_after=1.0
+                    )
+                self._trial_calls += 1
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._transition(CLOSED)
+                return
+            self._outcomes.append(True)
+
+    def release_call(self):
+        """Give back the slot of a call whose outcome says nothing about the service's health
+
+        A rejected request (a 400 or an authentication error) is the caller's
+        fault, so it neither counts against the service nor uses up a
+        half-open trial.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._trial_calls > self._trial_successes:
+                self._trial_calls -= 1
+
+    def record_failure(self):
+        """Record a failed call, opening the breaker if the failure rate is too high"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+
+            self._outcomes.append(False)
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for ok in self._outcomes if not ok)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._transition(OPEN)
+
+    def seconds_until_retry(self):
+        """Seconds until an open breaker will allow a trial call (0 if calls are allowed)"""
+        with self._lock:
+            self._refresh_state()
+            if self._state == OPEN:
+                return self._retry_after()
+            return 0.0
+
+    def reset(self):
+        """Force the breaker back to the closed state"""
+        with self._lock:
+            self._transition(CLOSED)
+
+    def get_status(self):
+        """Return a JSON-serializable snapshot of the breaker state"""
+        with self._lock:
+            self._refresh_state()
+            failures = sum(1 for ok in self._outcomes if not ok)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "failure_rate": round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+                "failure_rate_threshold": self.failure_rate,
+                "window_calls": len(self._outcomes),
+                "window_size": self.window,
+                "retry_after": round(self._retry_after(), 1) if self._state == OPEN else 0.0,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected
+            }
+
+    def _refresh_state(self):
+        # Move from open to half-open once the recovery period has elapsed
+        if self._state == OPEN and self._retry_after() <= 0:
+            self._transition(HALF_OPEN)
+
+    def _retry_after(self):
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.recovery_seconds - time.monotonic())
+
+    def _transition(self, new_state):
+        old_state = self._state
+        self._state = new_state
+        self._trial_calls = 0
+        self._trial_successes = 0
+
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+            self._times_opened += 1
+        elif new_state == CLOSED:
+            self._opened_at = None
+            self._outcomes.clear()
+
+        if self.logger and old_state != new_state:
+            self.logger.warning(f"Circuit breaker '{self.name}' changed state: {old_state} -> {new_state}")
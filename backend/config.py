@@ -10,17 +10,111 @@ APP_NAME = "Copywriter's Lightweight Iteration Pipeline System"
 
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# Point the client at an OpenAI-compatible server, e.g. backend.mock_openai_server
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "") or None
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
 
 DEFAULT_MODEL = "gpt-4o"
 
+# Number of variations generate_all_variations generates in parallel
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "1"))
+
+# USD per 1M tokens, used by the pre-flight run estimator
+MODEL_PRICING = {
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4.1": {"input": 2.00, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "output": 1.60}
+}
+
+# Pre-flight run estimator settings
+ESTIMATE_MAX_PROMPTS = int(os.getenv("ESTIMATE_MAX_PROMPTS", "500"))
+ESTIMATE_OUTPUT_RATIO = float(os.getenv("ESTIMATE_OUTPUT_RATIO", "1.3"))
+ESTIMATE_BASE_LATENCY_SECONDS = float(os.getenv("ESTIMATE_BASE_LATENCY_SECONDS", "1.0"))
+ESTIMATE_OUTPUT_TOKENS_PER_SECOND = float(os.getenv("ESTIMATE_OUTPUT_TOKENS_PER_SECOND", "60"))
+
+# Token budget for the program/club data block in each draft prompt
+PROMPT_DATA_TOKEN_BUDGET = int(os.getenv("PROMPT_DATA_TOKEN_BUDGET", "1500"))
+PROMPT_DATA_MAX_ITEMS = int(os.getenv("PROMPT_DATA_MAX_ITEMS", "5"))
+PROMPT_DATA_MAX_FIELD_CHARS = int(os.getenv("PROMPT_DATA_MAX_FIELD_CHARS", "600"))
+PROMPT_DATA_MAX_LIST_ITEMS = int(os.getenv("PROMPT_DATA_MAX_LIST_ITEMS", "5"))
+# Fields kept in prompts for each data type, in output order
+PROMPT_DATA_FIELDS = {
+    "programs": ["program_name", "degree_type", "description", "highlights", "career_paths"],
+    "clubs": ["club_name", "description", "activities", "meeting_frequency"]
+}
+
+# Imported program/club items are stored whole and projected onto PROMPT_DATA_FIELDS
+# when prompts are built; set to true to keep only those fields (plus eab_cip_code)
+# in catalogs, which then have to be re-imported whenever the fields change
+JSON_IMPORT_PROJECT_FIELDS = os.getenv("JSON_IMPORT_PROJECT_FIELDS", "false").lower() == "true"
+
+# Variable names (lowercase) whose levels carry a CIP code for data lookups
+FIELD_OF_INTEREST_VARIABLES = ["academic field of interest", "field of interest", "program", "major"]
+
+# Page-parallel PDF extraction: worker processes, and the page count at which to use them.
+# Applies to parses run in-process (the CLI, or the API with PARSER_POOL_ENABLED
+# off); parser pool workers and run_parser.py --batch parallelise across
+# documents instead and extract each one's pages serially
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+# Skip table detection on pages without enough ruling lines to form a table
+PDF_TABLE_PREFILTER = os.getenv("PDF_TABLE_PREFILTER", "true").lower() == "true"
+# Release each page's layout objects once extracted, and stop a parse whose
+# process grows past PDF_PARSE_MAX_RSS_MB (0 disables the ceiling)
+PDF_LOW_MEMORY = os.getenv("PDF_LOW_MEMORY", "true").lower() == "true"
+PDF_PARSE_MAX_RSS_MB = int(os.getenv("PDF_PARSE_MAX_RSS_MB", "2048"))
+
+# Reuse extraction and parse results for PDFs that have been parsed before
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true"
+
+# Catalogs no session references any more are deleted once they have gone
+# unused for this many seconds (a fresh import is kept until its session is saved)
+CATALOG_GC_GRACE_SECONDS = int(os.getenv("CATALOG_GC_GRACE_SECONDS", "3600"))
+
+# Warm parser processes that /api/parse and /api/parse/pdf hand PDFs to, so
+# parsing never holds the API server's GIL. Requests arriving while every
+# worker is busy and PARSER_POOL_MAX_QUEUE requests are already waiting are
+# refused with 503; a job running past PARSER_POOL_JOB_TIMEOUT seconds has its
+# worker killed and replaced.
+PARSER_POOL_ENABLED = os.getenv("PARSER_POOL_ENABLED", "true").lower() == "true"
+PARSER_POOL_WORKERS = int(os.getenv("PARSER_POOL_WORKERS", "2"))
+PARSER_POOL_MAX_QUEUE = int(os.getenv("PARSER_POOL_MAX_QUEUE", "8"))
+PARSER_POOL_JOB_TIMEOUT = float(os.getenv("PARSER_POOL_JOB_TIMEOUT", "120"))
+# Uploads up to this size are sent to a pool worker through its pipe, in memory;
+# larger ones are spooled to a temporary file and the worker reads them from disk
+PARSER_POOL_PIPE_MAX_BYTES = int(os.getenv("PARSER_POOL_PIPE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Variation PDFs downloaded from URLs
+PDF_DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_CONNECT_TIMEOUT", "10"))
+PDF_DOWNLOAD_READ_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_READ_TIMEOUT", "60"))
+PDF_DOWNLOAD_MAX_BYTES = int(os.getenv("PDF_DOWNLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Downloads larger than this are spooled to disk instead of memory
+PDF_DOWNLOAD_SPOOL_BYTES = int(os.getenv("PDF_DOWNLOAD_SPOOL_BYTES", str(5 * 1024 * 1024)))
+
+# Circuit breaker around OpenAI calls
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", "10"))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "4"))
+CIRCUIT_BREAKER_RECOVERY_SECONDS = float(os.getenv("CIRCUIT_BREAKER_RECOVERY_SECONDS", "30"))
+CIRCUIT_BREAKER_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", "1"))
+# What generate_all_variations does while the breaker is open: 'pause' or 'fail'
+CIRCUIT_BREAKER_BULK_MODE = os.getenv("CIRCUIT_BREAKER_BULK_MODE", "pause").lower()
+CIRCUIT_BREAKER_MAX_PAUSE_SECONDS = float(os.getenv("CIRCUIT_BREAKER_MAX_PAUSE_SECONDS", "300"))
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-LOGS_DIR = os.path.join(BASE_DIR, "logs")
+# Overridable so processes started with spawn (which re-import this module) log to the same place
+LOGS_DIR = os.getenv("LOGS_DIR") or os.path.join(BASE_DIR, "logs")
 SESSIONS_DIR = os.path.join(BASE_DIR, "sessions")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+PARSE_CACHE_DIR = os.path.join(CACHE_DIR, "parse")
+# Imported programs/clubs catalogs, named by content hash and referenced from sessions
+CATALOG_DIR = os.path.join(BASE_DIR, "catalogs")
 
 def ensure_directories():
     """Ensure all required directories exist"""
-    for directory in [LOGS_DIR, SESSIONS_DIR, OUTPUT_DIR]:
+    for directory in [LOGS_DIR, SESSIONS_DIR, OUTPUT_DIR, PARSE_CACHE_DIR, CATALOG_DIR]:
         os.makedirs(directory, exist_ok=True)
 
 def get_openai_api_key():
@@ -0,0 +1,129 @@
+import math
+import bisect
+from .config import FIELD_OF_INTEREST_VARIABLES
+from .catalog import Catalog, match_cip_code, normalize_cip_code
+
+# Nearest catalog codes suggested for each level without data
+COVERAGE_SUGGESTIONS = 3
+
+
+def dataset_cip_codes(dataset):
+    """Every CIP code an open Catalog or an embedded by_cip_code dataset holds items under"""
+    if not dataset:
+        return []
+    if isinstance(dataset, Catalog):
+        return dataset.cip_codes
+    return [code for code, items in dataset.get("by_cip_code", {}).items() if items]
+
+
+def _common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def _code_distance(a, b):
+    """Numeric distance between two CIP codes (inf when either is not numeric)"""
+    try:
+        return abs(float(a) - float(b))
+    except ValueError:
+        return math.inf
+
+
+def nearest_cip_codes(cip_code, sorted_codes, limit=COVERAGE_SUGGESTIONS):
+    """Catalog codes closest to a CIP code, by shared prefix and then numeric distance
+
+    Normalized codes sort their families together ("52" < "52.02" <
+    "52.0201" < "53"), so the candidates are the neighbours of the code's
+    position in the sorted list rather than the whole catalog.
+    """
+    code = normalize_cip_code(cip_code)
+    position = bisect.bisect_left(sorted_codes, code)
+    ranked = []
+    for candidate in sorted_codes[max(0, position - limit * 2):position + limit * 2]:
+        prefix = _common_prefix_length(code, candidate)
+        distance = _code_distance(code, candidate)
+        # A code sharing nothing with the level (such as "Default") is no suggestion
+        if prefix or distance != math.inf:
+            ranked.append((-prefix, distance, candidate))
+    return [candidate for _, _, candidate in sorted(ranked)[:limit]]
+
+
+def data_coverage(variation_set, json_data, suggestions=COVERAGE_SUGGESTIONS):
+    """How well the imported programs and clubs data covers a variation set's field-of-interest levels
+
+    Each level's code is resolved once against both datasets the way
+    generate_all_variations looks it up (exact code, then its 4- and 2-digit
+    CIP families), and the number of combinations that would be generated
+    without data is computed from the level counts instead of by enumerating
+    the combinations.
+
+    Args:
+        variation_set (dict): Variables and levels to combine
+        json_data (dict): Imported programs/clubs data (open catalogs or embedded datasets)
+        suggestions (int): Nearest catalog codes to suggest for each level without data
+
+    Returns:
+        dict: field_variable, total_variations, missing_data_variations, a
+            summary of level counts by match kind, and per-level matches with
+            suggestions for the levels without data
+    """
+    variables = [var for var in variation_set.get("variables", []) if variation_set.get("levels", {}).get(var)]
+    level_counts = {var: len(variation_set["levels"][var]) for var in variables}
+    total = math.prod(level_counts.values()) if variables else 0
+    report = {
+        "field_variable": None,
+        "total_variations": total,
+        "missing_data_variations": 0,
+        "summary": {"levels": 0, "exact": 0, "family": 0, "missing": 0, "not_looked_up": 0, "coverage": None},
+        "levels": []
+    }
+
+    # The variable generate_all_variations reads CIP codes from
+    field_variable = next((var for var in variables if var.lower() in FIELD_OF_INTEREST_VARIABLES), None)
+    if field_variable is None:
+        return report
+    report["field_variable"] = field_variable
+
+    datasets = {data_type: json_data.get(data_type) for data_type in ("programs", "clubs")}
+    sorted_codes = None
+    summary = report["summary"]
+    missing_levels = 0
+
+    for level in variation_set["levels"][field_variable]:
+        cip_code = level.get("data") if isinstance(level, dict) else None
+        entry = {"value": level.get("value") if isinstance(level, dict) else level, "data": cip_code}
+        summary["levels"] += 1
+        if not cip_code:
+            # Levels without a code are generated without a data lookup
+            entry["match"] = None
+            summary["not_looked_up"] += 1
+            report["levels"].append(entry)
+            continue
+
+        matches = {data_type: match_cip_code(dataset, cip_code) for data_type, dataset in datasets.items()}
+        entry.update(matches)
+        found = [matched for matched in matches.values() if matched]
+        if not found:
+            entry["match"] = "missing"
+            missing_levels += 1
+            if suggestions:
+                if sorted_codes is None:
+                    sorted_codes = sorted({code for dataset in datasets.values() for code in dataset_cip_codes(dataset)})
+                entry["suggestions"] = nearest_cip_codes(cip_code, sorted_codes, suggestions)
+        elif normalize_cip_code(cip_code) in found or str(cip_code).strip() in found:
+            entry["match"] = "exact"
+        else:
+            entry["match"] = "family"
+        summary[entry["match"]] += 1
+        report["levels"].append(entry)
+
+    looked_up = summary["levels"] - summary["not_looked_up"]
+    if looked_up:
+        summary["coverage"] = round((looked_up - summary["missing"]) / looked_up, 4)
+    # Every combination pairing a level without data with any levels of the other variables
+    report["missing_data_variations"] = missing_levels * (total // level_counts[field_variable])
+    return report
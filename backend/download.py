@@ -0,0 +1,122 @@
+import hashlib
+import tempfile
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from .config import (
+    PDF_DOWNLOAD_CONNECT_TIMEOUT,
+    PDF_DOWNLOAD_READ_TIMEOUT,
+    PDF_DOWNLOAD_MAX_BYTES,
+    PDF_DOWNLOAD_SPOOL_BYTES
+)
+
+# Bytes read from the response at a time
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared requests session so repeated downloads reuse keep-alive connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+class DownloadTooLargeError(Exception):
+    """Raised when a download exceeds the configured size limit"""
+
+
+class DownloadResult:
+    """A downloaded PDF spooled to a temporary file, or a 304 Not Modified response"""
+
+    def __init__(self, file=None, content_hash=None, size=0, etag=None, last_modified=None, not_modified=False):
+        self.file = file
+        self.content_hash = content_hash
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+
+    @property
+    def validators(self):
+        """Conditional request validators for the next download of the same URL"""
+        return {"etag": self.etag, "last_modified": self.last_modified}
+
+
+def download_pdf(url, validators=None, max_bytes=None, timeout=None, logger=None):
+    """Stream a PDF to a spooled temporary file, hashing it as it arrives
+
+    Small files stay in memory; anything over PDF_DOWNLOAD_SPOOL_BYTES rolls
+    over to disk, so the whole document is never buffered in memory.
+
+    Args:
+        url (str): URL of the PDF
+        validators (dict, optional): "etag"/"last_modified" from a previous download;
+            sent as If-None-Match/If-Modified-Since
+        max_bytes (int, optional): Size limit, defaults to PDF_DOWNLOAD_MAX_BYTES
+        timeout (tuple, optional): (connect, read) timeouts in seconds
+        logger: Logger for progress messages
+
+    Returns:
+        DownloadResult: With not_modified set and no file when the server returned 304
+
+    Raises:
+        DownloadTooLargeError: If the response is larger than max_bytes
+    """
+    max_bytes = PDF_DOWNLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    timeout = timeout or (PDF_DOWNLOAD_CONNECT_TIMEOUT, PDF_DOWNLOAD_READ_TIMEOUT)
+
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    with get_session().get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            if logger:
+                logger.info(f"PDF not modified since last download: {url}")
+            return DownloadResult(not_modified=True, etag=validators.get("etag"),
+                                  last_modified=validators.get("last_modified"))
+
+        response.raise_for_status()  # Raise exception for HTTP errors
+
+        # Reject oversized files before reading the body when the server says how big they are
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise DownloadTooLargeError(f"PDF is {int(content_length)} bytes, over the {max_bytes} byte limit")
+
+        digest = hashlib.sha256()
+        size = 0
+        spool = tempfile.SpooledTemporaryFile(max_size=PDF_DOWNLOAD_SPOOL_BYTES)
+        try:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DownloadTooLargeError(f"PDF download exceeded the {max_bytes} byte limit")
+                digest.update(chunk)
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+
+        if logger:
+            logger.info(f"Downloaded {size} bytes from {url}")
+
+        return DownloadResult(
+            file=spool,
+            content_hash=digest.hexdigest(),
+            size=size,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
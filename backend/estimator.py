@@ -0,0 +1,125 @@
+import math
+import time
+from .config import (
+    DEFAULT_MODEL,
+    MODEL_PRICING,
+    GENERATION_CONCURRENCY,
+    ESTIMATE_MAX_PROMPTS,
+    ESTIMATE_OUTPUT_RATIO,
+    ESTIMATE_BASE_LATENCY_SECONDS,
+    ESTIMATE_OUTPUT_TOKENS_PER_SECOND
+)
+from .logger import CLIPSLogger
+from .output_generator import OutputGenerator
+from . import tokens
+
+
+class RunEstimator:
+    """Offline token, cost and wall-time estimates for a generate-all run
+
+    Builds the same prompts AIIntegration.generate_draft would send for each
+    combination of variation levels and counts their tokens locally. Large
+    combination spaces are sampled at evenly spaced positions and extrapolated.
+    """
+
+    def __init__(self, ai_integration, logger=None):
+        self.logger = logger or CLIPSLogger()
+        self.ai_integration = ai_integration
+
+    def estimate(self, original_copy, instruction_set, variation_set, json_data,
+                 model=None, concurrency=None, max_prompts=None, output_tokens_per_variation=None):
+        """Estimate the size, cost and duration of generating every variation
+
+        Args:
+            original_copy (str): Copy template
+            instruction_set (dict): Current instruction set
+            variation_set (dict): Variables and levels to combine
+            json_data (dict): Imported programs/clubs data
+            model (str, optional): Model to price, defaults to DEFAULT_MODEL
+            concurrency (int, optional): Parallel requests, defaults to GENERATION_CONCURRENCY
+            max_prompts (int, optional): Build at most this many prompts, sampling beyond it
+            output_tokens_per_variation (int, optional): Expected completion size per variation
+
+        Returns:
+            dict: Token, cost and wall-time estimates
+        """
+        start_time = time.perf_counter()
+        model = model or DEFAULT_MODEL
+        concurrency = max(1, int(concurrency or GENERATION_CONCURRENCY))
+        max_prompts = max(1, int(max_prompts or ESTIMATE_MAX_PROMPTS))
+
+        level_names, level_values = OutputGenerator.get_variation_dimensions(variation_set or {})
+        total = math.prod(len(values) for values in level_values) if level_names else 0
+
+        if output_tokens_per_variation is None:
+            output_tokens_per_variation = int(math.ceil(tokens.count_tokens(original_copy, model) * ESTIMATE_OUTPUT_RATIO))
+
+        estimate = {
+            "model": model,
+            "total_variations": total,
+            "prompts_counted": 0,
+            "sampled": False,
+            "exact_tokenizer": tokens.is_exact(),
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "avg_input_tokens": 0,
+            "max_input_tokens": 0,
+            "estimated_cost_usd": None,
+            "concurrency": concurrency,
+            "estimated_seconds": 0.0,
+            "estimator_seconds": 0.0
+        }
+
+        if total == 0:
+            return estimate
+
+        # Count every prompt, or an evenly spaced sample of them for large runs
+        sample_size = min(total, max_prompts)
+        step = total / sample_size
+        counted_tokens = []
+        for n in range(sample_size):
+            index = int(n * step)
+            combo = self._combination_at(index, level_values)
+            variation_levels = OutputGenerator.simplify_variation_levels(dict(zip(level_names, combo)))
+            messages = self.ai_integration.build_draft_messages(
+                original_copy, instruction_set, variation_levels, json_data
+            )
+            counted_tokens.append(tokens.count_message_tokens(messages, model))
+
+        avg_input = sum(counted_tokens) / len(counted_tokens)
+        input_tokens = int(round(avg_input * total))
+        output_tokens = output_tokens_per_variation * total
+
+        estimate.update({
+            "prompts_counted": sample_size,
+            "sampled": sample_size < total,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "avg_input_tokens": int(round(avg_input)),
+            "max_input_tokens": max(counted_tokens),
+            "output_tokens_per_variation": output_tokens_per_variation
+        })
+
+        pricing = MODEL_PRICING.get(model)
+        if pricing:
+            cost = (input_tokens * pricing["input"] + output_tokens * pricing["output"]) / 1_000_000
+            estimate["estimated_cost_usd"] = round(cost, 4)
+
+        # Each request costs a fixed latency plus the time to stream its completion
+        seconds_per_call = ESTIMATE_BASE_LATENCY_SECONDS + output_tokens_per_variation / ESTIMATE_OUTPUT_TOKENS_PER_SECOND
+        estimate["estimated_seconds"] = round(math.ceil(total / concurrency) * seconds_per_call, 1)
+        estimate["estimator_seconds"] = round(time.perf_counter() - start_time, 4)
+
+        self.logger.info(f"Run estimate: {total} variations, ~{input_tokens} input / {output_tokens} output tokens, "
+                         f"~{estimate['estimated_seconds']}s at concurrency {concurrency}")
+        return estimate
+
+    @staticmethod
+    def _combination_at(index, level_values):
+        """Decode the index-th itertools.product combination without enumerating the others"""
+        combo = []
+        for values in reversed(level_values):
+            index, position = divmod(index, len(values))
+            combo.append(values[position])
+        combo.reverse()
+        return combo
@@ -0,0 +1,129 @@
+import json
+from .memory import enforce_rss_ceiling
+from .timing import record_stage
+
+# Bump when the shape of the extracted page data changes; cached and saved
+# extractions with a different version are re-extracted from the PDF.
+EXTRACTION_VERSION = 3
+
+
+def may_have_tables(page):
+    """Cheap check for whether table detection can find anything on a page
+
+    pdfplumber's default table strategy builds cells from ruling lines, so a
+    page needs at least two horizontal and two vertical edges to hold a table.
+    """
+    return len(page.horizontal_edges) >= 2 and len(page.vertical_edges) >= 2
+
+
+def extract_tables(page):
+    """Tables on a page with their bounding boxes
+
+    Equivalent to page.extract_tables(), but keeps each table's bbox.
+    """
+    return [
+        {"bbox": list(table.bbox), "rows": table.extract()}
+        for table in page.find_tables()
+    ]
+
+
+def extract_page(page, table_prefilter=False):
+    """Extract the tables, their bounding boxes and the text of one pdfplumber page
+
+    With table_prefilter, table detection is skipped on pages that fail
+    may_have_tables; the page's "tables_scanned" flag records which it was.
+    """
+    with record_stage("extract_tables", page.page_number):
+        tables_scanned = not table_prefilter or may_have_tables(page)
+        tables = extract_tables(page) if tables_scanned else []
+    with record_stage("extract_text", page.page_number):
+        text = page.extract_text()
+    return {
+        "page_number": page.page_number,
+        "width": float(page.width),
+        "height": float(page.height),
+        "tables": tables,
+        "tables_scanned": tables_scanned,
+        "text": text
+    }
+
+
+def release_page(page, max_rss_mb=0):
+    """Drop a page's cached layout objects, then enforce the RSS ceiling
+
+    pdfplumber keeps every parsed page's characters, edges and text map alive
+    until the document is closed; releasing them bounds memory to about one
+    page at a time.
+    """
+    page.close()
+    enforce_rss_ceiling(max_rss_mb, f"after page {page.page_number}")
+
+
+class PDFExtraction:
+    """Intermediate representation of a PDF: the raw tables and text on each page
+
+    Produced once by PDFParser.extract_pdf (the expensive pdfplumber stage) and
+    consumed by PDFParser.interpret_extraction (the parsing heuristics). It is
+    plain JSON when serialized, so extractions can be saved, re-interpreted
+    after heuristic changes, or used as fixtures without pdfplumber.
+
+    Each page is a dict with page_number, width, height, text, tables_scanned
+    and tables, where each table is {"bbox": [x0, top, x1, bottom],
+    "rows": [[cell, ...], ...]}.
+    """
+
+    def __init__(self, pages, content_hash=None, version=EXTRACTION_VERSION):
+        self.pages = pages
+        self.content_hash = content_hash
+        self.version = version
+
+    @property
+    def tables(self):
+        """Every table's rows across all pages, in page order"""
+        return [table["rows"] for page in self.pages for table in page["tables"]]
+
+    @property
+    def text(self):
+        """The text of all pages, separated by blank lines"""
+        return "".join(page["text"] + "\n\n" for page in self.pages if page["text"])
+
+    def table_stats(self):
+        """How many pages went through table detection and how many were skipped"""
+        scanned = sum(1 for page in self.pages if page.get("tables_scanned", True))
+        return {
+            "pages": len(self.pages),
+            "table_pages_scanned": scanned,
+            "table_pages_skipped": len(self.pages) - scanned,
+            "tables": sum(len(page["tables"]) for page in self.pages)
+        }
+
+    def to_dict(self):
+        """Serialize to a JSON-compatible dict"""
+        return {
+            "version": self.version,
+            "content_hash": self.content_hash,
+            "pages": self.pages
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an extraction from to_dict() output
+
+        Raises:
+            ValueError: If the data was written by a different extraction version
+        """
+        version = data.get("version")
+        if version != EXTRACTION_VERSION:
+            raise ValueError(f"Unsupported extraction version {version} (expected {EXTRACTION_VERSION})")
+        return cls(data.get("pages", []), data.get("content_hash"), version)
+
+    def save(self, path):
+        """Write the extraction to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Read an extraction written by save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,106 @@
+from abc import ABC, abstractmethod
+
+# Terms in a unified table's first column that name a known variable
+UNIFIED_VARIABLE_TERMS = ["gpa", "grade", "academic", "field", "distance", "miles"]
+
+
+class FormatHandler(ABC):
+    """Base class for variation PDF format handlers
+
+    A handler scores how well an extraction matches its format with a cheap
+    detect() over the already-extracted tables, and turns the extraction into
+    levels with extract(). Handlers are tried from the highest score down until
+    one succeeds. Register new partner formats with register_format_handler().
+    """
+
+    name = None
+
+    @abstractmethod
+    def detect(self, tables, scanner):
+        """Score from 0 (not this format) to 1 (certainly this format)"""
+
+    @abstractmethod
+    def extract(self, parser, tables, scanner, variation_set):
+        """Fill variation_set from the extraction, returning True on success"""
+
+
+class UnifiedTableFormat(FormatHandler):
+    """One table defining every variable: variables in rows, levels in columns"""
+
+    name = "unified"
+
+    def detect(self, tables, scanner):
+        for table in tables:
+            if not table or len(table) < 3 or not table[0]:
+                continue
+            header = str(table[0][0]).lower().strip() if table[0][0] else ""
+            if not any(term in header for term in ["variable", "var", "type"]):
+                continue
+            # Only the first definition-like table is processed, so only it counts
+            for row in table[1:]:
+                if row and len(row) >= 2 and row[0]:
+                    first_cell = str(row[0]).lower()
+                    if any(term in first_cell for term in UNIFIED_VARIABLE_TERMS):
+                        return 0.9
+            return 0.0
+        return 0.0
+
+    def extract(self, parser, tables, scanner, variation_set):
+        return parser._extract_from_unified_table(tables, variation_set)
+
+
+class SouthCarolinaFormat(FormatHandler):
+    """EAB variation list with a 'Variation' / 'Field of Interest' table"""
+
+    name = "south_carolina"
+
+    def detect(self, tables, scanner):
+        for table in tables:
+            if not table or len(table) < 3:
+                continue
+            for row in table[:3]:
+                if not row:
+                    continue
+                cells_text = " ".join(str(cell) for cell in row if cell)
+                if "Field of Interest" in cells_text and "Variation" in cells_text:
+                    return 0.8
+        return 0.0
+
+    def extract(self, parser, tables, scanner, variation_set):
+        parser._extract_variables_individually(tables, scanner, variation_set)
+        return True
+
+
+class IndividualVariablesFormat(FormatHandler):
+    """Fallback: look for each variable's own table or text segment, with defaults"""
+
+    name = "individual"
+
+    def detect(self, tables, scanner):
+        # Always applicable, but only when nothing more specific matches
+        return 0.1
+
+    def extract(self, parser, tables, scanner, variation_set):
+        parser._extract_variables_individually(tables, scanner, variation_set)
+        return True
+
+
+FORMAT_HANDLERS = [
+    UnifiedTableFormat(),
+    SouthCarolinaFormat(),
+    IndividualVariablesFormat()
+]
+
+
+def register_format_handler(handler, registry=None):
+    """Add a format handler, replacing any registered under the same name"""
+    registry = FORMAT_HANDLERS if registry is None else registry
+    registry[:] = [existing for existing in registry if existing.name != handler.name]
+    registry.append(handler)
+    return handler
+
+
+def get_format_handler(name, registry=None):
+    """The registered handler with this name, or None"""
+    registry = FORMAT_HANDLERS if registry is None else registry
+    return next((handler for handler in registry if handler.name == name), None)
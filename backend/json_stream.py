@@ -0,0 +1,110 @@
+import json
+
+# Characters read from the file at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+JSON_WHITESPACE = " \t\n\r"
+
+# Characters that can continue a JSON number
+NUMBER_CHARACTERS = "0123456789.eE+-"
+
+_decoder = json.JSONDecoder()
+
+
+class _StreamBuffer:
+    """A text file read in chunks, holding only the part not yet decoded"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append the next chunk, dropping what has been consumed; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next non-whitespace character without consuming it ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in JSON_WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, allowed):
+        """Consume the next non-whitespace character, which must be one of allowed"""
+        char = self.peek()
+        if not char or char not in allowed:
+            found = repr(char) if char else "end of file"
+            raise ValueError(f"Expected one of {', '.join(repr(c) for c in allowed)} but found {found}")
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """Decode the next complete JSON value, reading more of the file as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number may have been cut off mid-chunk ("1." or "1.5e"); it is only
+                # complete once a character that cannot continue it has been read
+                number_cut = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                              and (end == len(self.buffer) or self.buffer[end] in NUMBER_CHARACTERS))
+                if not number_cut or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self.fill():
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                self.pos = end
+                return value
+
+
+def iter_json_items(f, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the items of a top-level JSON array or object one at a time
+
+    Only the current item and the unread part of the current chunk are held
+    in memory, so a large catalog can be indexed without loading it whole.
+
+    Args:
+        f: Text file object positioned at the start of the document
+        chunk_size (int): Characters read at a time
+
+    Yields:
+        tuple: (key, value), where key is None for array items
+
+    Raises:
+        ValueError: If the document is not an array or object, or is malformed
+    """
+    stream = _StreamBuffer(f, chunk_size)
+    opener = stream.expect("[{")
+    closer = "]" if opener == "[" else "}"
+
+    if stream.peek() == closer:
+        stream.pos += 1
+        return
+
+    while True:
+        key = None
+        if opener == "{":
+            key = stream.decode()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key but found {key!r}")
+            stream.expect(":")
+        yield key, stream.decode()
+        if stream.expect("," + closer) == closer:
+            return
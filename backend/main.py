@@ -3,7 +3,7 @@ import sys
 import json
 import random
 import datetime
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import re
 
@@ -13,9 +13,21 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend.config import ensure_directories, get_app_settings, save_openai_api_key
 from backend.logger import CLIPSLogger
 from backend.parsing import PDFParser, JSONParser
+from backend.memory import MemoryLimitError
+from backend.parser_pool import (
+    ParserPoolBusyError,
+    ParserPoolTimeoutError,
+    BUSY_RETRY_AFTER,
+    current_parser_pool,
+    dispatch_parse,
+    get_parser_pool
+)
 from backend.ai_integration import AIIntegration
 from backend.session_manager import SessionManager
 from backend.output_generator import OutputGenerator
+from backend.estimator import RunEstimator
+from backend.coverage import data_coverage
+from backend.catalog import resolve_dataset, release_dataset, catalog_store_status
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -48,20 +60,45 @@ app_logger = logger.get_logger()
 app_logger.info("Starting CLIPS backend")
 
 session_manager = SessionManager(logger)
+session_manager.collect_catalogs()
 pdf_parser = PDFParser(logger)
 json_parser = JSONParser(logger)
 ai_integration = AIIntegration(logger)
 output_generator = OutputGenerator(ai_integration, logger)
+run_estimator = RunEstimator(ai_integration, logger)
 
 # Current session state
 current_session = session_manager.create_empty_session()
 
+def get_imported_data():
+    """Programs and clubs data for the current session, with catalog references opened on demand
+
+    Catalogs opened here stay in use, so catalog collection leaves them alone,
+    until the request ends.
+    """
+    opened = g.setdefault("imported_datasets", [])
+    json_data = {}
+    for data_type in ("programs", "clubs"):
+        json_data[data_type] = resolve_dataset(current_session["imported_data"].get(data_type))
+        opened.append(json_data[data_type])
+    return json_data
+
+@app.teardown_request
+def release_imported_data(exc):
+    """Release the catalogs get_imported_data opened during the request"""
+    for dataset in g.pop("imported_datasets", []):
+        release_dataset(dataset)
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Get the application status and settings"""
+    parser_pool = current_parser_pool()
     return jsonify({
         "status": "ok",
-        "settings": get_app_settings()
+        "settings": get_app_settings(),
+        "circuit_breaker": ai_integration.get_circuit_status(),
+        "parser_pool": parser_pool.status() if parser_pool else None,
+        "catalog_store": catalog_store_status()
     })
 
 @app.route('/api/openai/setup', methods=['POST'])
@@ -174,19 +211,20 @@ def parse_pdf():
     # Log file details
     app_logger.info(f"Received file: {pdf_file.filename}, size: {pdf_file.content_length}")
     
-    # Save the uploaded file temporarily
-    temp_filepath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                              "temp_uploads", pdf_file.filename)
-    os.makedirs(os.path.dirname(temp_filepath), exist_ok=True)
-    
     try:
-        pdf_file.save(temp_filepath)
-        file_size = os.path.getsize(temp_filepath)
-        app_logger.info(f"File saved to {temp_filepath}, size: {file_size} bytes")
+        # Parse straight from the upload stream (kept in memory or spooled by werkzeug)
+        upload = pdf_file.stream
+        upload.seek(0, os.SEEK_END)
+        file_size = upload.tell()
+        upload.seek(0)
+        app_logger.info(f"Parsing uploaded file {pdf_file.filename}, size: {file_size} bytes")
         logger.log_interaction("upload_pdf", {"filename": pdf_file.filename, "size": file_size})
         
-        # Parse the PDF
-        variation_set = pdf_parser.parse_variation_pdf(temp_filepath)
+        # Collect a per-stage timing report when debugging (?debug=true or a "debug" form field)
+        debug = (request.args.get('debug') or request.form.get('debug') or '').lower() in ('1', 'true', 'yes')
+        
+        # Parse the PDF on the warm parser pool
+        variation_set, timing = dispatch_parse(pdf_parser, upload, timed=debug)
         
         # Update session state
         current_session["instruction_set"]["variation_list_data"] = variation_set
@@ -195,15 +233,23 @@ def parse_pdf():
         session_manager.save_session(current_session)
         
         # Return the parsed data
-        return jsonify({"success": True, "variation_set": variation_set})
+        response = {"success": True, "variation_set": variation_set}
+        if timing:
+            response["timing"] = timing
+        return jsonify(response)
+    except ParserPoolBusyError as e:
+        app_logger.warning(f"Rejected PDF parse: {str(e)}")
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(BUSY_RETRY_AFTER)}
+    except ParserPoolTimeoutError as e:
+        app_logger.error(f"PDF parse timed out: {str(e)}")
+        return jsonify({"error": str(e)}), 504
+    except MemoryLimitError as e:
+        # The document needs more memory than PDF_PARSE_MAX_RSS_MB allows; retrying will not help
+        app_logger.error(f"PDF parse hit the memory limit: {str(e)}")
+        return jsonify({"error": f"PDF is too large to parse within the memory limit: {str(e)}"}), 413
     except Exception as e:
         app_logger.exception(f"Failed to parse PDF: {str(e)}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_filepath):
-            app_logger.info(f"Removing temporary file: {temp_filepath}")
-            os.remove(temp_filepath)
 
 @app.route('/api/parse/json', methods=['POST'])
 def parse_json():
@@ -236,9 +282,9 @@ def parse_json():
         app_logger.info(f"JSON file saved to {temp_filepath}, size: {file_size} bytes")
         logger.log_interaction("upload_json", {"filename": json_file.filename, "size": file_size})
         
-        # Parse the JSON
-        indexed_data = json_parser.parse_json_file(temp_filepath)
-        app_logger.info(f"JSON parsed successfully: {len(indexed_data.get('by_cip_code', {}))} CIP codes found")
+        # Parse the JSON into a catalog; the session keeps only a reference to it
+        indexed_data = json_parser.import_json_file(temp_filepath)
+        app_logger.info(f"JSON parsed successfully: {len(indexed_data['cip_codes'])} CIP codes found")
         
         # Update session state based on data type
         data_type = indexed_data.get("type", "unknown")
@@ -422,10 +468,7 @@ def generate_draft():
         current_session["current_variation_levels"] = variation_levels
         
         # Prepare imported data
-        json_data = {
-            "programs": current_session["imported_data"].get("programs"),
-            "clubs": current_session["imported_data"].get("clubs")
-        }
+        json_data = get_imported_data()
         
         # Generate the draft
         draft = ai_integration.generate_draft(
@@ -495,10 +538,7 @@ def process_feedback():
         variation_levels = current_session["current_variation_levels"]
         
         # Prepare imported data
-        json_data = {
-            "programs": current_session["imported_data"].get("programs"),
-            "clubs": current_session["imported_data"].get("clubs")
-        }
+        json_data = get_imported_data()
         
         # Generate the draft
         draft = ai_integration.generate_draft(
@@ -541,10 +581,7 @@ def preview_sample_variations():
         logger.log_interaction("preview_sample_variations")
         
         # Prepare imported data
-        json_data = {
-            "programs": current_session["imported_data"].get("programs"),
-            "clubs": current_session["imported_data"].get("clubs")
-        }
+        json_data = get_imported_data()
         
         # Get variation data
         variation_set = current_session["instruction_set"]["variation_list_data"]
@@ -679,10 +716,66 @@ def preview_sample_variations():
         app_logger.exception("Failed to preview sample variations")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/variations/estimate', methods=['POST'])
+def estimate_all_variations():
+    """Estimate tokens, cost and wall time for generating all variations"""
+    global current_session
+    data = request.json or {}
+    
+    try:
+        if not current_session["instruction_set"].get("variation_list_data") or \
+           not current_session["instruction_set"]["variation_list_data"].get("variables"):
+            return jsonify({"error": "Variation definition data is required"}), 400
+        
+        # Prepare imported data
+        json_data = get_imported_data()
+        
+        estimate = run_estimator.estimate(
+            current_session["original_copy"],
+            current_session["instruction_set"],
+            current_session["instruction_set"]["variation_list_data"],
+            json_data,
+            model=data.get('model'),
+            concurrency=data.get('concurrency'),
+            max_prompts=data.get('max_prompts'),
+            output_tokens_per_variation=data.get('output_tokens_per_variation')
+        )
+        
+        return jsonify({"success": True, "estimate": estimate})
+    except Exception as e:
+        app_logger.exception("Failed to estimate variations run")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/variations/coverage', methods=['GET'])
+def variations_data_coverage():
+    """Report which Academic Field levels have programs/clubs data before generating"""
+    global current_session
+    
+    try:
+        if not current_session["instruction_set"].get("variation_list_data") or \
+           not current_session["instruction_set"]["variation_list_data"].get("variables"):
+            return jsonify({"error": "Variation definition data is required"}), 400
+        
+        coverage = data_coverage(
+            current_session["instruction_set"]["variation_list_data"],
+            get_imported_data(),
+            suggestions=request.args.get('suggestions', 3, type=int)
+        )
+        logger.log_interaction("variations_data_coverage", {
+            "missing_data_variations": coverage["missing_data_variations"],
+            "total_variations": coverage["total_variations"]
+        })
+        
+        return jsonify({"success": True, "coverage": coverage})
+    except Exception as e:
+        app_logger.exception("Failed to compute data coverage")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/variations/generate_all', methods=['POST'])
 def generate_all_variations():
     """Generate all possible variations"""
     global current_session
+    data = request.get_json(silent=True) or {}
     
     try:
         # Check if we have necessary components
@@ -697,17 +790,15 @@ def generate_all_variations():
         logger.log_interaction("generate_all_variations")
         
         # Prepare imported data
-        json_data = {
-            "programs": current_session["imported_data"].get("programs"),
-            "clubs": current_session["imported_data"].get("clubs")
-        }
+        json_data = get_imported_data()
         
         # Generate all variations
         results = output_generator.generate_all_variations(
             current_session["original_copy"],
             current_session["instruction_set"],
             current_session["instruction_set"]["variation_list_data"],
-            json_data
+            json_data,
+            concurrency=data.get('concurrency')
         )
         
         # Save the session
@@ -758,6 +849,9 @@ if __name__ == '__main__':
         f.write(str(port))
     print(f"Port information saved to {status_file_path}")
     
+    # Start the parser workers before serving so the first parse does not pay for it
+    get_parser_pool(app_logger)
+    
     # Run without debug mode to prevent automatic reloading
     # Use 0.0.0.0 to bind to all available interfaces
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
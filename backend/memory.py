@@ -0,0 +1,41 @@
+import gc
+import os
+import sys
+import resource
+
+
+class MemoryLimitError(Exception):
+    """Raised when the process grows past a configured RSS ceiling"""
+
+
+def current_rss_mb():
+    """Current resident set size of this process, in MB
+
+    Read from /proc/self/statm on Linux. Elsewhere the peak RSS is the best
+    cheap figure available, which only errs on the side of reporting more.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def enforce_rss_ceiling(max_rss_mb, context=""):
+    """Raise MemoryLimitError if RSS is over max_rss_mb even after a garbage collection
+
+    A max_rss_mb of 0 or None disables the check.
+    """
+    if not max_rss_mb:
+        return
+    if current_rss_mb() <= max_rss_mb:
+        return
+    # Only pay for a full collection once the ceiling is reached
+    gc.collect()
+    rss = current_rss_mb()
+    if rss > max_rss_mb:
+        where = f" {context}" if context else ""
+        raise MemoryLimitError(f"Memory use {rss:.0f} MB exceeds the {max_rss_mb} MB limit{where}")
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Local mock of the OpenAI chat completions API for offline load and latency testing
+Usage: python -m backend.mock_openai_server [--port 8089] [--latency lognormal --latency-mean 0.8]
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8089/v1 and any
+non-empty OPENAI_API_KEY.
+"""
+import json
+import time
+import math
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from . import tokens
+
+DEFAULT_CONFIG = {
+    # Time to first token: 'fixed', 'uniform', 'normal' or 'lognormal'
+    "latency": "fixed",
+    "latency_mean": 0.2,
+    "latency_jitter": 0.05,
+    # Completion size and generation speed
+    "completion_tokens": 200,
+    "tokens_per_second": 0,  # 0 returns the whole completion immediately
+    # Fault injection, as probabilities per request
+    "error_rate_429": 0.0,
+    "error_rate_500": 0.0,
+    "retry_after": 1,
+    # Seed for latency and fault injection so runs are reproducible
+    "seed": 0
+}
+
+FILLER_WORDS = ["Discover", "your", "future", "at", "our", "campus", "where", "students", "explore",
+                "programs", "build", "community", "and", "grow", "through", "hands-on", "learning"]
+
+
+class MockOpenAIServer:
+    """Fake OpenAI-compatible chat completions server running in a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = dict(DEFAULT_CONFIG)
+        self.configure(**config)
+        self._stats_lock = threading.Lock()
+        self._rng_lock = threading.Lock()
+        self._rng = random.Random(self.config["seed"])
+        self.reset_stats()
+
+        handler = self._make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def configure(self, **config):
+        """Update latency, token rate or fault injection settings"""
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown mock server settings: {', '.join(sorted(unknown))}")
+        self.config.update(config)
+        if "seed" in config:
+            self._rng = random.Random(self.config["seed"])
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats = {
+                "requests": 0,
+                "completions": 0,
+                "streamed": 0,
+                "errors_429": 0,
+                "errors_500": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "in_flight": 0,
+                "max_in_flight": 0
+            }
+
+    def start(self):
+        """Serve requests in a daemon thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _sample_latency(self):
+        """Draw a time-to-first-token from the configured distribution"""
+        mean = float(self.config["latency_mean"])
+        jitter = float(self.config["latency_jitter"])
+        kind = self.config["latency"]
+
+        with self._rng_lock:
+            if kind == "uniform":
+                value = self._rng.uniform(mean - jitter, mean + jitter)
+            elif kind == "normal":
+                value = self._rng.gauss(mean, jitter)
+            elif kind == "lognormal":
+                # Parameterized so the distribution mean is latency_mean
+                sigma = jitter
+                mu = math.log(mean) - sigma ** 2 / 2 if mean > 0 else 0
+                value = self._rng.lognormvariate(mu, sigma) if mean > 0 else 0
+            else:
+                value = mean
+        return max(0.0, value)
+
+    def _sample_fault(self):
+        """Decide whether to inject an error for this request"""
+        with self._rng_lock:
+            roll = self._rng.random()
+        if roll < self.config["error_rate_429"]:
+            return 429
+        if roll < self.config["error_rate_429"] + self.config["error_rate_500"]:
+            return 500
+        return None
+
+    def _record(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def _completion_text(self, messages, completion_tokens):
+        """Deterministic filler text derived from the prompt"""
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+        offset = int(digest[:8], 16)
+        words = [FILLER_WORDS[(offset + i) % len(FILLER_WORDS)] for i in range(max(1, completion_tokens))]
+        return f"[mock {digest[:12]}] " + " ".join(words)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                # Keep benchmark output clean
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") in ("/v1/models", "/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+                elif self.path.rstrip("/") == "/mock/stats":
+                    with server._stats_lock:
+                        self._send_json(200, {"config": server.config, "stats": dict(server.stats)})
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+            def do_POST(self):
+                body = self._read_json()
+                path = self.path.rstrip("/")
+
+                if path == "/mock/config":
+                    try:
+                        server.configure(**body)
+                        self._send_json(200, {"config": server.config})
+                    except ValueError as e:
+                        self._send_json(400, {"error": {"message": str(e), "type": "invalid_request_error"}})
+                elif path == "/mock/reset":
+                    server.reset_stats()
+                    self._send_json(200, {"success": True})
+                elif path in ("/v1/chat/completions", "/chat/completions"):
+                    server._record(in_flight=1, requests=1)
+                    try:
+                        self._chat_completion(body)
+                    finally:
+                        server._record(in_flight=-1)
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+            def _chat_completion(self, body):
+                messages = body.get("messages") or []
+                model = body.get("model", "mock-model")
+                config = server.config
+
+                time.sleep(server._sample_latency())
+
+                fault = server._sample_fault()
+                if fault == 429:
+                    server._record(errors_429=1)
+                    self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error",
+                                                    "code": "rate_limit_exceeded"}},
+                                    headers={"Retry-After": str(config["retry_after"])})
+                    return
+                if fault == 500:
+                    server._record(errors_500=1)
+                    self._send_json(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+                    return
+
+                completion_tokens = int(body.get("max_tokens") or config["completion_tokens"])
+                prompt_tokens = tokens.count_message_tokens(messages, model)
+                text = server._completion_text(messages, completion_tokens)
+                server._record(completions=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+                completion_id = f"chatcmpl-mock-{int(time.time() * 1000)}"
+                if body.get("stream"):
+                    server._record(streamed=1)
+                    self._stream(completion_id, model, text, completion_tokens, prompt_tokens, body)
+                    return
+
+                # Non-streaming responses still take as long as generating the tokens would
+                rate = config["tokens_per_second"]
+                if rate:
+                    time.sleep(completion_tokens / rate)
+
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens
+                    }
+                })
+
+            def _stream(self, completion_id, model, text, completion_tokens, prompt_tokens, body):
+                """Send the completion as server-sent events, one word per chunk"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                rate = server.config["tokens_per_second"]
+                words = text.split(" ")
+                delay = (completion_tokens / rate) / len(words) if rate else 0
+
+                def chunk(delta, finish_reason=None):
+                    return {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    }
+
+                try:
+                    self._send_event(chunk({"role": "assistant", "content": ""}))
+                    for i, word in enumerate(words):
+                        if delay:
+                            time.sleep(delay)
+                        self._send_event(chunk({"content": word if i == 0 else " " + word}))
+                    final = chunk({}, "stop")
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        final["usage"] = {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens
+                        }
+                    self._send_event(final)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def _send_event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return {}
+                try:
+                    return json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    return {}
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    """Run the mock server from the command line"""
+    parser = argparse.ArgumentParser(description='Mock OpenAI chat completions server')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8089, help='Port to bind (default: 8089)')
+    parser.add_argument('--latency', type=str, default=DEFAULT_CONFIG["latency"],
+                        choices=['fixed', 'uniform', 'normal', 'lognormal'], help='Latency distribution')
+    parser.add_argument('--latency-mean', type=float, default=DEFAULT_CONFIG["latency_mean"],
+                        help='Mean time to first token in seconds')
+    parser.add_argument('--latency-jitter', type=float, default=DEFAULT_CONFIG["latency_jitter"],
+                        help='Spread (uniform half-width, normal stddev or lognormal sigma)')
+    parser.add_argument('--completion-tokens', type=int, default=DEFAULT_CONFIG["completion_tokens"],
+                        help='Tokens per completion')
+    parser.add_argument('--tokens-per-second', type=float, default=DEFAULT_CONFIG["tokens_per_second"],
+                        help='Generation speed (0 for instant)')
+    parser.add_argument('--error-rate-429', type=float, default=0.0, help='Probability of a 429 response')
+    parser.add_argument('--error-rate-500', type=float, default=0.0, help='Probability of a 500 response')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_jitter=args.latency_jitter,
+        completion_tokens=args.completion_tokens,
+        tokens_per_second=args.tokens_per_second,
+        error_rate_429=args.error_rate_429,
+        error_rate_500=args.error_rate_500,
+        seed=args.seed
+    )
+    print(f"Mock OpenAI server running on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping mock server")
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,126 +1,250 @@
 import os
 import json
+import time
 import datetime
+import threading
 from pathlib import Path
 import itertools
-from .config import OUTPUT_DIR
+from concurrent.futures import ThreadPoolExecutor
+from .config import (
+    OUTPUT_DIR,
+    GENERATION_CONCURRENCY,
+    CIRCUIT_BREAKER_BULK_MODE,
+    CIRCUIT_BREAKER_MAX_PAUSE_SECONDS,
+    FIELD_OF_INTEREST_VARIABLES
+)
 from .logger import CLIPSLogger
+from .circuit_breaker import CircuitOpenError
+from .catalog import lookup_items
 
 class OutputGenerator:
     """Class to handle generation of final variations and formatting output"""
     
-    def __init__(self, ai_integration, logger=None):
+    def __init__(self, ai_integration, logger=None, output_dir=None):
         self.logger = logger or CLIPSLogger()
         self.ai_integration = ai_integration
+        self.output_dir = output_dir or OUTPUT_DIR
+        self._results_lock = threading.Lock()
+        # One thread pauses for an open circuit at a time; the rest wait on this lock
+        self._pause_lock = threading.Lock()
+        self._pauses = 0
         
         # Ensure output directory exists
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
     
-    def generate_all_variations(self, original_copy, instruction_set, variation_set, json_data):
-        """Generate all possible variations based on the Cartesian product of variation levels"""
+    def generate_all_variations(self, original_copy, instruction_set, variation_set, json_data, concurrency=None):
+        """Generate all possible variations based on the Cartesian product of variation levels
+        
+        Up to `concurrency` variations (GENERATION_CONCURRENCY by default) are
+        generated in parallel; results are reported in combination order.
+        """
         # Initialize counters
         results = {
             "total": 0,
             "success": 0,
             "failure": 0,
             "missing_data": 0,
+            "skipped": 0,
+            "aborted": False,
+            "paused_seconds": 0.0,
+            "elapsed_seconds": 0.0,
             "variations": []
         }
         
-        # Get all variables and their levels
-        variables = variation_set.get("variables", [])
-        levels = variation_set.get("levels", {})
-        
-        if not variables or not levels:
+        if not variation_set.get("variables") or not variation_set.get("levels"):
             self.logger.log_error("Cannot generate variations: No variation variables or levels defined")
             return results
         
-        # Generate all possible combinations of levels
-        level_values = []
-        level_names = []
-        
-        for var in variables:
-            if var in levels and levels[var]:
-                level_values.append(levels[var])
-                level_names.append(var)
+        start_time = time.perf_counter()
         
         # Get all combinations (Cartesian product)
+        level_names, level_values = self.get_variation_dimensions(variation_set)
         combinations = list(itertools.product(*level_values))
         results["total"] = len(combinations)
         
+        concurrency = max(1, int(concurrency or GENERATION_CONCURRENCY))
+        stop_event = threading.Event()
+        
+        def generate(i, combo):
+            # Skip remaining combinations once the job has been stopped
+            if stop_event.is_set():
+                return {"status": "skipped"}
+            variation_levels = dict(zip(level_names, combo))
+            return self._generate_variation(i, len(combinations), original_copy, instruction_set,
+                                            variation_levels, json_data, results, stop_event)
+        
         # Generate each variation
-        for i, combo in enumerate(combinations):
-            # Create the specific variation levels for this combination
-            variation_levels = {}
-            for j, level_obj in enumerate(combo):
-                var_name = level_names[j]
-                variation_levels[var_name] = level_obj
+        if concurrency == 1:
+            outcomes = [generate(i, combo) for i, combo in enumerate(combinations)]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = list(executor.map(generate, range(len(combinations)), combinations))
+        
+        for outcome in outcomes:
+            if outcome.get("missing_data"):
+                results["missing_data"] += 1
+            
+            if outcome["status"] == "success":
+                results["success"] += 1
+                results["variations"].append(outcome["variation"])
+            elif outcome["status"] == "failure":
+                results["failure"] += 1
+            else:
+                results["skipped"] += 1
+                if outcome["status"] == "aborted" and not results["aborted"]:
+                    results["aborted"] = True
+                    self.logger.log_error(f"Stopping bulk generation at variation {outcome['index']+1}/{len(combinations)}: "
+                                        f"{outcome['error']}", {"type": "api_error", "source": "circuit_breaker"})
+        
+        results["paused_seconds"] = round(results["paused_seconds"], 3)
+        results["elapsed_seconds"] = round(time.perf_counter() - start_time, 3)
+        
+        if hasattr(self.ai_integration, "get_circuit_status"):
+            results["circuit_breaker"] = self.ai_integration.get_circuit_status()
+        
+        return results
+    
+    def _generate_variation(self, i, total, original_copy, instruction_set, variation_levels, json_data, results, stop_event):
+        """Generate, format and save a single variation, returning its outcome"""
+        # Check for missing JSON data if needed
+        missing_data = False
+        field_of_interest_var = next((var for var in variation_levels if var.lower() in FIELD_OF_INTEREST_VARIABLES), None)
+        
+        if field_of_interest_var and variation_levels.get(field_of_interest_var, {}).get("data"):
+            cip_code = variation_levels[field_of_interest_var]["data"]
+            program_data = lookup_items(json_data.get('programs'), cip_code)
+            club_data = lookup_items(json_data.get('clubs'), cip_code)
             
-            # Check for missing JSON data if needed
-            missing_data = False
-            field_of_interest_var = next((var for var in level_names if var.lower() in ['field of interest', 'program', 'major']), None)
+            if not program_data and not club_data:
+                missing_data = True
+                self.logger.log_missing_json_data(cip_code, variation_levels)
+        
+        # Prepare a simplified version of variation_levels for the AI prompt
+        simple_variation_levels = self.simplify_variation_levels(variation_levels)
+        
+        # Generate the variation
+        try:
+            # Generate draft
+            generation_start = time.perf_counter()
+            prompt_metadata = {}
+            variation_content = self._generate_with_circuit_breaker(
+                original_copy, 
+                instruction_set, 
+                simple_variation_levels, 
+                json_data,
+                results,
+                prompt_metadata
+            )
+            generation_seconds = time.perf_counter() - generation_start
             
-            if field_of_interest_var and variation_levels.get(field_of_interest_var, {}).get("data"):
-                cip_code = variation_levels[field_of_interest_var]["data"]
-                program_data = json_data.get('programs', {}).get('by_cip_code', {}).get(cip_code, [])
-                club_data = json_data.get('clubs', {}).get('by_cip_code', {}).get(cip_code, [])
-                
-                if not program_data and not club_data:
-                    missing_data = True
-                    results["missing_data"] += 1
-                    self.logger.log_missing_json_data(cip_code, variation_levels)
+            # Format as Markdown
+            markdown_content = self._format_as_markdown(variation_content, simple_variation_levels,
+                                                        prompt_metadata.get("data_reduction"))
+            
+            # Create filename
+            filename = self._create_variation_filename(instruction_set.get("partner_name", ""), simple_variation_levels,
+                                                       index=i, total=total)
+            
+            # Save the file
+            write_start = time.perf_counter()
+            filepath = self._write_new_file(filename, markdown_content)
+            filename = os.path.basename(filepath)
+            write_seconds = time.perf_counter() - write_start
             
-            # Generate the variation
+            # Log the output
+            self.logger.log_output(filename, markdown_content, simple_variation_levels)
+            
+            return {
+                "status": "success",
+                "missing_data": missing_data,
+                "variation": {
+                    "filename": filename,
+                    "filepath": filepath,
+                    "levels": simple_variation_levels,
+                    "missing_data": missing_data,
+                    "generation_seconds": round(generation_seconds, 4),
+                    "write_seconds": round(write_seconds, 5)
+                }
+            }
+            
+        except CircuitOpenError as e:
+            # Stop the job once instead of logging a failure for every remaining combination
+            stop_event.set()
+            return {"status": "aborted", "missing_data": missing_data, "index": i, "error": str(e)}
+        except Exception as e:
+            self.logger.log_error(f"Failed to generate variation {i+1}/{total}", 
+                                {"variation_levels": simple_variation_levels}, e)
+            return {"status": "failure", "missing_data": missing_data}
+    
+    def _generate_with_circuit_breaker(self, original_copy, instruction_set, variation_levels, json_data, results,
+                                       metadata=None):
+        """Generate a draft, pausing while the OpenAI circuit breaker is open
+        
+        Concurrent variations share one pause: the first to find the circuit
+        open sleeps while the others wait for it and then retry, and the
+        wall-clock time slept counts against CIRCUIT_BREAKER_MAX_PAUSE_SECONDS.
+        Raises CircuitOpenError when the job should stop instead: in 'fail'
+        mode, or once the total pause time would exceed that budget.
+        """
+        while True:
+            pauses_seen = self._pauses
             try:
-                # Prepare a simplified version of variation_levels for the AI prompt
-                simple_variation_levels = {}
-                for var_name, level_obj in variation_levels.items():
-                    simple_variation_levels[var_name] = level_obj.get("value")
-                    if level_obj.get("data"):
-                        simple_variation_levels[var_name] = {
-                            "value": level_obj.get("value"),
-                            "data": level_obj.get("data")
-                        }
-                
-                # Generate draft
-                variation_content = self.ai_integration.generate_draft(
+                return self.ai_integration.generate_draft(
                     original_copy, 
                     instruction_set, 
-                    simple_variation_levels, 
-                    json_data
+                    variation_levels, 
+                    json_data,
+                    metadata
                 )
+            except CircuitOpenError as e:
+                if CIRCUIT_BREAKER_BULK_MODE != "pause":
+                    raise
                 
-                # Format as Markdown
-                markdown_content = self._format_as_markdown(variation_content, simple_variation_levels)
-                
-                # Create filename
-                filename = self._create_variation_filename(instruction_set.get("partner_name", ""), simple_variation_levels)
-                
-                # Save the file
-                filepath = os.path.join(OUTPUT_DIR, filename)
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
-                
-                # Log the output
-                self.logger.log_output(filename, markdown_content, simple_variation_levels)
-                
-                # Update counters
-                results["success"] += 1
-                results["variations"].append({
-                    "filename": filename,
-                    "filepath": filepath,
-                    "levels": simple_variation_levels,
-                    "missing_data": missing_data
-                })
-                
-            except Exception as e:
-                results["failure"] += 1
-                self.logger.log_error(f"Failed to generate variation {i+1}/{len(combinations)}", 
-                                    {"variation_levels": simple_variation_levels}, e)
+                with self._pause_lock:
+                    # Another variation paused while this one was waiting; retry first
+                    if self._pauses != pauses_seen:
+                        continue
+                    
+                    wait_time = max(e.retry_after, 1.0)
+                    if results["paused_seconds"] + wait_time > CIRCUIT_BREAKER_MAX_PAUSE_SECONDS:
+                        raise
+                    
+                    self.logger.warning(f"OpenAI circuit breaker is open, pausing bulk generation for {wait_time:.1f}s")
+                    pause_start = time.perf_counter()
+                    time.sleep(wait_time)
+                    with self._results_lock:
+                        results["paused_seconds"] += time.perf_counter() - pause_start
+                    self._pauses += 1
+    
+    @staticmethod
+    def get_variation_dimensions(variation_set):
+        """Get the variable names and level lists that make up the combination space"""
+        variables = variation_set.get("variables", [])
+        levels = variation_set.get("levels", {})
         
-        return results
+        level_names = []
+        level_values = []
+        for var in variables:
+            if var in levels and levels[var]:
+                level_names.append(var)
+                level_values.append(levels[var])
+        
+        return level_names, level_values
     
-    def _format_as_markdown(self, content, variation_levels):
+    @staticmethod
+    def simplify_variation_levels(variation_levels):
+        """Reduce level objects to the form passed to the AI prompt"""
+        simple_variation_levels = {}
+        for var_name, level_obj in variation_levels.items():
+            simple_variation_levels[var_name] = level_obj.get("value")
+            if level_obj.get("data"):
+                simple_variation_levels[var_name] = {
+                    "value": level_obj.get("value"),
+                    "data": level_obj.get("data")
+                }
+        return simple_variation_levels
+    
+    def _format_as_markdown(self, content, variation_levels, data_reduction=None):
         """Format the generated content as Markdown with metadata"""
         # Create the frontmatter
         frontmatter = [
@@ -137,6 +261,18 @@ class OutputGenerator:
             else:
                 frontmatter.append(f"  {var}: {level}")
         
+        # Record how program/club data was cut down to fit the prompt budget
+        if data_reduction and data_reduction.get("reduced"):
+            frontmatter.extend([
+                "data_reduction:",
+                f"  budget_tokens: {data_reduction['budget_tokens']}",
+                f"  original_tokens: {data_reduction['original_tokens']}",
+                f"  final_tokens: {data_reduction['final_tokens']}",
+                f"  programs: {data_reduction['programs']['kept']}/{data_reduction['programs']['original']}",
+                f"  clubs: {data_reduction['clubs']['kept']}/{data_reduction['clubs']['original']}",
+                f"  truncated_fields: {data_reduction['truncated_fields']}"
+            ])
+        
         frontmatter.append("---\n")
         
         # Combine frontmatter and content
@@ -144,8 +280,34 @@ class OutputGenerator:
         
         return markdown
     
-    def _create_variation_filename(self, partner_name, variation_levels):
-        """Create a filename for the variation based on its levels"""
+    def _write_new_file(self, filename, content):
+        """Write content to a new file in the output directory, never overwriting one
+        
+        If the name is taken (by another run in the same second), a numeric
+        suffix is added until an unused name is found.
+        
+        Returns:
+            str: Path of the file written
+        """
+        stem, extension = os.path.splitext(filename)
+        attempt = 1
+        while True:
+            filepath = os.path.join(self.output_dir, filename)
+            try:
+                # 'x' creates the file atomically and fails if it already exists
+                with open(filepath, 'x', encoding='utf-8') as f:
+                    f.write(content)
+                return filepath
+            except FileExistsError:
+                attempt += 1
+                filename = f"{stem}_{attempt}{extension}"
+    
+    def _create_variation_filename(self, partner_name, variation_levels, index=None, total=None):
+        """Create a filename for the variation based on its levels
+        
+        The variation's position in the run (index of total) is included, so
+        variations whose shortened level names coincide get distinct names.
+        """
         # Clean the partner name for use in filename
         if partner_name:
             clean_partner = partner_name.replace(" ", "_").replace("/", "-").replace("\\", "-")
@@ -162,6 +324,11 @@ class OutputGenerator:
                           replace(".", "p").replace("+", "plus").replace("<", "lt").replace(">", "gt")
             level_parts.append(f"{var[:3]}_{clean_level[:10]}")
         
+        # Add the variation number, padded so files sort in generation order
+        if index is not None:
+            width = len(str(total)) if total else 1
+            level_parts.append(f"{index + 1:0{width}d}")
+        
         # Add timestamp
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         
@@ -0,0 +1,132 @@
+import os
+import json
+import hashlib
+import tempfile
+from .config import PARSE_CACHE_DIR
+from .logger import CLIPSLogger
+
+# Bytes read at a time when hashing a PDF on disk
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_stream(stream):
+    """SHA-256 of a seekable binary stream's contents, leaving it rewound to the start"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def hash_bytes(data):
+    """SHA-256 of an in-memory byte string"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """Persistent cache of PDF parse results, keyed by the SHA-256 of the PDF bytes
+
+    Two layers are stored as JSON files:
+      - extraction/: the raw per-page tables and text, keyed by content hash and
+        extraction version. This is the expensive pdfplumber stage.
+      - variation_sets/: the final variation set, keyed by content hash, format
+        type and parser version.
+    A third directory, urls/, remembers the ETag/Last-Modified validators and
+    content hash of each downloaded URL so unchanged remote PDFs can be
+    revalidated with a conditional request instead of downloaded again.
+
+    Bumping the parser version only invalidates the second layer, so a change to
+    the parsing heuristics re-runs the cheap interpretation stage against the
+    cached extraction instead of re-reading every PDF.
+    """
+
+    def __init__(self, cache_dir=None, logger=None):
+        self.logger = logger or CLIPSLogger()
+        self.cache_dir = cache_dir or PARSE_CACHE_DIR
+        self.extraction_dir = os.path.join(self.cache_dir, "extraction")
+        self.variation_set_dir = os.path.join(self.cache_dir, "variation_sets")
+        self.url_dir = os.path.join(self.cache_dir, "urls")
+
+        for directory in (self.extraction_dir, self.variation_set_dir, self.url_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def get_extraction(self, content_hash, version):
+        """Load cached page extraction for a PDF, or None"""
+        return self._read(self._extraction_path(content_hash, version))
+
+    def put_extraction(self, content_hash, version, pages):
+        """Store the page extraction for a PDF"""
+        self._write(self._extraction_path(content_hash, version), pages)
+
+    def has_extraction(self, content_hash, version):
+        """Whether an extraction is cached for a PDF"""
+        return os.path.exists(self._extraction_path(content_hash, version))
+
+    def get_variation_set(self, content_hash, format_type, version):
+        """Load a cached variation set for a PDF and format type, or None"""
+        return self._read(self._variation_set_path(content_hash, format_type, version))
+
+    def put_variation_set(self, content_hash, format_type, version, variation_set):
+        """Store the variation set parsed from a PDF"""
+        self._write(self._variation_set_path(content_hash, format_type, version), variation_set)
+
+    def get_url_entry(self, url):
+        """Load the validators and content hash from the last download of a URL, or None"""
+        return self._read(self._url_path(url))
+
+    def put_url_entry(self, url, content_hash, etag=None, last_modified=None):
+        """Remember the validators and content hash of a downloaded URL"""
+        self._write(self._url_path(url), {
+            "url": url,
+            "content_hash": content_hash,
+            "etag": etag,
+            "last_modified": last_modified
+        })
+
+    def clear(self):
+        """Remove every cached entry"""
+        for directory in (self.extraction_dir, self.variation_set_dir, self.url_dir):
+            for filename in os.listdir(directory):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(directory, filename))
+
+    def _extraction_path(self, content_hash, version):
+        return os.path.join(self.extraction_dir, f"{content_hash}_v{version}.json")
+
+    def _variation_set_path(self, content_hash, format_type, version):
+        return os.path.join(self.variation_set_dir, f"{content_hash}_{format_type or 'auto'}_v{version}.json")
+
+    def _url_path(self, url):
+        return os.path.join(self.url_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json")
+
+    def _read(self, path):
+        """Read a cache entry; a missing or corrupt entry is a miss"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable parse cache entry {path}: {str(e)}")
+            return None
+
+    def _write(self, path, data):
+        """Write a cache entry atomically so concurrent readers never see a partial file"""
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # Caching is an optimization; a full disk should not fail the parse
+            self.logger.warning(f"Could not write parse cache entry {path}: {str(e)}")
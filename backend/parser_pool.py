@@ -0,0 +1,359 @@
+import os
+import time
+import queue
+import atexit
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from .config import (
+    PARSER_POOL_ENABLED,
+    PARSER_POOL_WORKERS,
+    PARSER_POOL_MAX_QUEUE,
+    PARSER_POOL_JOB_TIMEOUT,
+    PARSER_POOL_PIPE_MAX_BYTES
+)
+from .logger import CLIPSLogger
+from .memory import MemoryLimitError
+from .parsing import PDFParser
+from .timing import StageTimer
+
+# Seconds to wait for a new worker to import the parser and report ready
+WORKER_START_TIMEOUT = 60
+
+# Seconds a busy client is asked to wait before retrying
+BUSY_RETRY_AFTER = 5
+
+
+class ParserPoolBusyError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class ParserPoolTimeoutError(Exception):
+    """Raised when a parse job runs past the pool's job timeout"""
+
+
+class ParserWorkerError(Exception):
+    """Raised when a parse fails on a pool worker
+
+    error_type is the class name of the exception the worker raised (such as
+    "ValueError"), or None when the worker process itself died.
+    """
+
+    def __init__(self, message, error_type=None):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _worker_main(conn, parser_options):
+    """Worker process loop: build one parser, report ready, then parse jobs until told to stop
+
+    Each job is (source, format_type, timed) and is answered with
+    (status, variation set or (error type, error message), timing report or None).
+    """
+    parser = PDFParser(CLIPSLogger("parser_pool"), **parser_options)
+    conn.send(("ready", None, None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        source, format_type, timed = job
+        timer = StageTimer() if timed else None
+        try:
+            variation_set = parser.parse_variation_pdf(source, format_type, timer=timer)
+            conn.send(("ok", variation_set, timer.report() if timer else None))
+        except Exception as e:
+            conn.send(("error", (type(e).__name__, str(e)), None))
+
+
+class _Worker:
+    """A parser process and the parent's end of its pipe"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+
+class ParserPool:
+    """Pre-started parser processes that PDF parse jobs are dispatched to
+
+    Workers import pdfplumber and build their PDFParser once at start-up, so
+    a job only pays for the parse itself, and the CPU-heavy pdfminer work
+    runs outside the API server's process and GIL.
+
+    At most workers + max_queue jobs are admitted at once; parse() raises
+    ParserPoolBusyError beyond that rather than letting requests pile up. A
+    job that does not finish within job_timeout seconds raises
+    ParserPoolTimeoutError, and its worker is killed and replaced. A parse
+    that fails on a worker raises ParserWorkerError.
+
+    Workers are started with the spawn method, so they never inherit the API
+    server's threads, locks or open sockets.
+    """
+
+    def __init__(self, workers=None, max_queue=None, job_timeout=None, parser_options=None, logger=None):
+        self.logger = logger or CLIPSLogger()
+        # Add direct logging methods if using the standard logger
+        if hasattr(self.logger, 'get_logger'):
+            self.logger = self.logger.get_logger()
+
+        self.workers = max(1, PARSER_POOL_WORKERS if workers is None else workers)
+        self.max_queue = max(0, PARSER_POOL_MAX_QUEUE if max_queue is None else max_queue)
+        self.job_timeout = PARSER_POOL_JOB_TIMEOUT if job_timeout is None else job_timeout
+        # The pool provides the parallelism, so workers extract pages serially by default
+        self.parser_options = dict({"extraction_workers": 1}, **(parser_options or {}))
+
+        self._context = multiprocessing.get_context("spawn")
+        # Most recently used first, so a lightly loaded pool keeps reusing warm workers
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._busy = 0
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "restarted": 0}
+
+    def start(self):
+        """Start the worker processes and wait until each is ready (idempotent)"""
+        with self._lock:
+            if self._started:
+                return
+            if self._closed:
+                raise RuntimeError("Parser pool has been shut down")
+            start_time = time.perf_counter()
+            for _ in range(self.workers):
+                self._idle.put(self._spawn_worker())
+            self._started = True
+        self.logger.info(f"Started {self.workers} parser workers in {time.perf_counter() - start_time:.2f}s "
+                         f"(queue {self.max_queue}, timeout {self.job_timeout}s)")
+
+    def parse(self, source, format_type=None, timed=False):
+        """Parse a PDF on a pool worker
+
+        Args:
+            source (str or bytes): Path or URL of the PDF, or its bytes
+            format_type (str, optional): Format type hint
+            timed (bool): Also return the worker's per-stage timing report
+
+        Returns:
+            tuple: (variation set, timing report or None)
+
+        Raises:
+            ParserPoolBusyError: If the pool and its queue are full
+            ParserPoolTimeoutError: If no worker frees up, or the parse does not
+                finish, within the job timeout
+            MemoryLimitError: If the parse grows past the worker's RSS ceiling
+            ParserWorkerError: If the parse fails on the worker for any other reason
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise ParserPoolBusyError(f"All {self.workers} parser workers are busy and "
+                                      f"{self.max_queue} requests are already waiting")
+        try:
+            self.start()
+            try:
+                worker = self._idle.get(timeout=self.job_timeout)
+            except queue.Empty:
+                self._count("timed_out")
+                raise ParserPoolTimeoutError(f"No parser worker became free within {self.job_timeout}s")
+
+            with self._lock:
+                self._busy += 1
+            try:
+                status, payload, timing = self._run_job(worker, (source, format_type, timed))
+            finally:
+                with self._lock:
+                    self._busy -= 1
+        finally:
+            self._slots.release()
+
+        if status == "error":
+            self._count("failed")
+            error_type, message = payload
+            if error_type == MemoryLimitError.__name__:
+                raise MemoryLimitError(message)
+            raise ParserWorkerError(message, error_type)
+        self._count("completed")
+        return payload, timing
+
+    def _count(self, stat):
+        """Increment one of the pool's job counters"""
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _run_job(self, worker, job):
+        """Send one job to a worker and wait for its answer, replacing the worker if it hangs or dies"""
+        try:
+            worker.conn.send(job)
+            if not worker.conn.poll(self.job_timeout):
+                self._count("timed_out")
+                self._replace_worker(worker)
+                raise ParserPoolTimeoutError(f"PDF parse did not finish within {self.job_timeout}s")
+            result = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._replace_worker(worker)
+            raise ParserWorkerError(f"Parser worker exited unexpectedly: {str(e)}")
+
+        self._idle.put(worker)
+        return result
+
+    def _spawn_worker(self):
+        """Start one worker process and wait for it to report ready"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.parser_options),
+                                        name="clips-parser-worker", daemon=True)
+        process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(WORKER_START_TIMEOUT):
+            process.kill()
+            raise RuntimeError(f"Parser worker did not start within {WORKER_START_TIMEOUT}s")
+        parent_conn.recv()
+        return _Worker(process, parent_conn)
+
+    def _replace_worker(self, worker):
+        """Kill a hung or dead worker and start a fresh one in its place"""
+        self._stop_worker(worker, graceful=False)
+        self._count("restarted")
+        if self._closed:
+            return
+        try:
+            self._idle.put(self._spawn_worker())
+        except Exception as e:
+            self.logger.error(f"Failed to restart parser worker: {str(e)}")
+
+    @staticmethod
+    def _stop_worker(worker, graceful=True):
+        """Stop a worker process, asking it to exit first when graceful"""
+        if graceful:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=5)
+        worker.conn.close()
+
+    def status(self):
+        """Worker, queue and job counts for status endpoints"""
+        with self._lock:
+            busy = self._busy
+            stats = dict(self.stats)
+        return {
+            "started": self._started,
+            "workers": self.workers,
+            "busy": busy,
+            "idle": self._idle.qsize(),
+            "max_queue": self.max_queue,
+            "job_timeout": self.job_timeout,
+            "stats": stats
+        }
+
+    def shutdown(self):
+        """Stop every idle worker; jobs still running finish on their own workers first"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._stop_worker(worker)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parser_pool(logger=None):
+    """Shared, started parser pool for the API server, or None when PARSER_POOL_ENABLED is off"""
+    global _pool
+    if not PARSER_POOL_ENABLED:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            pool = ParserPool(logger=logger)
+            pool.start()
+            atexit.register(pool.shutdown)
+            _pool = pool
+        return _pool
+
+
+def current_parser_pool():
+    """The shared parser pool if it has been started, without starting one"""
+    return _pool
+
+
+def dispatch_parse(parser, source, format_type=None, timed=False):
+    """Parse on the shared pool when enabled, otherwise in this process with parser
+
+    Paths and URLs are sent to the worker as they are, and so is a file
+    object opened on a file on disk (by its path). Other streams (such as
+    uploads) and bytes go through the worker's pipe when they are at most
+    PARSER_POOL_PIPE_MAX_BYTES, so a typical upload never touches the disk;
+    larger ones are spooled to a temporary file whose path is sent instead.
+
+    Returns:
+        tuple: (variation set, timing report or None)
+    """
+    pool = get_parser_pool(parser.logger)
+    if pool is None:
+        timer = StageTimer() if timed else None
+        variation_set = parser.parse_variation_pdf(source, format_type, timer=timer)
+        return variation_set, timer.report() if timer else None
+
+    if isinstance(source, str):
+        return pool.parse(source, format_type, timed)
+    path = _disk_path(source)
+    if path:
+        return pool.parse(path, format_type, timed)
+    size = len(source) if isinstance(source, bytes) else _remaining_bytes(source)
+    if size is not None and size <= PARSER_POOL_PIPE_MAX_BYTES:
+        return pool.parse(source if isinstance(source, bytes) else source.read(), format_type, timed)
+    with _spooled_pdf(source) as pdf_path:
+        return pool.parse(pdf_path, format_type, timed)
+
+
+def _disk_path(source):
+    """Path of the file on disk a stream reads from its start, or None"""
+    name = getattr(source, "name", None)
+    try:
+        if isinstance(name, str) and os.path.isfile(name) and source.tell() == 0:
+            return name
+    except (AttributeError, OSError, ValueError):
+        pass
+    return None
+
+
+def _remaining_bytes(stream):
+    """Bytes left to read in a seekable stream, or None when it cannot be measured"""
+    try:
+        position = stream.tell()
+        end = stream.seek(0, os.SEEK_END)
+        stream.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _spooled_pdf(source):
+    """Copy PDF bytes or a stream (from its current position) to a temporary file, removed afterwards"""
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(source, bytes):
+                f.write(source)
+            else:
+                shutil.copyfileobj(source, f)
+        yield pdf_path
+    finally:
+        os.remove(pdf_path)
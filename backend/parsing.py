@@ -1,106 +1,490 @@
 import os
 import json
+import math
+import time
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
 import pdfplumber
-import re
-import requests
 from io import BytesIO
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from .config import (
+    PDF_EXTRACTION_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_TABLE_PREFILTER,
+    PDF_LOW_MEMORY,
+    PDF_PARSE_MAX_RSS_MB,
+    PARSE_CACHE_ENABLED,
+    PDF_DOWNLOAD_SPOOL_BYTES,
+    PROMPT_DATA_FIELDS,
+    JSON_IMPORT_PROJECT_FIELDS
+)
 from .logger import CLIPSLogger
+from .parse_cache import ParseCache, hash_file, hash_bytes, hash_stream, HASH_CHUNK_SIZE
+from .download import download_pdf
+from .extraction import PDFExtraction, EXTRACTION_VERSION, extract_page, extract_tables, release_page
+from .memory import MemoryLimitError
+from .variation_set import VariationSet
+from .similarity import SimilarityIndex, is_similar_field
+from .formats import FORMAT_HANDLERS, get_format_handler
+from .text_scanner import TextScanner, BRACKETED_CODE_PATTERN, FIELD_NAME_ARTIFACT_PATTERN, WHITESPACE_PATTERN
+from .timing import StageTimer, active_timer, collect_timings, record_count, record_stage, timed_stage
+from .json_stream import iter_json_items
+from .catalog import build_catalog, normalize_cip_code
+
+# Bump when the interpretation of extracted tables/text changes; this
+# invalidates cached variation sets but keeps cached extractions.
+PARSER_VERSION = 2
+
+# Standard field categories from CIP codes
+STANDARD_FIELD_CATEGORIES = [
+    "Agriculture",
+    "Natural Resources",
+    "Architecture",
+    "Area, Ethnic, Cultural, Gender, and Group Studies",
+    "Communication, Journalism",
+    "Communications Technologies",
+    "Computer and Information Sciences",
+    "Education",
+    "Engineering",
+    "Engineering Technologies",
+    "Foreign Languages, Literatures, and Linguistics",
+    "Family and Consumer Sciences",
+    "Legal Professions and Studies",
+    "English Language and Literature",
+    "Liberal Arts and Sciences, General Studies",
+    "Library Science",
+    "Biological and Biomedical Sciences",
+    "Mathematics and Statistics",
+    "Military Science",
+    "Multi/Interdisciplinary Studies",
+    "Parks, Recreation, Leisure, and Fitness",
+    "Philosophy and Religious Studies",
+    "Physical Sciences",
+    "Psychology",
+    "Security and Protective Services",
+    "Public Administration and Social Service",
+    "Social Sciences",
+    "Visual and Performing Arts",
+    "Health Professions",
+    "Business, Management, Marketing",
+    "History"
+]
+
+# Words that mark a small table's text as a field name
+COMMON_FIELD_WORDS = ["studies", "science", "arts", "education", "engineering", 
+                      "health", "business", "technology", "management", "communication"]
+
+# A name matches a category if it contains the category or its first five characters
+_CATEGORY_PATTERNS = SimilarityIndex(category[:5] if len(category) > 5 else category
+                                     for category in STANDARD_FIELD_CATEGORIES)
+_COMMON_FIELD_WORDS = SimilarityIndex(COMMON_FIELD_WORDS)
+
+
+def _extract_page_range(pdf_path, page_indexes, table_prefilter=False, low_memory=False, max_rss_mb=0, timed=False):
+    """Extract tables and text from some pages of a PDF (runs in a worker process)
+    
+    Each worker opens the PDF itself from its file path.
+    
+    Returns:
+        tuple: (page dicts, StageTimer with the worker's page timings, or None unless timed)
+    """
+    timer = StageTimer() if timed else None
+    extracted = []
+    with collect_timings(timer), pdfplumber.open(pdf_path) as pdf:
+        for index in page_indexes:
+            page = pdf.pages[index]
+            extracted.append(extract_page(page, table_prefilter))
+            if low_memory:
+                release_page(page, max_rss_mb)
+    return extracted, timer
+
+
+def _describe_source(pdf_path):
+    """A short label for a PDF source in log messages"""
+    if isinstance(pdf_path, str):
+        return pdf_path
+    if isinstance(pdf_path, (bytes, bytearray)):
+        return f"<{len(pdf_path)} bytes>"
+    name = getattr(pdf_path, 'name', None)
+    return name if isinstance(name, str) else "<stream>"
+
 
 class PDFParser:
     """Class for parsing Variation Definition Documents in PDF format"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, extraction_workers=None, cache=None, table_prefilter=None, format_handlers=None,
+                 low_memory=None, max_rss_mb=None):
         self.logger = logger or CLIPSLogger()
         # Add direct logging methods if using the standard logger
         if hasattr(self.logger, 'get_logger'):
             self.logger = self.logger.get_logger()
+        
+        self.extraction_workers = PDF_EXTRACTION_WORKERS if extraction_workers is None else extraction_workers
+        self.table_prefilter = PDF_TABLE_PREFILTER if table_prefilter is None else table_prefilter
+        self.format_handlers = FORMAT_HANDLERS if format_handlers is None else format_handlers
+        self.low_memory = PDF_LOW_MEMORY if low_memory is None else low_memory
+        self.max_rss_mb = PDF_PARSE_MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self._extraction_pool = None
+        
+        # Pass cache=False to always parse from scratch
+        if cache is None and PARSE_CACHE_ENABLED:
+            cache = ParseCache(logger=self.logger)
+        self.cache = cache or None
     
-    def parse_variation_pdf(self, pdf_path, format_type=None):
+    def parse_variation_pdf(self, pdf_path, format_type=None, timer=None):
         """Parse a PDF file to extract variation variables and levels
         
         Args:
-            pdf_path (str): Path to PDF file or URL for remote PDF
+            pdf_path (str, bytes or file-like): Path to PDF file, URL for remote PDF,
+                the PDF bytes, or a binary stream such as an upload (left open)
             format_type (str, optional): Format type hint ('south_carolina', 'standard', etc.)
+            timer (StageTimer, optional): Collects per-stage and per-page timings for this parse
             
         Returns:
             dict: Extracted variation data structure
+            
+        Raises:
+            MemoryLimitError: If the parse grows past max_rss_mb
         """
-        self.logger.info(f"Parsing PDF: {pdf_path}")
+        self.logger.info(f"Parsing PDF: {_describe_source(pdf_path)}")
         
-        try:
-            # Handle URL or file path
-            if pdf_path.startswith(('http://', 'https://')):
-                # Download from URL
-                self.logger.info(f"Downloading PDF from URL: {pdf_path}")
-                response = requests.get(pdf_path, stream=True)
-                response.raise_for_status()  # Raise exception for HTTP errors
-                pdf_data = BytesIO(response.content)
-                pdf = pdfplumber.open(pdf_data)
-            else:
-                # Local file
-                pdf = pdfplumber.open(pdf_path)
-            
-            # Continue with PDF processing
-            with pdf:
-                # Structure to hold our parsed data
-                variation_set = {
-                    "variables": [],
-                    "levels": {}
-                }
-                
-                # Process all pages to get all tables and text
-                all_tables = []
-                all_text = ""
+        with collect_timings(timer), record_stage("parse_variation_pdf"):
+            source = None
+            try:
+                source, content_hash = self._load_source(pdf_path)
                 
-                for page in pdf.pages:
-                    # Extract tables
-                    tables = page.extract_tables()
-                    if tables:
-                        self.logger.info(f"Found {len(tables)} tables on page {page.page_number}")
-                        all_tables.extend(tables)
-                    
-                    # Extract text
-                    page_text = page.extract_text()
-                    if page_text:
-                        all_text += page_text + "\n\n"
-                
-                # Apply specific format handler if provided
-                if format_type == 'south_carolina':
-                    # Use South Carolina format directly
-                    self._extract_variables_individually(all_tables, all_text, variation_set)
-                else:
-                    # First try to extract variables from a unified table format
-                    if not self._extract_from_unified_table(all_tables, variation_set):
-                        # If unified table approach doesn't work, try individual variable extraction
-                        self._extract_variables_individually(all_tables, all_text, variation_set)
+                # Repeat uploads of the same document skip parsing entirely
+                if self.cache:
+                    variation_set = self.cache.get_variation_set(content_hash, format_type, PARSER_VERSION)
+                    if variation_set is not None:
+                        self.logger.info(f"Using cached parse result for {_describe_source(pdf_path)} "
+                                         f"({content_hash[:12]})")
+                        return variation_set
                 
-                # Calculate total variations
-                total_variations = self._calculate_total_variations(variation_set)
+                extraction = self._get_extraction(source, content_hash, pdf_path)
+                # Pages checked and skipped by the table prefilter, for the timing report
+                for name, value in extraction.table_stats().items():
+                    record_count(name, value)
+                variation_set = self.interpret_extraction(extraction, format_type)
                 
-                # Log results
-                self.logger.info(f"Successfully parsed PDF with {len(variation_set['variables'])} variables")
-                self.logger.info(f"Variables found: {', '.join(variation_set['variables'])}")
-                self.logger.info(f"Total possible variations: {total_variations}")
-                
-                # Print the number of levels for each variable
-                for var in variation_set["variables"]:
-                    level_count = len(variation_set["levels"].get(var, []))
-                    self.logger.info(f"Variable '{var}' has {level_count} levels")
-                    
-                    # Debug: Print actual level values
-                    if "Academic Field of Interest" in var:
-                        self.logger.info("Academic Field of Interest levels:")
-                        for level in variation_set["levels"][var]:
-                            self.logger.info(f"  - {level['data']}: {level['value']}")
-                
-                # Verify we have the right structure for all variables
-                self._verify_and_fix_structure(variation_set)
+                if self.cache:
+                    self.cache.put_variation_set(content_hash, format_type, PARSER_VERSION, variation_set)
                 
                 return variation_set
-                
+                    
+            except MemoryLimitError as e:
+                # Kept distinct so callers can tell a document too large to parse from a malformed one
+                self.logger.error(f"Error parsing PDF: {str(e)}")
+                raise
+            except Exception as e:
+                self.logger.error(f"Error parsing PDF: {str(e)}")
+                raise Exception(f"Failed to parse PDF: {str(e)}")
+            finally:
+                # Streams passed in by the caller stay open; only close what we opened
+                if source is not pdf_path:
+                    self._close_source(source)
+    
+    def extract_pdf(self, pdf_path):
+        """Run only the pdfplumber stage, returning the intermediate representation
+        
+        Args:
+            pdf_path (str, bytes or file-like): Path to PDF file, URL for remote PDF,
+                the PDF bytes, or a binary stream (left open)
+            
+        Returns:
+            PDFExtraction: Per-page tables, table bounding boxes and text
+        """
+        self.logger.info(f"Extracting PDF: {_describe_source(pdf_path)}")
+        
+        source = None
+        try:
+            source, content_hash = self._load_source(pdf_path)
+            return self._get_extraction(source, content_hash, pdf_path)
+        except MemoryLimitError as e:
+            self.logger.error(f"Error extracting PDF: {str(e)}")
+            raise
         except Exception as e:
-            self.logger.error(f"Error parsing PDF: {str(e)}")
-            raise Exception(f"Failed to parse PDF: {str(e)}")
+            self.logger.error(f"Error extracting PDF: {str(e)}")
+            raise Exception(f"Failed to extract PDF: {str(e)}")
+        finally:
+            if source is not pdf_path:
+                self._close_source(source)
+    
+    @timed_stage()
+    def _get_extraction(self, source, content_hash, pdf_path):
+        """Load the extraction from the parse cache, or extract and cache it"""
+        # The pdfplumber stage is cached separately so parser changes only re-run interpretation
+        if self.cache:
+            cached = self.cache.get_extraction(content_hash, EXTRACTION_VERSION)
+            if cached is not None:
+                self.logger.info(f"Using cached page extraction for {_describe_source(pdf_path)} "
+                                 f"({content_hash[:12]})")
+                return PDFExtraction.from_dict(cached)
+        
+        extraction = PDFExtraction(self._extract_content(source), content_hash)
+        if self.cache:
+            self.cache.put_extraction(content_hash, EXTRACTION_VERSION, extraction.to_dict())
+        return extraction
+    
+    @timed_stage()
+    def _load_source(self, pdf_path):
+        """Resolve a path, URL, bytes or stream to something pdfplumber can open, plus its content hash
+        
+        Returns:
+            tuple: (source, content_hash) where source is the file path, the bytes,
+                the caller's stream, a spooled copy of an unseekable stream or
+                download, or None when an unchanged URL is served from the parse cache
+        """
+        # In-memory PDF
+        if isinstance(pdf_path, (bytes, bytearray)):
+            return bytes(pdf_path), hash_bytes(pdf_path)
+        
+        # Binary stream, e.g. an upload
+        if not isinstance(pdf_path, str):
+            return self._stream_source(pdf_path)
+        
+        # Handle URL or file path
+        if pdf_path.startswith(('http://', 'https://')):
+            return self._download_source(pdf_path)
+        
+        # Local file
+        return pdf_path, hash_file(pdf_path)
+    
+    def _stream_source(self, stream):
+        """Hash a caller's stream in place, or spool an unseekable one so pdfplumber can seek it"""
+        if hasattr(stream, 'seekable') and stream.seekable():
+            return stream, hash_stream(stream)
+        
+        digest = hashlib.sha256()
+        spooled = tempfile.SpooledTemporaryFile(max_size=PDF_DOWNLOAD_SPOOL_BYTES)
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            spooled.write(chunk)
+        spooled.seek(0)
+        return spooled, digest.hexdigest()
+    
+    def _download_source(self, url):
+        """Download a PDF, revalidating against the parse cache when it was fetched before"""
+        self.logger.info(f"Downloading PDF from URL: {url}")
+        
+        # Only send a conditional request if the previous download's extraction is still cached
+        url_entry = self.cache.get_url_entry(url) if self.cache else None
+        if url_entry and not self.cache.has_extraction(url_entry["content_hash"], EXTRACTION_VERSION):
+            url_entry = None
+        
+        download = download_pdf(url, validators=url_entry, logger=self.logger)
+        if download.not_modified:
+            return None, url_entry["content_hash"]
+        
+        if self.cache and (download.etag or download.last_modified):
+            self.cache.put_url_entry(url, download.content_hash, download.etag, download.last_modified)
+        return download.file, download.content_hash
+    
+    @staticmethod
+    def _close_source(source):
+        """Release a spooled download or stream copy once parsing is done"""
+        if source is not None and hasattr(source, 'close'):
+            source.close()
+    
+    @timed_stage()
+    def _extract_content(self, source):
+        """Run pdfplumber over every page and return the extracted page dicts, in page order"""
+        pdf_file = BytesIO(source) if isinstance(source, bytes) else source
+        with record_stage("open"):
+            pdf = pdfplumber.open(pdf_file)
+            page_count = len(pdf.pages)
+        self.logger.info(f"Opened PDF with {page_count} pages")
+        
+        with pdf:
+            pages = self._extract_pages(pdf, source)
+            
+            if self.table_prefilter:
+                skipped = [page for page in pages if not page["tables_scanned"]]
+                # Nothing passed the prefilter: fall back to full table detection
+                if pages and len(skipped) == len(pages):
+                    self.logger.info("Table prefilter selected no pages, running table detection on every page")
+                    for page in pages:
+                        pdf_page = pdf.pages[page["page_number"] - 1]
+                        with record_stage("extract_tables", page["page_number"]):
+                            page["tables"] = extract_tables(pdf_page)
+                        page["tables_scanned"] = True
+                        if self.low_memory:
+                            release_page(pdf_page, self.max_rss_mb)
+                elif skipped:
+                    self.logger.info(f"Table prefilter skipped {len(skipped)} of {len(pages)} pages: "
+                                     f"{', '.join(str(page['page_number']) for page in skipped)}")
+            
+            return pages
+    
+    @timed_stage()
+    def interpret_extraction(self, extraction, format_type=None):
+        """Build a variation set from an extraction without touching the PDF
+        
+        Args:
+            extraction (PDFExtraction): Output of extract_pdf, or a saved extraction
+            format_type (str, optional): Format type hint ('south_carolina', 'standard', etc.)
+            
+        Returns:
+            dict: Extracted variation data structure
+        """
+        for page in extraction.pages:
+            if page["tables"]:
+                self.logger.info(f"Found {len(page['tables'])} tables on page {page['page_number']}")
+        
+        # All tables across pages, and the text scanned once for every text-based lookup
+        all_tables = extraction.tables
+        scanner = TextScanner(extraction.text)
+        
+        # Run the best-matching format handler, falling back down the ranking until one succeeds
+        variation_set = VariationSet()
+        for handler in self._rank_format_handlers(all_tables, scanner, format_type):
+            # Each attempt starts from an empty set so a failed handler leaves nothing behind
+            attempt = VariationSet()
+            start_time = time.perf_counter()
+            with record_stage(f"format_handler.{handler.name}"):
+                succeeded = handler.extract(self, all_tables, scanner, attempt)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            
+            if succeeded:
+                self.logger.info(f"Extracted variables with '{handler.name}' format handler in {elapsed_ms:.1f} ms")
+                variation_set = attempt
+                break
+            self.logger.info(f"'{handler.name}' format handler found nothing ({elapsed_ms:.1f} ms), trying next")
+        
+        # Calculate total variations
+        total_variations = variation_set.total_variations()
+        
+        # Log results
+        self.logger.info(f"Successfully parsed PDF with {len(variation_set.variables)} variables")
+        self.logger.info(f"Variables found: {', '.join(variation_set.variables)}")
+        self.logger.info(f"Total possible variations: {total_variations}")
+        
+        # Print the number of levels for each variable
+        for var in variation_set.variables:
+            self.logger.info(f"Variable '{var}' has {variation_set.level_count(var)} levels")
+            
+            # Debug: Print actual level values
+            if "Academic Field of Interest" in var:
+                self.logger.info("Academic Field of Interest levels:")
+                for level in variation_set.levels(var):
+                    self.logger.info(f"  - {level['data']}: {level['value']}")
+        
+        # Verify we have the right structure for all variables
+        self._verify_and_fix_structure(variation_set)
+        
+        return variation_set.to_dict()
+    
+    @timed_stage()
+    def _rank_format_handlers(self, tables, scanner, format_type=None):
+        """Order format handlers by detect() score, with a hinted format type first"""
+        start_time = time.perf_counter()
+        scores = [(handler.detect(tables, scanner), index, handler) for index, handler in enumerate(self.format_handlers)]
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        
+        # Highest score first; registration order breaks ties
+        scores.sort(key=lambda entry: (-entry[0], entry[1]))
+        ranked = [handler for score, index, handler in scores if score > 0]
+        
+        summary = ", ".join(f"{handler.name}={score:.2f}" for score, index, handler in scores)
+        self.logger.info(f"Format detection: {summary} ({elapsed_ms:.1f} ms)")
+        
+        # An explicit format type hint runs its handler first
+        if format_type:
+            hinted = get_format_handler(format_type, self.format_handlers)
+            if hinted:
+                ranked = [hinted] + [handler for handler in ranked if handler is not hinted]
+            else:
+                self.logger.info(f"No format handler named '{format_type}', using detection")
+        
+        return ranked
+    
+    @timed_stage()
+    def _extract_pages(self, pdf, source):
+        """Extract every page with extract_page, in page order
+        
+        Documents with at least PDF_PARALLEL_MIN_PAGES pages are fanned out to
+        a process pool; each worker opens the PDF independently from a file
+        path, so bytes, uploads and downloads are first copied to a temporary
+        file. Smaller documents, or any failure of the pool, use the serial path.
+        """
+        page_count = len(pdf.pages)
+        workers = min(self.extraction_workers, page_count)
+        
+        if workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+            try:
+                with self._worker_source_path(source) as pdf_path:
+                    return self._extract_pages_parallel(pdf_path, page_count, workers)
+            except MemoryLimitError:
+                # Retrying serially would only hit the same ceiling
+                raise
+            except Exception as e:
+                self.logger.warning(f"Parallel page extraction failed, falling back to serial: {str(e)}")
+                # A broken pool cannot be reused; start a fresh one next time
+                if self._extraction_pool is not None:
+                    self._extraction_pool.shutdown(wait=False)
+                    self._extraction_pool = None
+        
+        pages = []
+        for page in pdf.pages:
+            pages.append(extract_page(page, self.table_prefilter))
+            if self.low_memory:
+                release_page(page, self.max_rss_mb)
+        return pages
+    
+    @staticmethod
+    @contextmanager
+    def _worker_source_path(source):
+        """A file path worker processes can open for a source, removed afterwards if it was a copy"""
+        if isinstance(source, str):
+            yield source
+            return
+        
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(source, bytes):
+                    f.write(source)
+                else:
+                    # pdfplumber is reading the same stream; put it back where it was
+                    position = source.tell()
+                    source.seek(0)
+                    shutil.copyfileobj(source, f)
+                    source.seek(position)
+            yield pdf_path
+        finally:
+            os.remove(pdf_path)
+    
+    def _extract_pages_parallel(self, pdf_path, page_count, workers):
+        """Extract pages across worker processes and return them in page order"""
+        if self._extraction_pool is None:
+            # Spawned, not forked: this may run inside the threaded API server, and a
+            # child forked while another thread holds a lock can deadlock on it
+            self._extraction_pool = ProcessPoolExecutor(max_workers=self.extraction_workers,
+                                                        mp_context=multiprocessing.get_context("spawn"))
+        
+        # Two chunks per worker balances pages with many tables against empty ones
+        chunk_size = max(1, math.ceil(page_count / (workers * 2)))
+        chunks = [list(range(start, min(start + chunk_size, page_count)))
+                  for start in range(0, page_count, chunk_size)]
+        self.logger.info(f"Extracting {page_count} pages in {len(chunks)} chunks across {workers} workers")
+        
+        # Workers time their own pages when this parse is being timed
+        timer = active_timer()
+        futures = [self._extraction_pool.submit(_extract_page_range, pdf_path, chunk, self.table_prefilter,
+                                                self.low_memory, self.max_rss_mb, timer is not None)
+                   for chunk in chunks]
+        
+        extracted = []
+        for future in futures:
+            pages, worker_timer = future.result()
+            extracted.extend(pages)
+            if worker_timer:
+                timer.merge(worker_timer)
+        extracted.sort(key=lambda page: page["page_number"])
+        return extracted
     
     def update_field_values(self, variation_set, field_updates):
         """Update specific field values in a variation set
@@ -115,6 +499,8 @@ class PDFParser:
         Returns:
             dict: Updated variation set
         """
+        indexed = VariationSet.from_dict(variation_set)
+        
         for update in field_updates:
             var_name = update.get('variable')
             data_id = update.get('data')
@@ -126,23 +512,20 @@ class PDFParser:
                 continue
                 
             # Skip if variable doesn't exist
-            if var_name not in variation_set["levels"]:
+            if not indexed.has_variable(var_name):
                 self.logger.warning(f"Variable not found: {var_name}")
                 continue
                 
             # Find and update the matching level
-            found = False
-            for level in variation_set["levels"][var_name]:
-                if str(level.get("data")) == str(data_id):
-                    self.logger.info(f"Updating {var_name}[{data_id}] from '{level['value']}' to '{new_value}'")
-                    level["value"] = new_value
-                    found = True
-                    break
-            
-            if not found:
+            level = indexed.find_by_data(var_name, data_id)
+            if level is None:
                 self.logger.warning(f"Level ID {data_id} not found for variable {var_name}")
+                continue
+            
+            self.logger.info(f"Updating {var_name}[{data_id}] from '{level['value']}' to '{new_value}'")
+            indexed.set_level_value(var_name, level, new_value)
         
-        return variation_set
+        return indexed.to_dict()
     
     def add_field_value(self, variation_set, variable, value, data=None):
         """Add a new field value to a variable
@@ -156,34 +539,27 @@ class PDFParser:
         Returns:
             dict: Updated variation set
         """
+        indexed = VariationSet.from_dict(variation_set)
+        
         # Skip if variable doesn't exist
-        if variable not in variation_set["variables"]:
+        if variable not in indexed.variables:
             self.logger.warning(f"Variable not found: {variable}")
             return variation_set
             
         # Auto-assign data ID if not provided
         if data is None:
             # Find next available number
-            existing_ids = [level.get("data") for level in variation_set["levels"][variable] 
-                         if level.get("data") != "Default" and level.get("data", "").isdigit()]
-            next_id = str(max([int(id) for id in existing_ids if id.isdigit()] + [0]) + 1)
-            data = next_id
-        
-        # Check if entry with this data ID already exists
-        for level in variation_set["levels"][variable]:
-            if level.get("data") == data:
-                self.logger.warning(f"Entry with data ID {data} already exists for {variable}")
-                return variation_set
+            data = str(indexed.next_numeric_id(variable))
         
-        # Add new entry
-        variation_set["levels"][variable].append({
-            "value": value,
-            "data": data
-        })
+        # Add new entry unless one with this data ID already exists
+        if indexed.add_level(variable, value, data) is None:
+            self.logger.warning(f"Entry with data ID {data} already exists for {variable}")
+            return variation_set
         
         self.logger.info(f"Added new {variable} value: {value} with ID {data}")
-        return variation_set
+        return indexed.to_dict()
     
+    @timed_stage()
     def _extract_from_unified_table(self, tables, variation_set):
         """Extract variables from a unified table format (like a table with multiple columns for each variable)"""
         # Look for tables that might have a row/column format with all variables
@@ -209,6 +585,7 @@ class PDFParser:
         
         return False
     
+    @timed_stage()
     def _process_unified_table(self, table, variation_set):
         """Process a unified table that defines variables in rows and levels in columns"""
         if len(table) < 2:
@@ -248,7 +625,7 @@ class PDFParser:
                         level_value = str(row[col_idx]).strip()
                         
                         # Look for [CODE] pattern in the level
-                        cip_match = re.search(r'\[([A-Z0-9]+)\]', level_value)
+                        cip_match = BRACKETED_CODE_PATTERN.search(level_value)
                         if cip_match:
                             # Extract code and clean level value
                             code = cip_match.group(1)
@@ -266,32 +643,31 @@ class PDFParser:
                             })
                 
                 if levels:
-                    variation_set["variables"].append(variable_name)
-                    variation_set["levels"][variable_name] = levels
+                    variation_set.set_levels(variable_name, levels)
                     valid_variables += 1
         
         return valid_variables > 0
     
-    def _extract_variables_individually(self, tables, text, variation_set):
+    @timed_stage()
+    def _extract_variables_individually(self, tables, scanner, variation_set):
         """Extract variables individually from tables or text"""
         # Try to extract GPA, Distance, and Academic Field variables
-        gpa_extracted = self._extract_gpa_variable(tables, text, variation_set)
-        distance_extracted = self._extract_distance_variable(tables, text, variation_set)
-        field_extracted = self._extract_academic_field_variable(tables, text, variation_set)
+        gpa_extracted = self._extract_gpa_variable(tables, scanner, variation_set)
+        distance_extracted = self._extract_distance_variable(tables, scanner, variation_set)
+        field_extracted = self._extract_academic_field_variable(tables, scanner, variation_set)
         
         # If any variable wasn't found, try harder with text extraction
         if not gpa_extracted or not distance_extracted or not field_extracted:
             self.logger.info("Not all variables found in tables, attempting text extraction")
-            self._extract_from_text(text, variation_set)
+            self._extract_from_text(scanner, variation_set)
     
-    def _extract_gpa_variable(self, tables, text, variation_set):
+    @timed_stage()
+    def _extract_gpa_variable(self, tables, scanner, variation_set):
         """Extract GPA variable from tables or text"""
         variable_name = "GPA Range"
         
         # Add to variables if not already there
-        if variable_name not in variation_set["variables"]:
-            variation_set["variables"].append(variable_name)
-            variation_set["levels"][variable_name] = []
+        variation_set.add_variable(variable_name)
         
         # Look for GPA specific tables first
         for table in tables:
@@ -308,28 +684,28 @@ class PDFParser:
             if has_gpa_keywords:
                 self.logger.info("Found GPA-specific table")
                 self._process_gpa_table(table, variation_set)
-                if variation_set["levels"][variable_name]:
+                if variation_set.levels(variable_name):
                     return True
         
         # If no GPA levels found, try extracting from text
-        if not variation_set["levels"][variable_name]:
-            gpa_segment = self._extract_segment(text, ["gpa", "grade point", "academic performance"])
-            if gpa_segment:
-                self._process_text_segment(gpa_segment, variable_name, variation_set)
+        if not variation_set.levels(variable_name):
+            if scanner.segment(variable_name):
+                self._process_text_segment(scanner, variable_name, variation_set)
         
         # Default GPA levels if none found
-        if not variation_set["levels"][variable_name]:
+        if not variation_set.levels(variable_name):
             self.logger.info("Using default GPA levels")
-            variation_set["levels"][variable_name] = [
+            variation_set.set_levels(variable_name, [
                 {"value": "3.5+", "data": "1"},
                 {"value": "3.0-3.49", "data": "2"},
                 {"value": "2.5-2.99", "data": "3"},
                 {"value": "Below 2.5", "data": "4"},
                 {"value": "Unknown/Null", "data": "Default"}
-            ]
+            ])
         
-        return len(variation_set["levels"][variable_name]) > 0
+        return variation_set.level_count(variable_name) > 0
     
+    @timed_stage()
     def _process_gpa_table(self, table, variation_set):
         """Process a table that contains GPA information"""
         variable_name = "GPA Range"
@@ -374,24 +750,16 @@ class PDFParser:
                     if gpa_range.lower() == "default":
                         gpa_range = "Unknown/Null"
                 
-                # Add level with variation number as data
-                level_entry = {
-                    "value": gpa_range,
-                    "data": var_num
-                }
-                
-                # Check if we already have this level
-                if not any(level.get("value") == gpa_range for level in variation_set["levels"][variable_name]):
-                    variation_set["levels"][variable_name].append(level_entry)
+                # Add level with variation number as data, unless we already have this level
+                variation_set.add_level(variable_name, gpa_range, var_num, unique_by="value")
     
-    def _extract_distance_variable(self, tables, text, variation_set):
+    @timed_stage()
+    def _extract_distance_variable(self, tables, scanner, variation_set):
         """Extract Distance variable from tables or text"""
         variable_name = "Distance"
         
         # Add to variables if not already there
-        if variable_name not in variation_set["variables"]:
-            variation_set["variables"].append(variable_name)
-            variation_set["levels"][variable_name] = []
+        variation_set.add_variable(variable_name)
         
         # Look for Distance specific tables first
         for table in tables:
@@ -408,28 +776,28 @@ class PDFParser:
             if has_distance_keywords:
                 self.logger.info("Found Distance-specific table")
                 self._process_distance_table(table, variation_set)
-                if variation_set["levels"][variable_name]:
+                if variation_set.levels(variable_name):
                     return True
         
         # If no Distance levels found, try extracting from text
-        if not variation_set["levels"][variable_name]:
-            distance_segment = self._extract_segment(text, ["distance", "miles", "proximity"])
-            if distance_segment:
-                self._process_text_segment(distance_segment, variable_name, variation_set)
+        if not variation_set.levels(variable_name):
+            if scanner.segment(variable_name):
+                self._process_text_segment(scanner, variable_name, variation_set)
         
         # Default Distance levels if none found
-        if not variation_set["levels"][variable_name]:
+        if not variation_set.levels(variable_name):
             self.logger.info("Using default Distance levels")
-            variation_set["levels"][variable_name] = [
+            variation_set.set_levels(variable_name, [
                 {"value": "0-50 miles", "data": "1"},
                 {"value": "51-200 miles", "data": "2"},
                 {"value": "201-500 miles", "data": "3"},
                 {"value": "500+ miles", "data": "4"},
                 {"value": "Unknown/Null", "data": "Default"}
-            ]
+            ])
         
-        return len(variation_set["levels"][variable_name]) > 0
+        return variation_set.level_count(variable_name) > 0
     
+    @timed_stage()
     def _process_distance_table(self, table, variation_set):
         """Process a table that contains Distance information"""
         variable_name = "Distance"
@@ -474,29 +842,21 @@ class PDFParser:
                     if distance_range.lower() == "default":
                         distance_range = "Unknown/Null"
                 
-                # Add level with variation number as data
-                level_entry = {
-                    "value": distance_range,
-                    "data": var_num
-                }
-                
-                # Check if we already have this level
-                if not any(level.get("value") == distance_range for level in variation_set["levels"][variable_name]):
-                    variation_set["levels"][variable_name].append(level_entry)
+                # Add level with variation number as data, unless we already have this level
+                variation_set.add_level(variable_name, distance_range, var_num, unique_by="value")
     
-    def _extract_academic_field_variable(self, tables, text, variation_set):
+    @timed_stage()
+    def _extract_academic_field_variable(self, tables, scanner, variation_set):
         """Extract Academic Field of Interest variable from tables or text"""
         variable_name = "Academic Field of Interest"
         
         # Add to variables if not already there
-        if variable_name not in variation_set["variables"]:
-            variation_set["variables"].append(variable_name)
-            variation_set["levels"][variable_name] = []
+        variation_set.add_variable(variable_name)
 
         # Handle South Carolina variation list format with the field table on page 2
         field_table_found = self._process_south_carolina_field_format(tables, variation_set)
-        if field_table_found and len(variation_set["levels"][variable_name]) > 5:
-            self.logger.info(f"Successfully processed South Carolina format, found {len(variation_set['levels'][variable_name])} academic fields")
+        if field_table_found and variation_set.level_count(variable_name) > 5:
+            self.logger.info(f"Successfully processed South Carolina format, found {variation_set.level_count(variable_name)} academic fields")
             return True
         
         # First check if the academic fields are in a unified table
@@ -534,33 +894,33 @@ class PDFParser:
                 if has_field_keywords:
                     self.logger.info("Found Academic Field-specific table")
                     self._process_academic_field_table(table, variation_set)
-                    if len(variation_set["levels"][variable_name]) > 3:  # If we found several fields
+                    if variation_set.level_count(variable_name) > 3:  # If we found several fields
                         return True
         
         # Try text extraction if table approach didn't find enough fields
-        if len(variation_set["levels"][variable_name]) < 4:
+        if variation_set.level_count(variable_name) < 4:
             self.logger.info("Not enough Academic Fields found in tables, attempting text extraction")
-            academic_segment = self._extract_segment(text, ["academic field", "field of interest", "major", "program"])
-            if academic_segment:
-                self._process_text_segment(academic_segment, variable_name, variation_set)
+            if scanner.segment(variable_name):
+                self._process_text_segment(scanner, variable_name, variation_set)
             
             # Also try to find field definitions with codes in brackets
-            self._extract_fields_with_codes(text, variation_set)
+            self._extract_fields_with_codes(scanner, variation_set)
         
         # Use default Academic Field levels if we still don't have enough
-        if len(variation_set["levels"][variable_name]) < 4:
+        if variation_set.level_count(variable_name) < 4:
             self.logger.info("Using default Academic Field levels")
             # For sample_variation_definition.md which has [BUS001] format
-            variation_set["levels"][variable_name] = [
+            variation_set.set_levels(variable_name, [
                 {"value": "Business", "data": "BUS001"},
                 {"value": "Engineering", "data": "ENG002"},
                 {"value": "Arts", "data": "ART003"},
                 {"value": "Science", "data": "SCI004"},
                 {"value": "Default", "data": "Default"}
-            ]
+            ])
         
-        return len(variation_set["levels"][variable_name]) > 0
+        return variation_set.level_count(variable_name) > 0
         
+    @timed_stage()
     def _process_south_carolina_field_format(self, tables, variation_set):
         """Special processing for South Carolina Variation List PDF format"""
         variable_name = "Academic Field of Interest"
@@ -645,24 +1005,12 @@ class PDFParser:
                             var_num = "Default"
                         
                         # Add field if not already there
-                        level_entry = {
-                            "value": field_name,
-                            "data": var_num
-                        }
-                        
-                        # Check if we already have this field
-                        if not any(level.get("data") == var_num for level in variation_set["levels"][variable_name]):
-                            variation_set["levels"][variable_name].append(level_entry)
+                        if variation_set.add_level(variable_name, field_name, var_num):
                             fields_processed += 1
                             self.logger.info(f"Added field: {field_name} with variation {var_num}")
             
                 # Make sure we have the Default level
-                has_default = any(level.get("data") == "Default" for level in variation_set["levels"][variable_name])
-                if not has_default:
-                    variation_set["levels"][variable_name].append({
-                        "value": "Default",
-                        "data": "Default"
-                    })
+                variation_set.add_level(variable_name, "Default", "Default")
                 
                 self.logger.info(f"Processed {fields_processed} fields from South Carolina format table")
                 
@@ -674,45 +1022,14 @@ class PDFParser:
         
         return field_table_found
         
+    @timed_stage()
     def _extract_additional_south_carolina_fields(self, tables, variation_set):
         """Extract additional academic fields from small tables in the South Carolina PDF"""
         variable_name = "Academic Field of Interest"
         fields_added = 0
         
-        # Standard field categories from CIP codes
-        standard_field_categories = [
-            "Agriculture",
-            "Natural Resources",
-            "Architecture",
-            "Area, Ethnic, Cultural, Gender, and Group Studies",
-            "Communication, Journalism",
-            "Communications Technologies",
-            "Computer and Information Sciences",
-            "Education",
-            "Engineering",
-            "Engineering Technologies",
-            "Foreign Languages, Literatures, and Linguistics",
-            "Family and Consumer Sciences",
-            "Legal Professions and Studies",
-            "English Language and Literature",
-            "Liberal Arts and Sciences, General Studies",
-            "Library Science",
-            "Biological and Biomedical Sciences",
-            "Mathematics and Statistics",
-            "Military Science",
-            "Multi/Interdisciplinary Studies",
-            "Parks, Recreation, Leisure, and Fitness",
-            "Philosophy and Religious Studies",
-            "Physical Sciences",
-            "Psychology",
-            "Security and Protective Services",
-            "Public Administration and Social Service",
-            "Social Sciences",
-            "Visual and Performing Arts",
-            "Health Professions",
-            "Business, Management, Marketing",
-            "History"
-        ]
+        # Existing field names, for near-duplicate checks
+        field_index = SimilarityIndex(level.get("value") for level in variation_set.levels(variable_name))
         
         # Look for field names in small tables
         for table in tables:
@@ -733,50 +1050,29 @@ class PDFParser:
             
             # Check if this resembles a field category
             if field_name and len(field_name) > 5:
-                # Check if it matches any known field category patterns
-                is_field_category = False
-                
-                # Check against known field categories
-                for category in standard_field_categories:
-                    # Full match or partial match of beginning with at least 5 chars
-                    if category.lower() in field_name.lower() or (len(category) > 5 and category.lower()[:5] in field_name.lower()):
-                        is_field_category = True
-                        break
-                
-                # Check for other common patterns
-                common_field_words = ["studies", "science", "arts", "education", "engineering", 
-                                     "health", "business", "technology", "management", "communication"]
-                
-                if not is_field_category:
-                    for word in common_field_words:
-                        if word in field_name.lower():
-                            is_field_category = True
-                            break
+                # Check against known field categories (full match or the first 5 chars),
+                # then other common patterns
+                is_field_category = (_CATEGORY_PATTERNS.contained_in(field_name)
+                                     or _COMMON_FIELD_WORDS.contained_in(field_name))
                 
                 if is_field_category:
                     # This looks like a valid field category
                     # Clean up field name - remove common artifacts
-                    field_name = re.sub(r'\brelated\b|\bprograms\b|\bfield\b|\bvariable\b', '', field_name, flags=re.IGNORECASE).strip()
+                    field_name = FIELD_NAME_ARTIFACT_PATTERN.sub('', field_name).strip()
                     
                     # Further clean up and normalize field name
-                    field_name = re.sub(r'\s+', ' ', field_name).strip()
+                    field_name = WHITESPACE_PATTERN.sub(' ', field_name).strip()
                     if field_name.endswith(','):
                         field_name = field_name[:-1]
                     
                     # Only process if field name is substantial
                     if len(field_name) > 5:
-                        # Assign a new variation number 
-                        existing_nums = [int(level.get("data")) for level in variation_set["levels"][variable_name] 
-                                      if level.get("data") != "Default" and level.get("data").isdigit()]
-                        next_num = max(existing_nums) + 1 if existing_nums else 1
-                        
                         # Add field if not already there (check by name similarity)
-                        if not any(self._is_similar_field(level.get("value"), field_name) for level in variation_set["levels"][variable_name]):
-                            level_entry = {
-                                "value": field_name,
-                                "data": str(next_num)
-                            }
-                            variation_set["levels"][variable_name].append(level_entry)
+                        if not field_index.is_similar(field_name):
+                            # Assign a new variation number
+                            next_num = variation_set.next_numeric_id(variable_name)
+                            variation_set.add_level(variable_name, field_name, str(next_num))
+                            field_index.add(field_name)
                             fields_added += 1
                             self.logger.info(f"Added supplementary field: {field_name}")
         
@@ -802,43 +1098,30 @@ class PDFParser:
                         field_name = "Business, Management, Marketing, and Related Support Services"
                         
                         # Check if we already have a business field
-                        if not any("business" in level.get("value", "").lower() for level in variation_set["levels"][variable_name]):
+                        if not field_index.contains("business"):
                             # Assign a new variation number
-                            existing_nums = [int(level.get("data")) for level in variation_set["levels"][variable_name] 
-                                          if level.get("data") != "Default" and level.get("data").isdigit()]
-                            next_num = max(existing_nums) + 1 if existing_nums else 1
-                            
-                            level_entry = {
-                                "value": field_name,
-                                "data": str(next_num)
-                            }
-                            variation_set["levels"][variable_name].append(level_entry)
+                            next_num = variation_set.next_numeric_id(variable_name)
+                            variation_set.add_level(variable_name, field_name, str(next_num))
+                            field_index.add(field_name)
                             fields_added += 1
                             self.logger.info(f"Added business field: {field_name}")
                             break  # Only add business field once
         
         # If applicable, add other common field categories not yet included
-        existing_fields = [level.get("value", "").lower() for level in variation_set["levels"][variable_name]]
+        existing_fields = SimilarityIndex(level.get("value", "") for level in variation_set.levels(variable_name))
         
-        for category in standard_field_categories:
+        for category in STANDARD_FIELD_CATEGORIES:
             category_lower = category.lower()
             # Check if we already have this field category or similar
-            if not any(cat_word in field.lower() for cat_word in category_lower.split() for field in existing_fields if len(cat_word) > 4):
+            if not any(existing_fields.contains(cat_word) for cat_word in category_lower.split() if len(cat_word) > 4):
                 # Check if this is a common major field category
                 common_categories = ["Business", "Engineering", "Computer", "Health", "Education", 
                                    "Science", "Psychology", "Communication", "Arts"]
                 
                 if any(common in category for common in common_categories):
                     # Add this common category
-                    existing_nums = [int(level.get("data")) for level in variation_set["levels"][variable_name] 
-                                  if level.get("data") != "Default" and level.get("data").isdigit()]
-                    next_num = max(existing_nums) + 1 if existing_nums else 1
-                    
-                    level_entry = {
-                        "value": category,
-                        "data": str(next_num)
-                    }
-                    variation_set["levels"][variable_name].append(level_entry)
+                    next_num = variation_set.next_numeric_id(variable_name)
+                    variation_set.add_level(variable_name, category, str(next_num))
                     fields_added += 1
                     self.logger.info(f"Added standard field category: {category}")
                     
@@ -849,12 +1132,12 @@ class PDFParser:
         self.logger.info(f"Added {fields_added} supplementary fields from tables")
         
         # Clean up field names - fix incomplete field names
-        for level in variation_set["levels"][variable_name]:
+        for level in variation_set.levels(variable_name):
             value = level.get("value", "")
             
             # Complete incomplete field names with standard naming
             if value == "Communication, Journalism, and":
-                level["value"] = "Communication, Journalism, and Related Programs"
+                variation_set.set_level_value(variable_name, level, "Communication, Journalism, and Related Programs")
             
             # Clean up any non-field values (like raw degrees/majors)
             if "B.A." in value or "B.S." in value:
@@ -863,39 +1146,19 @@ class PDFParser:
                     # Extract the first part before listing degrees
                     parts = value.split(',')
                     # Look for a pattern like "Social Sciences" in the value
-                    for category in standard_field_categories:
+                    for category in STANDARD_FIELD_CATEGORIES:
                         if category.lower() in value.lower():
-                            level["value"] = category
+                            variation_set.set_level_value(variable_name, level, category)
                             break
                     # If not found, use the first segment as the field name
                     if level["value"] == value:
-                        level["value"] = parts[0]
+                        variation_set.set_level_value(variable_name, level, parts[0])
         
     def _is_similar_field(self, field1, field2):
         """Check if two field names are similar (to avoid duplicates)"""
-        if not field1 or not field2:
-            return False
-            
-        field1 = str(field1).lower()
-        field2 = str(field2).lower()
-        
-        # Direct match
-        if field1 == field2:
-            return True
-            
-        # Check if one is a substring of the other
-        if field1 in field2 or field2 in field1:
-            return True
-            
-        # Check for common significant words (at least 4 chars)
-        words1 = [w for w in field1.split() if len(w) > 3]
-        words2 = [w for w in field2.split() if len(w) > 3]
-        
-        common_words = set(words1).intersection(set(words2))
-        
-        # If they share at least 2 significant words, consider them similar
-        return len(common_words) >= 2
+        return is_similar_field(field1, field2)
     
+    @timed_stage()
     def _process_academic_field_row(self, row, variation_set):
         """Process a row that contains Academic Field information in a unified table"""
         variable_name = "Academic Field of Interest"
@@ -910,31 +1173,19 @@ class PDFParser:
                 continue
             
             # Look for [CODE] pattern
-            cip_match = re.search(r'\[([A-Z0-9]+)\]', cell_value)
+            cip_match = BRACKETED_CODE_PATTERN.search(cell_value)
             if cip_match:
                 # Extract code and clean field name
                 code = cip_match.group(1)
                 field_name = cell_value.replace(cip_match.group(0), '').strip()
                 
-                level_entry = {
-                    "value": field_name,
-                    "data": code
-                }
-                
                 # Add if not already there
-                if not any(level.get("data") == code for level in variation_set["levels"][variable_name]):
-                    variation_set["levels"][variable_name].append(level_entry)
+                variation_set.add_level(variable_name, field_name, code)
             else:
-                # No code found, use column index as data
-                level_entry = {
-                    "value": cell_value,
-                    "data": str(col_idx)
-                }
-                
-                # Add if not already there
-                if not any(level.get("value") == cell_value for level in variation_set["levels"][variable_name]):
-                    variation_set["levels"][variable_name].append(level_entry)
+                # No code found, use column index as data; add if not already there
+                variation_set.add_level(variable_name, cell_value, str(col_idx), unique_by="value")
     
+    @timed_stage()
     def _process_academic_field_table(self, table, variation_set):
         """Process a table that contains Academic Field information"""
         variable_name = "Academic Field of Interest"
@@ -993,108 +1244,62 @@ class PDFParser:
                 # Use the CIP code if provided, otherwise use the variation number
                 data_value = str(cip_code).strip() if cip_code else var_num
                 
-                # Add level with data
-                level_entry = {
-                    "value": field_name,
-                    "data": data_value
-                }
-                
-                # Check if we already have this level by data (CIP code)
-                if not any(level.get("data") == data_value for level in variation_set["levels"][variable_name]):
-                    variation_set["levels"][variable_name].append(level_entry)
+                # Add level with data, unless we already have this level by data (CIP code)
+                variation_set.add_level(variable_name, field_name, data_value)
         
         # Log how many fields we found
-        self.logger.info(f"Found {len(variation_set['levels'][variable_name])} academic fields from table")
+        self.logger.info(f"Found {variation_set.level_count(variable_name)} academic fields from table")
     
-    def _extract_fields_with_codes(self, text, variation_set):
+    @timed_stage()
+    def _extract_fields_with_codes(self, scanner, variation_set):
         """Extract academic fields with codes in brackets from text"""
         variable_name = "Academic Field of Interest"
         
         # Look for field names with [CODE] pattern
-        # Pattern: Word or phrase followed by code in brackets
-        field_matches = re.finditer(r'([A-Za-z][\w\s,&\'"\(\)-]+)\s*\[([A-Z0-9]+)\]', text)
-        
-        for match in field_matches:
-            field_name = match.group(1).strip()
-            code = match.group(2).strip()
-            
+        for field_name, code in scanner.coded_fields():
             # Skip if field name too short
             if len(field_name) < 3:
                 continue
                 
-            # Add level with data
-            level_entry = {
-                "value": field_name,
-                "data": code
-            }
-            
-            # Check if we already have this level by data (CIP code)
-            if not any(level.get("data") == code for level in variation_set["levels"][variable_name]):
+            # Add level with data, unless we already have this level by data (CIP code)
+            if variation_set.add_level(variable_name, field_name, code):
                 self.logger.info(f"Found academic field with code in text: {field_name} [{code}]")
-                variation_set["levels"][variable_name].append(level_entry)
     
-    def _extract_from_text(self, text, variation_set):
+    @timed_stage()
+    def _extract_from_text(self, scanner, variation_set):
         """Extract variation information from text when tables don't provide enough"""
-        if not text:
+        if not scanner.text:
             return
         
-        # Extract segments for each variable type
-        gpa_segment = self._extract_segment(text, ["gpa", "grade point", "academic performance"])
-        distance_segment = self._extract_segment(text, ["distance", "miles", "proximity"])
-        academic_segment = self._extract_segment(text, ["academic field", "field of interest", "major", "program"])
+        # Segments for each variable type were collected when the text was scanned
+        gpa_segment = scanner.segment("GPA Range")
+        distance_segment = scanner.segment("Distance")
+        academic_segment = scanner.segment("Academic Field of Interest")
         
         # Process each segment if found
-        if gpa_segment and "GPA Range" not in variation_set["variables"]:
-            self._process_text_segment(gpa_segment, "GPA Range", variation_set)
-        elif gpa_segment and len(variation_set["levels"]["GPA Range"]) < 3:
-            self._process_text_segment(gpa_segment, "GPA Range", variation_set)
-        
-        if distance_segment and "Distance" not in variation_set["variables"]:
-            self._process_text_segment(distance_segment, "Distance", variation_set)
-        elif distance_segment and len(variation_set["levels"]["Distance"]) < 3:
-            self._process_text_segment(distance_segment, "Distance", variation_set)
-        
-        if academic_segment and "Academic Field of Interest" not in variation_set["variables"]:
-            self._process_text_segment(academic_segment, "Academic Field of Interest", variation_set)
-        elif academic_segment and len(variation_set["levels"]["Academic Field of Interest"]) < 4:
-            self._process_text_segment(academic_segment, "Academic Field of Interest", variation_set)
+        if gpa_segment and "GPA Range" not in variation_set.variables:
+            self._process_text_segment(scanner, "GPA Range", variation_set)
+        elif gpa_segment and variation_set.level_count("GPA Range") < 3:
+            self._process_text_segment(scanner, "GPA Range", variation_set)
+        
+        if distance_segment and "Distance" not in variation_set.variables:
+            self._process_text_segment(scanner, "Distance", variation_set)
+        elif distance_segment and variation_set.level_count("Distance") < 3:
+            self._process_text_segment(scanner, "Distance", variation_set)
+        
+        if academic_segment and "Academic Field of Interest" not in variation_set.variables:
+            self._process_text_segment(scanner, "Academic Field of Interest", variation_set)
+        elif academic_segment and variation_set.level_count("Academic Field of Interest") < 4:
+            self._process_text_segment(scanner, "Academic Field of Interest", variation_set)
     
-    def _extract_segment(self, text, keywords):
-        """Extract a segment of text containing keywords"""
-        lines = text.split('\n')
-        segment_lines = []
-        in_segment = False
-        
-        for line in lines:
-            line_lower = line.lower()
-            
-            # Check if this line indicates the start of a segment
-            if any(keyword in line_lower for keyword in keywords):
-                in_segment = True
-                segment_lines = [line]
-            # If we're in a segment, keep adding lines until we hit an empty line
-            elif in_segment:
-                if line.strip():
-                    segment_lines.append(line)
-                else:
-                    # If we have 2+ lines and hit empty, end segment
-                    if len(segment_lines) > 1:
-                        break
-        
-        # Return the segment if found
-        return '\n'.join(segment_lines) if segment_lines else ""
-    
-    def _process_text_segment(self, segment, variable_name, variation_set):
-        """Process a text segment to extract variation information"""
+    @timed_stage()
+    def _process_text_segment(self, scanner, variable_name, variation_set):
+        """Process a variable's text segment to extract variation information"""
         # Add variable if not already there
-        if variable_name not in variation_set["variables"]:
-            variation_set["variables"].append(variable_name)
-            variation_set["levels"][variable_name] = []
+        variation_set.add_variable(variable_name)
         
         # Look for number-value pairs (e.g., "1. 3.3+" or "Variation 2: 26-100 Miles")
-        pairs = re.findall(r"(?:var(?:iation)?|level)?\s*(\d+|[Dd]efault)[\s:.-]*([^\n\r]+?)(?=\s*(?:var(?:iation)?|level)?\s*(?:\d+|[Dd]efault)|$)", segment)
-        
-        for var_num, value in pairs:
+        for var_num, value in scanner.numbered_values(variable_name):
             var_num = var_num.strip()
             value = value.strip()
             
@@ -1108,147 +1313,151 @@ class PDFParser:
                 if not value or value.lower() == "default":
                     value = "Unknown/Null" if variable_name != "Academic Field of Interest" else "Default"
             
-            # Add level with data
-            level_entry = {
-                "value": value,
-                "data": var_num
-            }
-            
-            # Add if not already there
-            if not any(level.get("data") == var_num for level in variation_set["levels"][variable_name]):
-                variation_set["levels"][variable_name].append(level_entry)
+            # Add level with data if not already there
+            variation_set.add_level(variable_name, value, var_num)
     
+    @timed_stage()
     def _verify_and_fix_structure(self, variation_set):
         """Verify the structure of the variation set and fix if needed"""
         # Make sure all required variables are present
         required_variables = ["GPA Range", "Distance", "Academic Field of Interest"]
         for var in required_variables:
-            if var not in variation_set["variables"]:
+            if var not in variation_set.variables:
                 self.logger.warning(f"Required variable {var} not found, adding default")
-                variation_set["variables"].append(var)
                 
                 if var == "GPA Range":
-                    variation_set["levels"][var] = [
+                    variation_set.set_levels(var, [
                         {"value": "3.5+", "data": "1"},
                         {"value": "3.0-3.49", "data": "2"},
                         {"value": "2.5-2.99", "data": "3"},
                         {"value": "Below 2.5", "data": "4"},
                         {"value": "Unknown/Null", "data": "Default"}
-                    ]
+                    ])
                 elif var == "Distance":
-                    variation_set["levels"][var] = [
+                    variation_set.set_levels(var, [
                         {"value": "0-50 miles", "data": "1"},
                         {"value": "51-200 miles", "data": "2"},
                         {"value": "201-500 miles", "data": "3"},
                         {"value": "500+ miles", "data": "4"},
                         {"value": "Unknown/Null", "data": "Default"}
-                    ]
+                    ])
                 elif var == "Academic Field of Interest":
-                    variation_set["levels"][var] = [
+                    variation_set.set_levels(var, [
                         {"value": "Business", "data": "BUS001"},
                         {"value": "Engineering", "data": "ENG002"},
                         {"value": "Arts", "data": "ART003"},
                         {"value": "Science", "data": "SCI004"},
                         {"value": "Default", "data": "Default"}
-                    ]
+                    ])
         
         # Ensure each variable has a Default level
-        for var in variation_set["variables"]:
-            if var not in variation_set["levels"] or not variation_set["levels"][var]:
+        for var in variation_set.variables:
+            if not variation_set.levels(var):
                 continue
-                
-            has_default = False
-            for level in variation_set["levels"][var]:
-                if level.get("data") == "Default":
-                    has_default = True
-                    break
             
-            if not has_default:
-                default_value = "Unknown/Null" if var != "Academic Field of Interest" else "Default"
-                variation_set["levels"][var].append({
-                    "value": default_value,
-                    "data": "Default"
-                })
+            default_value = "Unknown/Null" if var != "Academic Field of Interest" else "Default"
+            variation_set.add_level(var, default_value, "Default")
     
     def _calculate_total_variations(self, variation_set):
         """Calculate the total number of possible variations"""
-        total = 1
-        for var in variation_set["variables"]:
-            if var in variation_set["levels"] and variation_set["levels"][var]:
-                total *= len(variation_set["levels"][var])
-        return total
+        return VariationSet.from_dict(variation_set).total_variations()
 
 
 class JSONParser:
     """Class for parsing Programs and Clubs JSON data"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, fields=None):
         self.logger = logger or CLIPSLogger()
         # Add direct logging methods if using the standard logger
         if hasattr(self.logger, 'get_logger'):
             self.logger = self.logger.get_logger()
+        
+        # Fields kept per data type; types without an entry (the default) keep every field
+        if fields is None:
+            fields = PROMPT_DATA_FIELDS if JSON_IMPORT_PROJECT_FIELDS else {}
+        self.fields = fields
     
     def parse_json_file(self, json_path):
-        """Parse a JSON file and index by eab_cip_code"""
+        """Parse a JSON file and index by eab_cip_code
+        
+        The items of a top-level array (or the values of a top-level object) are
+        read one at a time and indexed, so memory grows with the retained data
+        rather than with the size of the file. When fields are configured for the
+        data type, items are projected onto them first; an item holding none of
+        them (an unfamiliar schema) is kept whole rather than as a bare code.
+        """
         self.logger.info(f"Parsing JSON: {json_path}")
+        filename = os.path.basename(json_path)
         
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Determine if this is programs or clubs data
-            file_type = self._detect_json_type(data, os.path.basename(json_path))
-            
             # Create indexed structure
             indexed_data = {
-                "type": file_type,
-                "source_file": os.path.basename(json_path),
+                "type": None,
+                "source_file": filename,
                 "by_cip_code": {}
             }
+            by_cip_code = indexed_data["by_cip_code"]
+            fields = None
+            item_count = 0
             
-            # Index by eab_cip_code
-            if isinstance(data, list):
-                for item in data:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                for _, item in iter_json_items(f):
+                    if not isinstance(item, dict):
+                        continue
+                    item_count += 1
+                    
+                    # Determine if this is programs or clubs data from the first item
+                    if indexed_data["type"] is None:
+                        indexed_data["type"] = self._detect_json_type(item, filename)
+                        fields = self._projected_fields(indexed_data["type"])
+                    
+                    # Index by normalized eab_cip_code, so "52.2" and "52.20" share an entry
                     cip_code = item.get("eab_cip_code")
                     if cip_code:
-                        if cip_code not in indexed_data["by_cip_code"]:
-                            indexed_data["by_cip_code"][cip_code] = []
-                        indexed_data["by_cip_code"][cip_code].append(item)
-            elif isinstance(data, dict):
-                for key, item in data.items():
-                    if isinstance(item, dict):
-                        cip_code = item.get("eab_cip_code")
-                        if cip_code:
-                            if cip_code not in indexed_data["by_cip_code"]:
-                                indexed_data["by_cip_code"][cip_code] = []
-                            indexed_data["by_cip_code"][cip_code].append(item)
+                        if fields:
+                            projected = {field: value for field, value in item.items() if field in fields}
+                            if projected.keys() - {"eab_cip_code"}:
+                                item = projected
+                        by_cip_code.setdefault(normalize_cip_code(cip_code), []).append(item)
+            
+            if indexed_data["type"] is None:
+                indexed_data["type"] = self._detect_json_type(None, filename)
             
             # Log stats
-            self.logger.info(f"Successfully parsed JSON with {len(indexed_data['by_cip_code'])} CIP codes")
-            self.logger.info(f"JSON type: {file_type}")
+            self.logger.info(f"Successfully parsed JSON with {len(by_cip_code)} CIP codes from {item_count} items")
+            self.logger.info(f"JSON type: {indexed_data['type']}")
             return indexed_data
                 
         except Exception as e:
             self.logger.error(f"Error parsing JSON: {str(e)}")
             raise Exception(f"Failed to parse JSON: {str(e)}")
     
-    def _detect_json_type(self, data, filename):
-        """Detect if the JSON data is for programs or clubs"""
+    def import_json_file(self, json_path, catalog_dir=None):
+        """Parse a JSON file into a memory-mapped catalog and return the session reference to it
+        
+        Returns:
+            dict: type, source_file, catalog (content hash), cip_codes and item_count
+        """
+        catalog_ref = build_catalog(self.parse_json_file(json_path), catalog_dir)
+        self.logger.info(f"Stored {catalog_ref['type']} catalog {catalog_ref['catalog'][:12]} "
+                         f"with {len(catalog_ref['cip_codes'])} CIP codes")
+        return catalog_ref
+    
+    def _projected_fields(self, data_type):
+        """Set of fields kept for items of a data type, or None to keep everything"""
+        fields = self.fields.get(data_type)
+        if not fields:
+            return None
+        return set(fields) | {"eab_cip_code"}
+    
+    def _detect_json_type(self, sample, filename):
+        """Detect if the JSON data is for programs or clubs from its file name or a sample item"""
         if "program" in filename.lower() or "major" in filename.lower():
             return "programs"
         elif "club" in filename.lower() or "org" in filename.lower():
             return "clubs"
         
         # Try to detect from content
-        sample = None
-        if isinstance(data, list) and data:
-            sample = data[0]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    sample = value
-                    break
-        
         if sample:
             if any(key.lower() in ["program_name", "major", "degree"] for key in sample.keys()):
                 return "programs"
@@ -0,0 +1,167 @@
+import re
+import json
+from .config import (
+    PROMPT_DATA_TOKEN_BUDGET,
+    PROMPT_DATA_MAX_ITEMS,
+    PROMPT_DATA_MAX_FIELD_CHARS,
+    PROMPT_DATA_MAX_LIST_ITEMS,
+    PROMPT_DATA_FIELDS
+)
+from . import tokens
+
+# Fields used to judge how relevant an item is to the level being written
+RELEVANCE_FIELDS = ["program_name", "club_name", "degree_type", "description"]
+
+# Shortest string a field is truncated to when tightening to fit the budget
+MIN_FIELD_CHARS = 80
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class PromptDataReducer:
+    """Deterministically shrink program and club data to fit a prompt token budget
+
+    Reduction is applied in a fixed order: project each item onto the
+    configured fields, rank items by word overlap with the level value and
+    keep the top N, truncate long strings and lists, then drop the lowest
+    ranked items (and finally tighten truncation) until the serialized data
+    fits the token budget. The same input always produces the same output.
+    """
+
+    def __init__(self, token_budget=None, max_items=None, max_field_chars=None,
+                 max_list_items=None, fields=None, model=None):
+        self.token_budget = PROMPT_DATA_TOKEN_BUDGET if token_budget is None else token_budget
+        self.max_items = PROMPT_DATA_MAX_ITEMS if max_items is None else max_items
+        self.max_field_chars = PROMPT_DATA_MAX_FIELD_CHARS if max_field_chars is None else max_field_chars
+        self.max_list_items = PROMPT_DATA_MAX_LIST_ITEMS if max_list_items is None else max_list_items
+        self.fields = PROMPT_DATA_FIELDS if fields is None else fields
+        self.model = model
+
+    def reduce(self, program_data, club_data, level_value=""):
+        """Reduce program and club items for one prompt
+
+        Args:
+            program_data (list): Program items for the CIP code
+            club_data (list): Club items for the CIP code
+            level_value (str): The Academic Field level value, used for relevance ranking
+
+        Returns:
+            tuple: (programs, clubs, report) where report describes the reduction
+        """
+        original_tokens = self._count(program_data) + self._count(club_data)
+        report = {
+            "budget_tokens": self.token_budget,
+            "original_tokens": original_tokens,
+            "final_tokens": original_tokens,
+            "programs": {"original": len(program_data), "kept": len(program_data)},
+            "clubs": {"original": len(club_data), "kept": len(club_data)},
+            "truncated_fields": 0,
+            "reduced": False
+        }
+
+        # A budget of 0 disables reduction
+        if not self.token_budget or self.token_budget <= 0:
+            return program_data, club_data, report
+
+        keywords = set(WORD_PATTERN.findall(str(level_value).lower()))
+        # (data type, item position, field) of every truncated field, so a field
+        # tightened again on a later pass is reported once
+        truncated = set()
+        programs = self._prepare(program_data, "programs", keywords, truncated)
+        clubs = self._prepare(club_data, "clubs", keywords, truncated)
+
+        # Drop the lowest ranked item from the longer list until the data fits
+        total = self._count(programs) + self._count(clubs)
+        while total > self.token_budget and (len(programs) > 1 or len(clubs) > 1):
+            if len(programs) >= len(clubs):
+                programs.pop()
+            else:
+                clubs.pop()
+            total = self._count(programs) + self._count(clubs)
+
+        # Still over budget: tighten per-field truncation on what is left
+        field_chars = self.max_field_chars
+        while total > self.token_budget and field_chars > MIN_FIELD_CHARS:
+            field_chars = max(MIN_FIELD_CHARS, field_chars // 2)
+            programs = self._truncate_items(programs, "programs", field_chars, truncated)
+            clubs = self._truncate_items(clubs, "clubs", field_chars, truncated)
+            total = self._count(programs) + self._count(clubs)
+
+        # Only truncations in items that were kept for the prompt are reported
+        kept = {("programs", position) for position in range(len(programs))} | \
+               {("clubs", position) for position in range(len(clubs))}
+        report.update({
+            "final_tokens": total,
+            "programs": {"original": len(program_data), "kept": len(programs)},
+            "clubs": {"original": len(club_data), "kept": len(clubs)},
+            "truncated_fields": sum(1 for data_type, position, _ in truncated if (data_type, position) in kept),
+            "reduced": total < original_tokens
+        })
+        return programs, clubs, report
+
+    def _prepare(self, items, data_type, keywords, truncated):
+        """Project, rank, cap and truncate a list of items"""
+        prepared = []
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            score = self._relevance(item, keywords)
+            prepared.append((-score, position, self._project(item, data_type)))
+
+        # Highest relevance first, original order breaks ties
+        prepared.sort(key=lambda entry: (entry[0], entry[1]))
+        ranked = [entry[2] for entry in prepared[:self.max_items]]
+        return self._truncate_items(ranked, data_type, self.max_field_chars, truncated)
+
+    def _truncate_items(self, items, data_type, max_chars, truncated):
+        """Truncate each item of a ranked list, recording truncated fields by rank"""
+        return [self._truncate_item(item, max_chars, truncated, (data_type, position))
+                for position, item in enumerate(items)]
+
+    def _project(self, item, data_type):
+        """Keep only the prompt-relevant fields of an item"""
+        fields = self.fields.get(data_type)
+        if not fields:
+            return dict(item)
+        projected = {field: item[field] for field in fields if field in item}
+        # Unknown item shapes are passed through rather than emptied
+        return projected or dict(item)
+
+    def _truncate_item(self, item, max_chars, truncated, item_key):
+        """Truncate long strings and lists inside an item"""
+        result = {}
+        for key, value in item.items():
+            if isinstance(value, str) and len(value) > max_chars:
+                result[key] = self._truncate_text(value, max_chars)
+                truncated.add(item_key + (key,))
+            elif isinstance(value, list) and len(value) > self.max_list_items:
+                result[key] = value[:self.max_list_items]
+                truncated.add(item_key + (key,))
+            elif isinstance(value, list):
+                result[key] = [
+                    self._truncate_text(entry, max_chars) if isinstance(entry, str) and len(entry) > max_chars else entry
+                    for entry in value
+                ]
+            else:
+                result[key] = value
+        return result
+
+    @staticmethod
+    def _truncate_text(text, max_chars):
+        """Cut text at a word boundary"""
+        cut = text[:max_chars].rsplit(" ", 1)[0].rstrip(",;:")
+        return cut + "..."
+
+    @staticmethod
+    def _relevance(item, keywords):
+        """Score an item by how many level keywords its name and description share"""
+        if not keywords:
+            return 0
+        text = " ".join(str(item.get(field, "")) for field in RELEVANCE_FIELDS).lower()
+        return len(keywords.intersection(WORD_PATTERN.findall(text)))
+
+    def _count(self, items):
+        """Count tokens the way the items are serialized into the prompt"""
+        if not items:
+            return 0
+        return tokens.count_tokens(json.dumps(items, indent=2), self.model)
@@ -4,6 +4,15 @@ import datetime
 from pathlib import Path
 from .config import SESSIONS_DIR
 from .logger import CLIPSLogger
+from .catalog import build_catalog, collect_catalogs, load_catalog_refs, update_catalog_refs
+
+
+def session_catalogs(session_data):
+    """Content hashes of the catalogs a session's imported data references"""
+    imported_data = session_data.get("imported_data") or {}
+    return {dataset["catalog"] for dataset in imported_data.values()
+            if isinstance(dataset, dict) and dataset.get("catalog")}
+
 
 class SessionManager:
     """Class to handle saving and loading session state"""
@@ -15,6 +24,10 @@ class SessionManager:
         
         # Ensure sessions directory exists
         os.makedirs(SESSIONS_DIR, exist_ok=True)
+        
+        # Record the catalogs existing sessions reference before anything is collected
+        if load_catalog_refs() is None:
+            self._seed_catalog_refs()
     
     def create_empty_session(self):
         """Create an empty session with default values"""
@@ -58,6 +71,7 @@ class SessionManager:
                 json.dump(session_data, f, indent=2)
             
             self.session_file = filepath
+            self._update_catalog_refs(filepath, session_data)
             self.logger.log_interaction("save_session", {"filepath": filepath})
             return filepath
             
@@ -87,6 +101,13 @@ class SessionManager:
             self.session_id = session_data.get("session_id", self.session_id)
             self.session_file = filepath
             
+            # Move data embedded by older sessions into the catalog store, so
+            # later loads only read references
+            if self._store_embedded_datasets(session_data):
+                self.save_session(session_data, filepath)
+            else:
+                self._update_catalog_refs(filepath, session_data)
+            
             self.logger.log_interaction("load_session", {"filepath": filepath})
             return session_data
             
@@ -95,6 +116,53 @@ class SessionManager:
                                 {"filepath": filepath})
             raise
     
+    def collect_catalogs(self):
+        """Delete catalogs no session references any more, returning their content hashes"""
+        try:
+            removed = collect_catalogs()
+            if removed:
+                self.logger.log_interaction("collect_catalogs", {"removed": removed})
+            return removed
+        except Exception as e:
+            self.logger.log_error(f"Failed to collect catalogs: {str(e)}")
+            return []
+    
+    def _update_catalog_refs(self, filepath, session_data):
+        """Record the catalogs a session file references, collecting any it was the last to release"""
+        try:
+            released = update_catalog_refs({os.path.abspath(filepath): session_catalogs(session_data)})
+        except Exception as e:
+            self.logger.log_error(f"Failed to update catalog references: {str(e)}", {"filepath": filepath})
+            return
+        if released:
+            self.collect_catalogs()
+    
+    def _store_embedded_datasets(self, session_data):
+        """Replace imported datasets embedded in a session with catalog references; True if any were"""
+        imported_data = session_data.get("imported_data") or {}
+        stored = False
+        for data_type, dataset in imported_data.items():
+            if isinstance(dataset, dict) and "by_cip_code" in dataset and not dataset.get("catalog"):
+                imported_data[data_type] = build_catalog(dataset)
+                stored = True
+        return stored
+    
+    def _seed_catalog_refs(self):
+        """Record the catalog references of every session file in SESSIONS_DIR"""
+        owner_catalogs = {}
+        for filename in os.listdir(SESSIONS_DIR):
+            if filename.startswith("clips_session_") and filename.endswith(".json"):
+                filepath = os.path.join(SESSIONS_DIR, filename)
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        owner_catalogs[os.path.abspath(filepath)] = session_catalogs(json.load(f))
+                except Exception as e:
+                    self.logger.log_error(f"Failed to read session catalogs: {str(e)}", {"filepath": filepath})
+        try:
+            update_catalog_refs(owner_catalogs)
+        except Exception as e:
+            self.logger.log_error(f"Failed to record catalog references: {str(e)}")
+    
     def get_recent_sessions(self, limit=5):
         """Get a list of recent session files"""
         try:
@@ -0,0 +1,120 @@
+from collections import Counter
+
+# Words longer than this count as significant when comparing field names
+SIGNIFICANT_WORD_LENGTH = 3
+
+# Two field names sharing at least this many significant words are similar
+MIN_SHARED_WORDS = 2
+
+
+def is_similar_field(field1, field2):
+    """Check if two field names are similar (to avoid duplicates)
+
+    Names are similar if they are equal ignoring case, one contains the
+    other, or they share at least two significant words.
+    """
+    if not field1 or not field2:
+        return False
+
+    field1 = str(field1).lower()
+    field2 = str(field2).lower()
+
+    # Direct match, or one is a substring of the other
+    if field1 in field2 or field2 in field1:
+        return True
+
+    words1 = {w for w in field1.split() if len(w) > SIGNIFICANT_WORD_LENGTH}
+    words2 = {w for w in field2.split() if len(w) > SIGNIFICANT_WORD_LENGTH}
+    return len(words1 & words2) >= MIN_SHARED_WORDS
+
+
+class SimilarityIndex:
+    """Index of field names for similarity and substring lookups
+
+    is_similar(name) gives the same answer as calling is_similar_field against
+    every indexed name, without the pairwise scan:
+      - exact names are kept in a hash table, so "is any indexed name inside
+        this text" checks each window of the text whose length matches an
+        indexed name;
+      - trigram postings narrow "which indexed names contain this text" to the
+        few names that share all of its trigrams;
+      - significant-word postings count shared words per indexed name.
+
+    Names are compared lower-cased; empty names are never indexed.
+    """
+
+    def __init__(self, names=()):
+        self._names = []
+        self._exact = set()
+        self._lengths = set()
+        self._trigrams = {}
+        self._words = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name):
+        """Index a field name"""
+        if not name:
+            return
+        name = str(name).lower()
+        name_id = len(self._names)
+        self._names.append(name)
+        self._exact.add(name)
+        self._lengths.add(len(name))
+        for trigram in {name[i:i + 3] for i in range(len(name) - 2)}:
+            self._trigrams.setdefault(trigram, set()).add(name_id)
+        for word in {w for w in name.split() if len(w) > SIGNIFICANT_WORD_LENGTH}:
+            self._words.setdefault(word, set()).add(name_id)
+
+    def is_similar(self, name):
+        """Whether any indexed name is similar to this one (see is_similar_field)"""
+        if not name or not self._names:
+            return False
+        name = str(name).lower()
+        return (name in self._exact
+                or self.contained_in(name)
+                or self.contains(name)
+                or self._shares_words(name))
+
+    def contains(self, text):
+        """Whether any indexed name contains text as a substring"""
+        text = str(text).lower()
+        if len(text) < 3:
+            return any(text in name for name in self._names)
+
+        # Only names holding every trigram of the text can contain it; start from the rarest
+        postings = []
+        for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            ids = self._trigrams.get(trigram)
+            if not ids:
+                return False
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                return False
+        return any(text in self._names[name_id] for name_id in candidates)
+
+    def contained_in(self, text):
+        """Whether any indexed name appears as a substring of text"""
+        text = str(text).lower()
+        for length in self._lengths:
+            for start in range(len(text) - length + 1):
+                if text[start:start + length] in self._exact:
+                    return True
+        return False
+
+    def _shares_words(self, name):
+        """Whether any indexed name shares at least MIN_SHARED_WORDS significant words"""
+        shared = Counter()
+        for word in {w for w in name.split() if len(w) > SIGNIFICANT_WORD_LENGTH}:
+            for name_id in self._words.get(word, ()):
+                shared[name_id] += 1
+                if shared[name_id] >= MIN_SHARED_WORDS:
+                    return True
+        return False
@@ -0,0 +1,103 @@
+import re
+
+# Keywords that open the text segment describing each variable
+SEGMENT_KEYWORDS = {
+    "GPA Range": ["gpa", "grade point", "academic performance"],
+    "Distance": ["distance", "miles", "proximity"],
+    "Academic Field of Interest": ["academic field", "field of interest", "major", "program"]
+}
+
+# A code in square brackets, e.g. "Business [BUS001]"
+BRACKETED_CODE_PATTERN = re.compile(r'\[([A-Z0-9]+)\]')
+
+# A field name followed by its bracketed code
+CODED_FIELD_PATTERN = re.compile(r'([A-Za-z][\w\s,&\'"\(\)-]+)\s*\[([A-Z0-9]+)\]')
+
+# Number-value pairs, e.g. "1. 3.3+" or "Variation 2: 26-100 Miles"
+NUMBERED_VALUE_PATTERN = re.compile(
+    r"(?:var(?:iation)?|level)?\s*(\d+|[Dd]efault)[\s:.-]*([^\n\r]+?)"
+    r"(?=\s*(?:var(?:iation)?|level)?\s*(?:\d+|[Dd]efault)|$)"
+)
+
+# Words stripped from field names found in small tables
+FIELD_NAME_ARTIFACT_PATTERN = re.compile(r'\brelated\b|\bprograms\b|\bfield\b|\bvariable\b', re.IGNORECASE)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class TextScanner:
+    """Scan a document's text once and serve every text-based lookup from the result
+
+    All keyword groups are matched in a single pass over the lines of the
+    document, with one precompiled pattern for every keyword, so the text is
+    split and lower-cased once rather than once per variable. Number-value
+    pairs and bracketed field codes are parsed on first use and cached.
+
+    Segments follow the same rules as before: a line containing a keyword
+    starts (or restarts) that variable's segment, following non-blank lines
+    are added, and a blank line ends the segment once it has two or more lines.
+    """
+
+    def __init__(self, text, keyword_groups=None):
+        self.text = text or ""
+        self.keyword_groups = keyword_groups or SEGMENT_KEYWORDS
+        self._segments = self._scan()
+        self._numbered_values = {}
+        self._coded_fields = None
+
+    def segment(self, group):
+        """The text segment for a keyword group ('' if none was found)"""
+        return self._segments.get(group, "")
+
+    def numbered_values(self, group):
+        """(number, value) pairs found in a group's segment"""
+        if group not in self._numbered_values:
+            self._numbered_values[group] = NUMBERED_VALUE_PATTERN.findall(self.segment(group))
+        return self._numbered_values[group]
+
+    def coded_fields(self):
+        """(field name, code) pairs for every 'Name [CODE]' in the document"""
+        if self._coded_fields is None:
+            self._coded_fields = [
+                (match.group(1).strip(), match.group(2).strip())
+                for match in CODED_FIELD_PATTERN.finditer(self.text)
+            ]
+        return self._coded_fields
+
+    def _scan(self):
+        """Collect the segment for every keyword group in one pass over the lines"""
+        keyword_group = {}
+        for group, keywords in self.keyword_groups.items():
+            for keyword in keywords:
+                keyword_group[keyword] = group
+        # The lookahead finds overlapping keywords, so one group's match never hides another's
+        keyword_pattern = re.compile(
+            "(?=(" + "|".join(re.escape(keyword) for keyword in sorted(keyword_group, key=len, reverse=True)) + "))"
+        )
+
+        segment_lines = {group: [] for group in self.keyword_groups}
+        in_segment = set()
+        finished = set()
+
+        for line in self.text.split('\n'):
+            matched_groups = {keyword_group[match.group(1)] for match in keyword_pattern.finditer(line.lower())}
+            is_blank = not line.strip()
+
+            for group, lines in segment_lines.items():
+                if group in finished:
+                    continue
+                # A keyword line starts (or restarts) the segment
+                if group in matched_groups:
+                    in_segment.add(group)
+                    segment_lines[group] = [line]
+                # Inside a segment, keep adding lines until an empty one
+                elif group in in_segment:
+                    if not is_blank:
+                        lines.append(line)
+                    elif len(lines) > 1:
+                        finished.add(group)
+
+            if len(finished) == len(segment_lines):
+                break
+
+        return {group: '\n'.join(lines) for group, lines in segment_lines.items() if lines}
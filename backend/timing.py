@@ -0,0 +1,134 @@
+import time
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Timer collecting stages for the parse running in this thread/context, if any
+_active_timer = ContextVar("active_stage_timer", default=None)
+
+
+class StageTimer:
+    """Accumulate wall-clock time per named stage
+
+    Each stage records its total seconds and how many times it ran, so a
+    stage timed once per page reports the sum over all pages. Stages may
+    nest (an interpretation stage includes the heuristics it calls), so
+    stage times are not additive. Stages timed for a page are also kept per
+    page number, and named counters (such as pages the table prefilter
+    skipped) are reported alongside the timings.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name, page_number=None):
+        """Time the enclosed block under a stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, page_number)
+
+    def add(self, name, seconds, page_number=None):
+        """Record seconds spent in a stage"""
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        if page_number is not None:
+            page = self.pages.setdefault(page_number, {})
+            page[name] = page.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        """Add to a named counter"""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def merge(self, other):
+        """Add the stages and page timings recorded by another timer, e.g. in a worker process"""
+        for name, entry in other.stages.items():
+            merged = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            merged["seconds"] += entry["seconds"]
+            merged["calls"] += entry["calls"]
+        for page_number, stages in other.pages.items():
+            page = self.pages.setdefault(page_number, {})
+            for name, seconds in stages.items():
+                page[name] = page.get(name, 0.0) + seconds
+        for name, value in other.counts.items():
+            self.count(name, value)
+
+    def seconds(self, name):
+        """Total seconds recorded for a stage (0 if it never ran)"""
+        return self.stages.get(name, {}).get("seconds", 0.0)
+
+    def total(self):
+        """Total seconds across all stages"""
+        return sum(entry["seconds"] for entry in self.stages.values())
+
+    def report(self):
+        """Stage and per-page timings in milliseconds, stages in the order they first finished, and counters"""
+        return {
+            "stages": {
+                name: {"ms": round(entry["seconds"] * 1000, 3), "calls": entry["calls"]}
+                for name, entry in self.stages.items()
+            },
+            "pages": [
+                dict({"page_number": page_number},
+                     **{f"{name}_ms": round(seconds * 1000, 3) for name, seconds in stages.items()})
+                for page_number, stages in sorted(self.pages.items())
+            ],
+            "counts": dict(self.counts)
+        }
+
+
+def active_timer():
+    """The timer collecting stages in this context, or None"""
+    return _active_timer.get()
+
+
+@contextmanager
+def collect_timings(timer):
+    """Record stages run in this context into timer (a no-op when timer is None)"""
+    if timer is None:
+        yield None
+        return
+    token = _active_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _active_timer.reset(token)
+
+
+@contextmanager
+def record_stage(name, page_number=None):
+    """Time the enclosed block into the active timer, if there is one"""
+    timer = _active_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name, page_number):
+        yield
+
+
+def record_count(name, value=1):
+    """Add to a counter on the active timer, if there is one"""
+    timer = _active_timer.get()
+    if timer is not None:
+        timer.count(name, value)
+
+
+def timed_stage(name=None):
+    """Decorator timing every call of a function into the active timer, under name or the function's name"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = _active_timer.get()
+            if timer is None:
+                return func(*args, **kwargs)
+            with timer.stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,49 @@
+import math
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to a character heuristic
+    tiktoken = None
+
+# Average characters per token for English prose when tiktoken is unavailable
+CHARS_PER_TOKEN = 4.0
+
+# Chat format overhead (see OpenAI's token counting guide)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_encodings = {}
+
+
+def _get_encoding(model):
+    """Get (and cache) the tiktoken encoding for a model"""
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def count_tokens(text, model=None):
+    """Count the tokens in a piece of text locally, without calling the API"""
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_get_encoding(model or "gpt-4o").encode(text, disallowed_special=()))
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def count_message_tokens(messages, model=None):
+    """Count the prompt tokens for a list of chat messages"""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE
+        total += count_tokens(message.get("role", ""), model)
+        total += count_tokens(message.get("content", ""), model)
+    return total
+
+
+def is_exact():
+    """Whether token counts come from the real tokenizer rather than an estimate"""
+    return tiktoken is not None
@@ -0,0 +1,168 @@
+def normalize_value(value):
+    """Normalize a level value for duplicate detection: case-folded, whitespace collapsed"""
+    return " ".join(str(value).split()).casefold()
+
+
+class _LevelIndex:
+    """Hash indexes over one variable's levels, by data ID and by normalized value"""
+
+    def __init__(self, levels):
+        self.by_data = {}
+        self.by_value = {}
+        self.max_numeric_id = 0
+        # Position of each level (by identity) in the level list, so buckets stay in list order
+        self.positions = {}
+        for level in levels:
+            self.add(level)
+
+    def add(self, level):
+        self.positions[id(level)] = len(self.positions)
+        self.by_data.setdefault(str(level.get("data")), []).append(level)
+        self.by_value.setdefault(normalize_value(level.get("value", "")), []).append(level)
+        data = str(level.get("data", ""))
+        if data.isdigit():
+            self.max_numeric_id = max(self.max_numeric_id, int(data))
+
+    def reindex_value(self, level, old_value):
+        """Move a level whose value changed to its new value key"""
+        old_key = normalize_value(old_value)
+        bucket = self.by_value.get(old_key, [])
+        bucket[:] = [entry for entry in bucket if entry is not level]
+        if not bucket:
+            self.by_value.pop(old_key, None)
+        new_bucket = self.by_value.setdefault(normalize_value(level.get("value", "")), [])
+        new_bucket.append(level)
+        new_bucket.sort(key=lambda entry: self.positions[id(entry)])
+
+
+class VariationSet:
+    """A variation set with constant-time level lookups
+
+    Wraps the plain {"variables": [...], "levels": {variable: [{"value", "data"}]}}
+    structure the frontend and sessions use, and keeps per-variable indexes of
+    levels by data ID and by normalized value alongside it. The wrapped dict is
+    updated in place, so to_dict() always returns the same JSON shape.
+
+    Levels must be added and changed through this class for the indexes to
+    stay correct; set_levels() replaces a variable's levels wholesale.
+    """
+
+    def __init__(self, data=None):
+        self.data = data if data is not None else {"variables": [], "levels": {}}
+        self.data.setdefault("variables", [])
+        self.data.setdefault("levels", {})
+        self._indexes = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Wrap an existing variation set dict (not copied)"""
+        return cls(data)
+
+    def to_dict(self):
+        """The variation set as a plain dict"""
+        return self.data
+
+    @property
+    def variables(self):
+        return self.data["variables"]
+
+    def has_variable(self, variable):
+        return variable in self.data["levels"]
+
+    def add_variable(self, variable):
+        """Add a variable with no levels if it is not already defined"""
+        if variable not in self.data["variables"]:
+            self.data["variables"].append(variable)
+            self.data["levels"][variable] = []
+            self._indexes.pop(variable, None)
+
+    def levels(self, variable):
+        """The level list of a variable (empty if undefined)"""
+        return self.data["levels"].get(variable, [])
+
+    def level_count(self, variable):
+        return len(self.data["levels"].get(variable, []))
+
+    def set_levels(self, variable, levels):
+        """Replace all levels of a variable, adding the variable if needed"""
+        if variable not in self.data["variables"]:
+            self.data["variables"].append(variable)
+        self.data["levels"][variable] = levels
+        self._indexes.pop(variable, None)
+
+    def add_level(self, variable, value, data, unique_by="data"):
+        """Append a level unless one with the same data ID (or value) already exists
+
+        Args:
+            variable (str): Variable to add to (must already exist)
+            value (str): Level value
+            data (str): Level data ID
+            unique_by (str): 'data' to de-duplicate on data ID, 'value' on normalized value
+
+        Returns:
+            dict: The new level, or None if it was a duplicate
+        """
+        if unique_by == "value":
+            if self.find_by_value(variable, value) is not None:
+                return None
+        elif self.find_by_data(variable, data) is not None:
+            return None
+
+        level = {"value": value, "data": data}
+        self.data["levels"][variable].append(level)
+        self._index(variable).add(level)
+        return level
+
+    def find_by_data(self, variable, data):
+        """First level of a variable with this data ID, or None"""
+        if variable not in self.data["levels"]:
+            return None
+        matches = self._index(variable).by_data.get(str(data))
+        return matches[0] if matches else None
+
+    def find_by_value(self, variable, value):
+        """First level of a variable whose normalized value matches, or None"""
+        if variable not in self.data["levels"]:
+            return None
+        matches = self._index(variable).by_value.get(normalize_value(value))
+        return matches[0] if matches else None
+
+    def set_level_value(self, variable, level, value):
+        """Change a level's value, keeping the value index current"""
+        old_value = level.get("value", "")
+        level["value"] = value
+        if variable in self._indexes:
+            self._indexes[variable].reindex_value(level, old_value)
+
+    def update_value(self, variable, data, value):
+        """Change the value of the level with this data ID
+
+        Returns:
+            dict: The updated level, or None if no level has that data ID
+        """
+        level = self.find_by_data(variable, data)
+        if level is not None:
+            self.set_level_value(variable, level, value)
+        return level
+
+    def next_numeric_id(self, variable):
+        """One more than the largest all-digit data ID of a variable (1 if none)"""
+        if variable not in self.data["levels"]:
+            return 1
+        return self._index(variable).max_numeric_id + 1
+
+    def total_variations(self):
+        """Number of combinations across all variables with levels"""
+        total = 1
+        for variable in self.data["variables"]:
+            if self.data["levels"].get(variable):
+                total *= len(self.data["levels"][variable])
+        return total
+
+    def _index(self, variable):
+        """Index for a variable, built on first use"""
+        index = self._indexes.get(variable)
+        if index is None:
+            index = _LevelIndex(self.data["levels"][variable])
+            self._indexes[variable] = index
+        return index
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for bulk variation generation
+Usage: python benchmarks/generation_benchmark.py [--sizes 10,50] [--concurrency 1,4] [--output report.json]
+
+Parses the variation PDFs in examples/, loads the sample programs and clubs,
+and runs OutputGenerator.generate_all_variations against the local mock
+OpenAI server at each size and concurrency level. The JSON report can be
+compared with one from another commit using --compare.
+"""
+import os
+import sys
+import json
+import math
+import glob
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import datetime
+import threading
+import subprocess
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.logger import CLIPSLogger
+from backend.parsing import PDFParser, JSONParser
+from backend.ai_integration import AIIntegration
+from backend.output_generator import OutputGenerator
+from backend.mock_openai_server import MockOpenAIServer
+from backend.memory import current_rss_mb
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_DIR = os.path.join(REPO_DIR, "examples")
+
+SAMPLE_COPY = """Dear {{FIRST_NAME}},
+
+At {{PARTNER_NAME}}, students interested in {{FIELD_OF_INTEREST}} find a community built around them.
+{{PROGRAM_HIGHLIGHT}}
+
+{{CLUB_MENTION}}
+
+Start your application today."""
+
+SAMPLE_INSTRUCTIONS = {
+    "partner_name": "Benchmark University",
+    "distilled_variation_instructions": "Tailor the message to the student's GPA, distance and field of interest.",
+    "marker_instructions": "Fill each marker with one or two sentences.",
+    "tone_other_prompts": "Warm, direct and concise."
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class RSSSampler:
+    """Sample this process's current RSS in a background thread during one run
+
+    ru_maxrss is the process-wide high-water mark and never goes down, so it
+    cannot tell one run from the runs before it; sampling current RSS gives
+    each run its own peak and growth.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.start_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+def git_commit():
+    """Current commit hash, if the benchmark runs inside a git checkout"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def subset_variation_set(variation_set, size):
+    """Trim levels, largest variable first, until the combination count is at most size"""
+    levels = {var: list(variation_set["levels"].get(var, [])) for var in variation_set["variables"]}
+
+    def total():
+        count = 1
+        for var_levels in levels.values():
+            count *= max(1, len(var_levels))
+        return count
+
+    while total() > size:
+        largest = max(levels, key=lambda var: len(levels[var]))
+        if len(levels[largest]) <= 1:
+            break
+        levels[largest].pop()
+
+    return {"variables": list(variation_set["variables"]), "levels": levels}
+
+
+def parse_examples(logger, pdf_dir):
+    """Parse every example PDF, timing each one"""
+    parser = PDFParser(logger)
+    parsed = []
+    for pdf_path in sorted(glob.glob(os.path.join(pdf_dir, "*.pdf"))):
+        start = time.perf_counter()
+        try:
+            variation_set = parser.parse_variation_pdf(pdf_path)
+            error = None
+        except Exception as e:
+            variation_set = None
+            error = str(e)
+        parsed.append({
+            "file": os.path.basename(pdf_path),
+            "parse_seconds": round(time.perf_counter() - start, 4),
+            "variation_set": variation_set,
+            "error": error
+        })
+    return parsed
+
+
+def run_generation(ai_integration, logger, variation_set, json_data, concurrency, mock):
+    """Run one bulk generation and collect its metrics"""
+    mock.reset_stats()
+    with tempfile.TemporaryDirectory(prefix="clips_bench_") as output_dir:
+        generator = OutputGenerator(ai_integration, logger, output_dir=output_dir)
+        start = time.perf_counter()
+        with RSSSampler() as rss:
+            results = generator.generate_all_variations(SAMPLE_COPY, SAMPLE_INSTRUCTIONS, variation_set,
+                                                        json_data, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+
+    latencies = [v["generation_seconds"] for v in results["variations"]]
+    writes = [v["write_seconds"] for v in results["variations"]]
+    return {
+        "variations": results["total"],
+        "concurrency": concurrency,
+        "success": results["success"],
+        "failure": results["failure"],
+        "skipped": results["skipped"],
+        "missing_data": results["missing_data"],
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(results["success"] / elapsed, 3) if elapsed else None,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "write_seconds_total": round(sum(writes), 5),
+        "write_seconds_max": max(writes) if writes else None,
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        "rss_growth_mb": round(rss.peak_mb - rss.start_mb, 1),
+        "mock_stats": dict(mock.stats)
+    }
+
+
+def compare_reports(baseline, current):
+    """Print throughput and latency changes against a baseline report"""
+    baseline_runs = {(r["variations"], r["concurrency"]): r for r in baseline.get("runs", [])}
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'}:")
+    for run in current["runs"]:
+        old = baseline_runs.get((run["variations"], run["concurrency"]))
+        if not old:
+            continue
+        for metric in ("throughput_per_second", "latency_p95", "peak_rss_mb", "rss_growth_mb"):
+            if old.get(metric) and run.get(metric) is not None:
+                change = (run[metric] - old[metric]) / old[metric] * 100
+                print(f"  {run['variations']:>5} x{run['concurrency']:<3} {metric:<22} "
+                      f"{old[metric]:>10} -> {run[metric]:<10} ({change:+.1f}%)")
+
+
+def main():
+    """Main entry point with command line arguments"""
+    parser = argparse.ArgumentParser(description='Bulk generation benchmark against a mock OpenAI backend')
+    parser.add_argument('--sizes', type=str, default='10,50', help='Comma-separated variation counts (default: 10,50)')
+    parser.add_argument('--concurrency', type=str, default='1,4', help='Comma-separated concurrency levels (default: 1,4)')
+    parser.add_argument('--pdf-dir', type=str, default=EXAMPLES_DIR, help='Directory of variation PDFs')
+    parser.add_argument('--programs', type=str, default=os.path.join(EXAMPLES_DIR, 'sample_programs.json'))
+    parser.add_argument('--clubs', type=str, default=os.path.join(EXAMPLES_DIR, 'sample_clubs.json'))
+    parser.add_argument('--latency', type=str, default='lognormal', choices=['fixed', 'uniform', 'normal', 'lognormal'])
+    parser.add_argument('--latency-mean', type=float, default=0.05, help='Mock time to first token (seconds)')
+    parser.add_argument('--latency-jitter', type=float, default=0.3, help='Mock latency spread')
+    parser.add_argument('--tokens-per-second', type=float, default=0, help='Mock generation speed (0 for instant)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Mock 500 error probability')
+    parser.add_argument('--output', type=str, default='generation_benchmark.json', help='Report path')
+    parser.add_argument('--compare', type=str, help='Baseline report to compare against')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    concurrency_levels = [int(level) for level in args.concurrency.split(',') if level]
+
+    # Keep per-call log records, including the per-combination missing data
+    # warnings (counted in the report instead), in the log files and off the console
+    logger = CLIPSLogger("benchmark")
+    for handler in logger.get_logger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.ERROR)
+
+    print(f"Parsing example PDFs in {args.pdf_dir}")
+    parsed = parse_examples(logger, args.pdf_dir)
+    for entry in parsed:
+        status = entry["error"] or f"{len(entry['variation_set']['variables'])} variables"
+        print(f"  {entry['file']}: {entry['parse_seconds']}s ({status})")
+
+    variation_sets = [entry["variation_set"] for entry in parsed if entry["variation_set"]]
+    if not variation_sets:
+        print("No variation PDFs could be parsed; nothing to benchmark")
+        return 1
+    # Benchmark against the largest combination space available
+    variation_set = max(variation_sets, key=PDFParser(logger)._calculate_total_variations)
+
+    json_parser = JSONParser(logger)
+    json_data = {
+        "programs": json_parser.parse_json_file(args.programs),
+        "clubs": json_parser.parse_json_file(args.clubs)
+    }
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": {
+            "latency": args.latency,
+            "latency_mean": args.latency_mean,
+            "latency_jitter": args.latency_jitter,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate_500": args.error_rate
+        },
+        "parse": [{key: value for key, value in entry.items() if key != "variation_set"} for entry in parsed],
+        "runs": []
+    }
+
+    with MockOpenAIServer(latency=args.latency, latency_mean=args.latency_mean,
+                          latency_jitter=args.latency_jitter, tokens_per_second=args.tokens_per_second,
+                          error_rate_500=args.error_rate, seed=0) as mock:
+        ai_integration = AIIntegration(logger, base_url=mock.base_url)
+        ai_integration.initialize_client(api_key="mock-key")
+
+        for size in sizes:
+            subset = subset_variation_set(variation_set, size)
+            for concurrency in concurrency_levels:
+                run = run_generation(ai_integration, logger, subset, json_data, concurrency, mock)
+                report["runs"].append(run)
+                print(f"{run['variations']:>5} variations x{concurrency:<3} "
+                      f"{run['throughput_per_second']}/s  p50={run['latency_p50']}s  "
+                      f"p95={run['latency_p95']}s  p99={run['latency_p99']}s  rss={run['peak_rss_mb']}MB "
+                      f"(+{run['rss_growth_mb']}MB)  missing_data={run['missing_data']}")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_reports(json.load(f), report)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
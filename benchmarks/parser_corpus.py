@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Golden-corpus regression and performance harness for PDFParser
+Usage: python benchmarks/parser_corpus.py [--corpus examples] [--repeat 3] [--baseline report.json]
+
+Parses every PDF in the corpus directories, compares each result with its
+expected variation set in <corpus>/expected/<name>.json, and times the parse
+stages separately: open, table extraction, text extraction, interpretation
+and _verify_and_fix_structure. Exits non-zero when a result differs from its
+expected set, a file with an expected set fails to parse, or (with
+--baseline) a file's parse time regresses beyond --threshold.
+
+Run with --update to write the current results as the expected sets.
+"""
+import os
+import sys
+import json
+import glob
+import logging
+import argparse
+import platform
+import datetime
+import statistics
+import subprocess
+from collections import Counter
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.logger import CLIPSLogger
+from backend.parsing import PDFParser
+from backend.timing import StageTimer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_DIR = os.path.join(REPO_DIR, "examples")
+
+STAGES = ["open", "table_extraction", "text_extraction", "interpretation", "verify"]
+
+
+def git_commit():
+    """Current commit hash, if the harness runs inside a git checkout"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def expected_path(pdf_path):
+    """Where the expected variation set for a corpus PDF lives"""
+    name = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(os.path.dirname(pdf_path), "expected", f"{name}.json")
+
+
+def timed_parse(parser, pdf_path, format_type=None):
+    """Parse a PDF with stage timing, returning (variation_set, {stage: seconds}, {counter: value})"""
+    timer = StageTimer()
+    variation_set = parser.parse_variation_pdf(pdf_path, format_type, timer=timer)
+    # interpret_extraction includes verification; report the two separately
+    verify = timer.seconds("_verify_and_fix_structure")
+    stages = {
+        "open": timer.seconds("open"),
+        "table_extraction": timer.seconds("extract_tables"),
+        "text_extraction": timer.seconds("extract_text"),
+        "interpretation": timer.seconds("interpret_extraction") - verify,
+        "verify": verify,
+        "total": timer.seconds("parse_variation_pdf")
+    }
+    return variation_set, stages, timer.counts
+
+
+def diff_variation_sets(expected, actual):
+    """Compare a parsed variation set with the expected one
+
+    Levels are matched by (data, value). A level whose data ID exists on both
+    sides with a different value is reported as changed rather than as one
+    missing and one extra level.
+
+    Returns:
+        dict: Missing/extra variables, per-variable level differences, and
+            accuracy (matched expected levels / expected levels)
+    """
+    expected_vars = expected.get("variables", [])
+    actual_vars = actual.get("variables", [])
+    diff = {
+        "exact": expected == actual,
+        "missing_variables": [var for var in expected_vars if var not in actual_vars],
+        "extra_variables": [var for var in actual_vars if var not in expected_vars],
+        "variable_order_changed": [var for var in expected_vars if var in actual_vars]
+                                  != [var for var in actual_vars if var in expected_vars],
+        "levels": {}
+    }
+
+    expected_levels = 0
+    matched_levels = 0
+    for var in expected_vars:
+        wanted = Counter((level["data"], level["value"]) for level in expected.get("levels", {}).get(var, []))
+        found = Counter((level["data"], level["value"]) for level in actual.get("levels", {}).get(var, []))
+        expected_levels += sum(wanted.values())
+        matched_levels += sum((wanted & found).values())
+
+        missing = wanted - found
+        extra = found - wanted
+        extra_by_data = {data: value for data, value in extra}
+        changed = [{"data": data, "expected": value, "actual": extra_by_data[data]}
+                   for data, value in missing if data in extra_by_data]
+        changed_data = {entry["data"] for entry in changed}
+        var_diff = {
+            "missing": [{"data": data, "value": value} for data, value in missing if data not in changed_data],
+            "extra": [{"data": data, "value": value} for data, value in extra if data not in changed_data],
+            "changed": changed
+        }
+        if any(var_diff.values()):
+            diff["levels"][var] = var_diff
+
+    diff["expected_levels"] = expected_levels
+    diff["matched_levels"] = matched_levels
+    diff["accuracy"] = round(matched_levels / expected_levels, 4) if expected_levels else 1.0
+    return diff
+
+
+def run_file(parser, pdf_path, format_type, repeat):
+    """Parse one corpus file repeat times, keeping the median timing of each stage"""
+    runs = []
+    for _ in range(repeat):
+        try:
+            variation_set, stages, counts = timed_parse(parser, pdf_path, format_type)
+        except Exception as e:
+            return {"file": os.path.basename(pdf_path), "error": str(e), "variation_set": None}
+        runs.append(stages)
+
+    stage_ms = {stage: round(statistics.median(stages[stage] for stages in runs) * 1000, 3)
+                for stage in STAGES}
+    return {
+        "file": os.path.basename(pdf_path),
+        "error": None,
+        "variation_set": variation_set,
+        "parse_seconds": round(statistics.median(stages["total"] for stages in runs), 4),
+        "stage_ms": stage_ms,
+        # Every run extracts the same pages, so the last run's table prefilter counts stand for all
+        "table_stats": counts
+    }
+
+
+def main():
+    """Main entry point with command line arguments"""
+    parser = argparse.ArgumentParser(description='Golden-corpus regression and performance harness for PDFParser')
+    parser.add_argument('--corpus', type=str, nargs='+', default=[EXAMPLES_DIR],
+                        help='Directories of PDFs with expected/<name>.json sets (default: examples)')
+    parser.add_argument('--format', type=str, help='Format type hint passed to the parser')
+    parser.add_argument('--repeat', type=int, default=3, help='Parses per file; timings are medians (default: 3)')
+    parser.add_argument('--update', action='store_true', help='Write current results as the expected sets')
+    parser.add_argument('--output', type=str, default='parser_corpus.json', help='Report path')
+    parser.add_argument('--baseline', type=str, help='Earlier report to check parse times against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed parse time increase over the baseline, as a fraction (default: 0.25)')
+    args = parser.parse_args()
+
+    # Keep per-call log records in the log files and off the console
+    logger = CLIPSLogger("parser_corpus")
+    for handler in logger.get_logger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.WARNING)
+    pdf_parser = PDFParser(logger, extraction_workers=1, cache=False)
+
+    pdf_paths = sorted(path for corpus in args.corpus for path in glob.glob(os.path.join(corpus, "*.pdf")))
+    if not pdf_paths:
+        print("No corpus PDFs found")
+        return 1
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {entry["file"]: entry for entry in json.load(f).get("files", [])}
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "files": []
+    }
+    failures = []
+
+    for pdf_path in pdf_paths:
+        result = run_file(pdf_parser, pdf_path, args.format, max(1, args.repeat))
+        variation_set = result.pop("variation_set")
+        name = result["file"]
+        expected_file = expected_path(pdf_path)
+
+        if result["error"]:
+            print(f"{name}: error: {result['error']}")
+            if os.path.exists(expected_file):
+                failures.append(f"{name}: failed to parse")
+            report["files"].append(result)
+            continue
+
+        stages = "  ".join(f"{stage}={result['stage_ms'][stage]:.1f}ms" for stage in STAGES)
+        print(f"{name}: {result['parse_seconds']}s  {stages}")
+        table_stats = result["table_stats"]
+        if table_stats:
+            print(f"  table detection ran on {table_stats['table_pages_scanned']}/{table_stats['pages']} pages "
+                  f"({table_stats['table_pages_skipped']} skipped by the prefilter)")
+
+        if args.update:
+            os.makedirs(os.path.dirname(expected_file), exist_ok=True)
+            with open(expected_file, 'w') as f:
+                json.dump(variation_set, f, indent=2)
+            print(f"  expected set written to {os.path.relpath(expected_file)}")
+        elif os.path.exists(expected_file):
+            with open(expected_file) as f:
+                diff = diff_variation_sets(json.load(f), variation_set)
+            result["diff"] = diff
+            if diff["exact"]:
+                print(f"  matches expected set ({diff['expected_levels']} levels)")
+            else:
+                failures.append(f"{name}: differs from expected set")
+                print(f"  accuracy {diff['accuracy']:.2%} ({diff['matched_levels']}/{diff['expected_levels']} levels)")
+                for var in diff["missing_variables"]:
+                    print(f"  missing variable: {var}")
+                for var in diff["extra_variables"]:
+                    print(f"  extra variable: {var}")
+                if diff["variable_order_changed"]:
+                    print(f"  variable order changed: {variation_set['variables']}")
+                for var, var_diff in diff["levels"].items():
+                    print(f"  {var}: {len(var_diff['missing'])} missing, {len(var_diff['extra'])} extra, "
+                          f"{len(var_diff['changed'])} changed")
+        else:
+            print("  no expected set (run with --update to record one)")
+
+        old = baseline.get(name)
+        if old and old.get("parse_seconds"):
+            change = (result["parse_seconds"] - old["parse_seconds"]) / old["parse_seconds"]
+            result["baseline_change"] = round(change, 4)
+            print(f"  parse time {old['parse_seconds']}s -> {result['parse_seconds']}s ({change:+.1%})")
+            if change > args.threshold:
+                failures.append(f"{name}: parse time regressed {change:+.1%} (threshold {args.threshold:+.0%})")
+
+        report["files"].append(result)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {args.output}")
+
+    if failures:
+        print("\nFailures:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -370,6 +370,41 @@ function displayVariationListData(variationData) {
     }
 }
 
+// CIP codes of an imported dataset: a catalog reference lists them, older sessions embed by_cip_code
+function getCipCodes(dataset) {
+    if (!dataset) {
+        return [];
+    }
+    return dataset.cip_codes || Object.keys(dataset.by_cip_code || {});
+}
+
+// Codes to try for a CIP code, most specific first, matching the backend's lookup:
+// the code as written, its normalized form (NN.NN or NN.NNNN), then its 4- and 2-digit families.
+// Bare numbers such as a level ID "1" are left alone, so they never match series "01"
+function cipFallbackChain(cipCode) {
+    let code = String(cipCode).trim();
+    const chain = [code];
+    if (/^(\d{4}|\d{6})$/.test(code)) {
+        code = `${code.slice(0, 2)}.${code.slice(2)}`;
+    }
+    const match = code.match(/^(\d{1,2})\.(\d{1,4})$/);
+    if (match) {
+        const series = match[1].padStart(2, '0');
+        const detail = match[2].padEnd(match[2].length <= 2 ? 2 : 4, '0');
+        chain.push(`${series}.${detail}`);
+        if (detail.length === 4) {
+            chain.push(`${series}.${detail.slice(0, 2)}`);
+        }
+        chain.push(series);
+    }
+    return chain;
+}
+
+// Whether a dataset's CIP codes cover a code directly or through one of its families
+function hasCipCode(cipCodes, cipCode) {
+    return cipFallbackChain(cipCode).some(code => cipCodes.includes(code));
+}
+
 // Function to check the match between Academic Field IDs and JSON CIP codes
 function checkJsonFieldMatch() {
     if (!currentSession || 
@@ -393,11 +428,9 @@ function checkJsonFieldMatch() {
         const academicFieldLevels = currentSession.instruction_set.variation_list_data.levels[academicFieldVariable] || [];
         
         // Get the available CIP codes from JSON data
-        const programsCipCodes = currentSession.imported_data.programs ? 
-            Object.keys(currentSession.imported_data.programs.by_cip_code || {}) : [];
+        const programsCipCodes = getCipCodes(currentSession.imported_data.programs);
         
-        const clubsCipCodes = currentSession.imported_data.clubs ? 
-            Object.keys(currentSession.imported_data.clubs.by_cip_code || {}) : [];
+        const clubsCipCodes = getCipCodes(currentSession.imported_data.clubs);
         
         // Create a match report
         let matchedCount = 0;
@@ -407,8 +440,8 @@ function checkJsonFieldMatch() {
             const cipCode = level.data;
             if (!cipCode || cipCode.toLowerCase() === 'default') return;
             
-            const hasPrograms = programsCipCodes.includes(cipCode);
-            const hasClubs = clubsCipCodes.includes(cipCode);
+            const hasPrograms = hasCipCode(programsCipCodes, cipCode);
+            const hasClubs = hasCipCode(clubsCipCodes, cipCode);
             
             if (!hasPrograms && !hasClubs) {
                 unmatchedCodes.push({
@@ -473,7 +506,7 @@ function updateJsonDataDisplay(importedData) {
         programsJsonItem.style.display = 'flex';
         
         // Count CIP codes
-        const cipCount = Object.keys(importedData.programs.by_cip_code || {}).length;
+        const cipCount = getCipCodes(importedData.programs).length;
         
         // Update the count display
         const programsCipCount = document.getElementById('programs-cip-count');
@@ -491,7 +524,7 @@ function updateJsonDataDisplay(importedData) {
         clubsJsonItem.style.display = 'flex';
         
         // Count CIP codes
-        const cipCount = Object.keys(importedData.clubs.by_cip_code || {}).length;
+        const cipCount = getCipCodes(importedData.clubs).length;
         
         // Update the count display
         const clubsCipCount = document.getElementById('clubs-cip-count');
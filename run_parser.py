@@ -2,14 +2,22 @@
 import os
 import sys
 import json
+import glob
+import time
 import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import parser
-from backend.parsing import PDFParser
+from backend.parsing import PDFParser, PARSER_VERSION
+from backend.extraction import PDFExtraction, EXTRACTION_VERSION
+from backend.parse_cache import hash_file
+from backend.variation_set import VariationSet
+from backend.timing import StageTimer
+from backend.config import PDF_EXTRACTION_WORKERS
 from backend.api import run_api
 
 # Set up logging
@@ -22,12 +30,24 @@ ch = logging.StreamHandler()
 ch.setLevel(logging.DEBUG)
 logger.addHandler(ch)
 
-def parse_pdf(pdf_path, output_path=None, format_type=None, edit_fields=None):
-    """Parse a PDF file and output the result"""
+def parse_pdf(pdf_path, output_path=None, format_type=None, edit_fields=None, extraction_path=None,
+              save_extraction=None):
+    """Parse a PDF file (or a saved extraction) and output the result"""
     parser = PDFParser(logger)
     
-    print(f"Parsing PDF: {pdf_path}")
-    variation_set = parser.parse_variation_pdf(pdf_path, format_type)
+    if extraction_path:
+        # Re-run only the parsing heuristics against a saved extraction
+        print(f"Interpreting extraction: {extraction_path}")
+        variation_set = parser.interpret_extraction(PDFExtraction.load(extraction_path), format_type)
+    elif save_extraction:
+        print(f"Parsing PDF: {pdf_path}")
+        extraction = parser.extract_pdf(pdf_path)
+        extraction.save(save_extraction)
+        print(f"Extraction saved to {save_extraction}")
+        variation_set = parser.interpret_extraction(extraction, format_type)
+    else:
+        print(f"Parsing PDF: {pdf_path}")
+        variation_set = parser.parse_variation_pdf(pdf_path, format_type)
     
     # Apply field edits if provided
     if edit_fields:
@@ -80,6 +100,163 @@ def parse_pdf(pdf_path, output_path=None, format_type=None, edit_fields=None):
     
     return variation_set
 
+def find_batch_inputs(patterns):
+    """Expand directories and glob patterns into a sorted, de-duplicated list of PDF paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '**', '*'), recursive=True)
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        for match in matches:
+            if os.path.isfile(match) and match.lower().endswith('.pdf'):
+                paths.add(os.path.abspath(match))
+    return sorted(paths)
+
+# Parsers reused by every file a batch worker process handles, by whether the parse cache is bypassed
+_batch_parsers = {}
+
+def _parse_batch_file(pdf_path, format_type, force=False):
+    """Parse one batch input in a worker process, returning (variation_set, error, seconds, table_stats)
+
+    With force the parse cache is bypassed, so the PDF is extracted and
+    interpreted again even when the parser version has not changed.
+    table_stats holds the table prefilter's page counts, or is empty when the
+    parse cache answered without extracting.
+    """
+    batch_parser = _batch_parsers.get(force)
+    if batch_parser is None:
+        # The batch pool provides the parallelism, so each worker extracts pages serially
+        batch_parser = PDFParser(logger, extraction_workers=1, cache=False if force else None)
+        _batch_parsers[force] = batch_parser
+    
+    timer = StageTimer()
+    start = time.perf_counter()
+    try:
+        variation_set = batch_parser.parse_variation_pdf(pdf_path, format_type, timer=timer)
+        return variation_set, None, time.perf_counter() - start, timer.counts
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start, timer.counts
+
+def _batch_output_names(pdf_paths):
+    """Output file name for each input, numbering inputs that share a file name"""
+    names = {}
+    used = set()
+    for pdf_path in pdf_paths:
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        name = f"{stem}.json"
+        suffix = 2
+        while name in used:
+            name = f"{stem}-{suffix}.json"
+            suffix += 1
+        used.add(name)
+        names[pdf_path] = name
+    return names
+
+def parse_batch(patterns, output_dir, format_type=None, workers=None, force=False):
+    """Parse every PDF matching the given directories/globs across a process pool
+    
+    Writes one variation set JSON per input to output_dir, plus summary.jsonl
+    with one record per input. Inputs whose content hash, format and parser
+    version match the previous run (recorded in manifest.json) are skipped
+    unless force is set, which also bypasses the parse cache so every input
+    is parsed from scratch.
+    """
+    pdf_paths = find_batch_inputs(patterns)
+    if not pdf_paths:
+        print("No PDF files matched")
+        return []
+    
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    
+    output_names = _batch_output_names(pdf_paths)
+    workers = max(1, workers or PDF_EXTRACTION_WORKERS)
+    
+    # Hash every input and decide which ones need parsing
+    records = {}
+    to_parse = []
+    for pdf_path in pdf_paths:
+        content_hash = hash_file(pdf_path)
+        previous = manifest.get(pdf_path)
+        output_path = os.path.join(output_dir, output_names[pdf_path])
+        unchanged = (previous and previous.get("content_hash") == content_hash
+                     and previous.get("format") == format_type
+                     and previous.get("parser_version") == PARSER_VERSION
+                     and previous.get("extraction_version") == EXTRACTION_VERSION
+                     and os.path.exists(output_path))
+        if unchanged and not force:
+            records[pdf_path] = dict(previous["summary"], status="unchanged")
+        else:
+            records[pdf_path] = {"file": pdf_path, "output": output_path, "content_hash": content_hash}
+            to_parse.append(pdf_path)
+    
+    print(f"Batch: {len(pdf_paths)} PDFs, {len(to_parse)} to parse, "
+          f"{len(pdf_paths) - len(to_parse)} unchanged, {workers} workers")
+    
+    def record_result(pdf_path, variation_set, error, seconds, table_stats, done):
+        record = records[pdf_path]
+        record["parse_seconds"] = round(seconds, 3)
+        if table_stats:
+            record["table_stats"] = table_stats
+        if error:
+            record.update({"status": "error", "error": error})
+            print(f"[{done}/{len(to_parse)}] {os.path.basename(pdf_path)}: error: {error}")
+            return
+        
+        with open(record["output"], 'w') as f:
+            json.dump(variation_set, f, indent=2)
+        level_counts = {var: len(variation_set["levels"].get(var, [])) for var in variation_set["variables"]}
+        record.update({
+            "status": "ok",
+            "variables": variation_set["variables"],
+            "level_counts": level_counts,
+            "total_variations": VariationSet.from_dict(variation_set).total_variations(),
+            "error": None
+        })
+        manifest[pdf_path] = {
+            "content_hash": record["content_hash"],
+            "format": format_type,
+            "parser_version": PARSER_VERSION,
+            "extraction_version": EXTRACTION_VERSION,
+            "summary": record
+        }
+        print(f"[{done}/{len(to_parse)}] {os.path.basename(pdf_path)}: {len(variation_set['variables'])} variables, "
+              f"{record['total_variations']} variations ({seconds:.2f}s)")
+    
+    if workers == 1 or len(to_parse) <= 1:
+        for done, pdf_path in enumerate(to_parse, 1):
+            record_result(pdf_path, *_parse_batch_file(pdf_path, format_type, force), done)
+    elif to_parse:
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_parse))) as executor:
+            futures = {pdf_path: executor.submit(_parse_batch_file, pdf_path, format_type, force)
+                       for pdf_path in to_parse}
+            for done, pdf_path in enumerate(to_parse, 1):
+                record_result(pdf_path, *futures[pdf_path].result(), done)
+    
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    summary_path = os.path.join(output_dir, 'summary.jsonl')
+    with open(summary_path, 'w') as f:
+        for pdf_path in pdf_paths:
+            f.write(json.dumps(records[pdf_path]) + "\n")
+    
+    statuses = [record["status"] for record in records.values()]
+    print(f"\nBatch complete: {statuses.count('ok')} parsed, {statuses.count('unchanged')} unchanged, "
+          f"{statuses.count('error')} errors")
+    extracted = [records[pdf_path]["table_stats"] for pdf_path in to_parse if "table_stats" in records[pdf_path]]
+    if extracted:
+        pages = sum(stats["pages"] for stats in extracted)
+        skipped = sum(stats["table_pages_skipped"] for stats in extracted)
+        print(f"Table prefilter skipped table detection on {skipped} of {pages} extracted pages")
+    print(f"Summary saved to {summary_path}")
+    return list(records.values())
+
 def main():
     """Main entry point with command line arguments"""
     parser = argparse.ArgumentParser(description='Variation Definition PDF Parser')
@@ -89,6 +266,8 @@ def main():
     mode_group.add_argument('--api', action='store_true', help='Run as API server')
     mode_group.add_argument('--pdf', type=str, help='Parse a specific PDF file')
     mode_group.add_argument('--url', type=str, help='Parse a PDF from a URL')
+    mode_group.add_argument('--extraction', type=str, help='Parse a saved extraction JSON instead of a PDF')
+    mode_group.add_argument('--batch', type=str, nargs='+', help='Parse every PDF in these directories or globs')
     
     # API options
     parser.add_argument('--host', type=str, default='0.0.0.0', help='API server host (default: 0.0.0.0)')
@@ -100,6 +279,15 @@ def main():
                       help='PDF format type hint')
     parser.add_argument('--edit', type=str, nargs='+', 
                       help='Edit fields in format "Variable:ID=New Value"')
+    parser.add_argument('--save-extraction', type=str, 
+                      help='Also save the raw page extraction to this JSON file')
+    
+    # Batch options
+    parser.add_argument('--output-dir', type=str, default='batch_output',
+                      help='Directory for batch results (default: batch_output)')
+    parser.add_argument('--workers', type=int, help='Batch worker processes (default: PDF_EXTRACTION_WORKERS)')
+    parser.add_argument('--force', action='store_true',
+                      help='Re-parse batch inputs even if unchanged, bypassing the parse cache')
     
     args = parser.parse_args()
     
@@ -107,10 +295,16 @@ def main():
         # Run API server
         print(f"Starting API server on {args.host}:{args.port}")
         run_api(host=args.host, port=args.port)
+    elif args.batch:
+        # Keep per-file parser logging off the console
+        logger.setLevel(logging.WARNING)
+        records = parse_batch(args.batch, args.output_dir, args.format, args.workers, args.force)
+        if any(record["status"] == "error" for record in records):
+            sys.exit(1)
     else:
         # Parse PDF
         pdf_path = args.pdf or args.url
-        parse_pdf(pdf_path, args.output, args.format, args.edit)
+        parse_pdf(pdf_path, args.output, args.format, args.edit, args.extraction, args.save_extraction)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -21,7 +21,9 @@ ch.setLevel(logging.DEBUG)
 logger.addHandler(ch)
 
 def main():
-    pdf_path = "/Users/CMelchert/CLIPS-2/examples/South Carolina Variation List.pdf"
+    # Default to the example PDF next to this script; pass another path to parse it instead
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "examples", "South Carolina Variation List.pdf")
     parser = PDFParser(logger)
     
     print(f"Parsing PDF: {pdf_path}")
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import logger as logger_module
+
+
+@pytest.fixture(autouse=True)
+def _logs_in_tmp(tmp_path, monkeypatch):
+    """Keep the log files CLIPSLogger writes out of the repository's logs directory"""
+    logs_dir = tmp_path / "logs"
+    logs_dir.mkdir()
+    monkeypatch.setattr(logger_module, "LOGS_DIR", str(logs_dir))
+    # Spawned worker processes re-import the config and read it from the environment
+    monkeypatch.setenv("LOGS_DIR", str(logs_dir))
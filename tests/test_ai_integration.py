@@ -0,0 +1,96 @@
+import openai
+import pytest
+
+from backend.ai_integration import AIIntegration, is_service_failure
+from backend.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN
+
+
+def api_error(cls, status_code=None):
+    """An openai exception built without a real HTTP response"""
+    error = cls.__new__(cls)
+    Exception.__init__(error, f"status {status_code}" if status_code else "connection error")
+    if status_code:
+        error.status_code = status_code
+    return error
+
+
+class FailingClient:
+    """Stand-in OpenAI client whose chat completions always raise error"""
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.fixture
+def ai(monkeypatch):
+    ai = AIIntegration()
+    ai.circuit_breaker = CircuitBreaker("test", failure_rate=0.5, window=4, min_calls=2, recovery_seconds=60)
+    ai.logged = []
+    monkeypatch.setattr(ai.logger, "log_ai_interaction", lambda **kwargs: ai.logged.append(kwargs))
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    return ai
+
+
+@pytest.mark.parametrize("error, counts", [
+    (api_error(openai.BadRequestError, 400), False),
+    (api_error(openai.AuthenticationError, 401), False),
+    (api_error(openai.RateLimitError, 429), True),
+    (api_error(openai.InternalServerError, 503), True),
+    (api_error(openai.APIConnectionError), True),
+])
+def test_only_service_errors_count_against_the_breaker(error, counts):
+    assert is_service_failure(error) is counts
+
+
+def test_bad_requests_do_not_open_the_breaker(ai):
+    ai.client = FailingClient(api_error(openai.BadRequestError, 400))
+
+    for _ in range(5):
+        with pytest.raises(openai.BadRequestError):
+            ai._make_api_call([{"role": "user", "content": "hi"}], retries=2)
+
+    # Not retried, and the breaker never saw them
+    assert ai.client.calls == 5
+    assert ai.circuit_breaker.state == CLOSED
+    assert ai.circuit_breaker.get_status()["window_calls"] == 0
+
+
+def test_calls_short_circuited_between_retries_are_logged(ai, monkeypatch):
+    ai.client = FailingClient(api_error(openai.InternalServerError, 500))
+    # Other requests' failures open the breaker while this call backs off
+    monkeypatch.setattr("time.sleep", lambda seconds: [ai.circuit_breaker.record_failure() for _ in range(2)])
+
+    with pytest.raises(CircuitOpenError):
+        ai._make_api_call([{"role": "user", "content": "hi"}], retries=2)
+
+    assert ai.client.calls == 1
+    assert ai.circuit_breaker.state == OPEN
+    assert len(ai.logged) == 1 and "open" in ai.logged[0]["error"]
+
+    # Calls made while it stays open are logged too
+    with pytest.raises(CircuitOpenError):
+        ai._make_api_call([{"role": "user", "content": "hi"}])
+    assert ai.client.calls == 1
+    assert len(ai.logged) == 2
+
+
+def test_bad_requests_do_not_use_up_half_open_trials(ai):
+    breaker = ai.circuit_breaker
+    breaker.recovery_seconds = 0
+    breaker.half_open_calls = 1
+    for _ in range(2):
+        breaker.record_failure()
+    ai.client = FailingClient(api_error(openai.BadRequestError, 400))
+
+    with pytest.raises(openai.BadRequestError):
+        ai._make_api_call([{"role": "user", "content": "hi"}])
+
+    # The trial slot was given back, so the next call is still let through
+    breaker.before_call()
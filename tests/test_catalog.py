@@ -0,0 +1,174 @@
+import os
+import time
+
+import pytest
+
+from backend.catalog import (
+    build_catalog,
+    catalog_path,
+    catalog_store_status,
+    cip_fallback_chain,
+    collect_catalogs,
+    lookup_items,
+    normalize_cip_code,
+    open_catalog,
+    release_catalog,
+    release_dataset,
+    resolve_dataset,
+    update_catalog_refs
+)
+
+PROGRAMS = {
+    "type": "programs",
+    "source_file": "programs.json",
+    "by_cip_code": {
+        "52.02": [{"eab_cip_code": "52.02", "program_name": "Business"}],
+        "11.0701": [{"eab_cip_code": "11.0701", "program_name": "Computer Science"}]
+    }
+}
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    return str(tmp_path / "catalogs")
+
+
+@pytest.mark.parametrize("content_hash", [
+    "../../etc/passwd",
+    "a" * 63,
+    "a" * 65,
+    "A" * 64,
+    "g" * 64,
+    "a" * 63 + "/",
+    "",
+    None,
+    64,
+])
+def test_invalid_hashes_never_become_paths(catalog_dir, content_hash):
+    with pytest.raises(ValueError):
+        catalog_path(content_hash, catalog_dir)
+    with pytest.raises(ValueError):
+        open_catalog(content_hash, catalog_dir)
+    with pytest.raises(ValueError):
+        resolve_dataset({"type": "programs", "catalog": content_hash or "x"}, catalog_dir)
+
+
+def test_built_catalog_resolves(catalog_dir):
+    ref = build_catalog(PROGRAMS, catalog_dir)
+
+    assert os.path.dirname(catalog_path(ref["catalog"], catalog_dir)) == catalog_dir
+    catalog = resolve_dataset(ref, catalog_dir)
+    assert catalog.get("52.0201") == PROGRAMS["by_cip_code"]["52.02"]
+    assert catalog.cip_codes == ["11.0701", "52.02"]
+
+
+@pytest.mark.parametrize("cip_code, normalized", [
+    ("52.0201", "52.0201"),
+    ("5.02", "05.02"),
+    ("52.2", "52.20"),
+    ("52.020", "52.0200"),
+    ("5202", "52.02"),
+    ("520201", "52.0201"),
+    (" 52.02 ", "52.02"),
+    (52.02, "52.02"),
+    ("52", "52"),
+    # Bare numbers may be level IDs and are left alone
+    ("1", "1"),
+    ("5", "5"),
+    (1, "1"),
+    ("123", "123"),
+    ("BUS001", "BUS001"),
+    ("Default", "Default"),
+])
+def test_normalize_cip_code(cip_code, normalized):
+    assert normalize_cip_code(cip_code) == normalized
+
+
+@pytest.mark.parametrize("cip_code, chain", [
+    ("52.0201", ("52.0201", "52.02", "52")),
+    ("52.02", ("52.02", "52")),
+    ("520201", ("520201", "52.0201", "52.02", "52")),
+    ("5.2", ("5.2", "05.20", "05")),
+    ("52", ("52",)),
+    ("1", ("1",)),
+    ("BUS001", ("BUS001",)),
+])
+def test_cip_fallback_chain(cip_code, chain):
+    assert cip_fallback_chain(cip_code) == chain
+
+
+def test_level_ids_do_not_match_cip_series(catalog_dir):
+    dataset = {"by_cip_code": {"01": [{"program_name": "Agriculture"}], "52": [{"program_name": "Business"}]}}
+    catalog = open_catalog(build_catalog(dict(dataset, type="programs"), catalog_dir)["catalog"], catalog_dir)
+
+    for data in (dataset, catalog):
+        assert lookup_items(data, "1") == []
+        assert lookup_items(data, "01.0101") == [{"program_name": "Agriculture"}]
+        assert lookup_items(data, "5201") == [{"program_name": "Business"}]
+
+
+def _age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_collect_deletes_only_unreferenced_catalogs_past_the_grace_period(catalog_dir, tmp_path):
+    session_file = tmp_path / "session.json"
+    session_file.write_text("{}")
+    referenced = build_catalog(PROGRAMS, catalog_dir)["catalog"]
+    unreferenced = build_catalog(dict(PROGRAMS, source_file="other.json"), catalog_dir)["catalog"]
+    recent = build_catalog(dict(PROGRAMS, source_file="recent.json"), catalog_dir)["catalog"]
+    update_catalog_refs({str(session_file): [referenced]}, catalog_dir)
+    for content_hash in (referenced, unreferenced):
+        _age(catalog_path(content_hash, catalog_dir), 7200)
+
+    assert collect_catalogs(catalog_dir, grace_seconds=3600) == [unreferenced]
+    assert os.path.exists(catalog_path(referenced, catalog_dir))
+    assert os.path.exists(catalog_path(recent, catalog_dir))
+
+    # A session deleted outside the app no longer holds its catalogs
+    session_file.unlink()
+    assert collect_catalogs(catalog_dir, grace_seconds=3600) == [referenced]
+
+
+def test_open_handles_keep_catalogs_from_collection(catalog_dir):
+    content_hash = build_catalog(PROGRAMS, catalog_dir)["catalog"]
+    path = catalog_path(content_hash, catalog_dir)
+    first = open_catalog(content_hash, catalog_dir)
+    second = open_catalog(content_hash, catalog_dir)
+    assert first is second
+    assert catalog_store_status(catalog_dir)["in_use"] >= 1
+
+    release_catalog(first)
+    assert collect_catalogs(catalog_dir, grace_seconds=0) == []
+    # Still mapped and readable by the remaining holder
+    assert second.get("52.02") == PROGRAMS["by_cip_code"]["52.02"]
+
+    release_catalog(second)
+    assert collect_catalogs(catalog_dir, grace_seconds=0) == [content_hash]
+    assert not os.path.exists(path)
+    assert second._map is None
+
+
+def test_resolved_datasets_hold_a_handle_until_released(catalog_dir):
+    ref = build_catalog(PROGRAMS, catalog_dir)
+    dataset = resolve_dataset(ref, catalog_dir)
+
+    assert collect_catalogs(catalog_dir, grace_seconds=0) == []
+    release_dataset(dataset)
+    release_dataset({"by_cip_code": {}})
+    assert collect_catalogs(catalog_dir, grace_seconds=0) == [ref["catalog"]]
+
+
+def test_opening_and_releasing_restart_the_grace_period(catalog_dir):
+    content_hash = build_catalog(PROGRAMS, catalog_dir)["catalog"]
+    path = catalog_path(content_hash, catalog_dir)
+    _age(path, 7200)
+
+    catalog = open_catalog(content_hash, catalog_dir)
+    assert time.time() - os.path.getmtime(path) < 60
+
+    _age(path, 7200)
+    release_catalog(catalog)
+    assert time.time() - os.path.getmtime(path) < 60
+    assert collect_catalogs(catalog_dir, grace_seconds=3600) == []
@@ -0,0 +1,60 @@
+import os
+import json
+
+import pytest
+
+from backend import parsing
+from backend.extraction import PDFExtraction, EXTRACTION_VERSION
+from backend.parsing import PDFParser
+
+# The fixture is the extraction of examples/South Carolina Variation List.pdf; after an
+# EXTRACTION_VERSION bump regenerate it with
+#   python run_parser.py --pdf "examples/South Carolina Variation List.pdf" \
+#       --save-extraction tests/fixtures/south_carolina_extraction.json
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(TESTS_DIR, "fixtures", "south_carolina_extraction.json")
+EXPECTED = os.path.join(os.path.dirname(TESTS_DIR), "examples", "expected", "South Carolina Variation List.json")
+
+
+@pytest.fixture
+def extraction():
+    return PDFExtraction.load(FIXTURE)
+
+
+def test_save_load_round_trip(tmp_path, extraction):
+    path = tmp_path / "extraction.json"
+
+    extraction.save(str(path))
+    loaded = PDFExtraction.load(str(path))
+
+    assert loaded.pages == extraction.pages
+    assert loaded.content_hash == extraction.content_hash
+    assert loaded.version == EXTRACTION_VERSION
+
+
+def test_other_extraction_version_is_rejected(extraction):
+    data = dict(extraction.to_dict(), version=EXTRACTION_VERSION - 1)
+
+    with pytest.raises(ValueError):
+        PDFExtraction.from_dict(data)
+
+
+def test_tables_and_text_views(extraction):
+    stats = extraction.table_stats()
+
+    assert stats["pages"] == len(extraction.pages) == 8
+    assert stats["tables"] == len(extraction.tables) > 0
+    assert "UNIVERSITY OF SOUTH CAROLINA" in extraction.text
+
+
+@pytest.mark.parametrize("format_type", [None, "south_carolina"])
+def test_interpretation_from_saved_extraction_without_pdfplumber(monkeypatch, extraction, format_type):
+    def no_pdfplumber(*args, **kwargs):
+        raise AssertionError("interpretation must not open the PDF")
+    monkeypatch.setattr(parsing.pdfplumber, "open", no_pdfplumber)
+    with open(EXPECTED) as f:
+        expected = json.load(f)
+
+    variation_set = PDFParser(cache=False).interpret_extraction(extraction, format_type)
+
+    assert variation_set == expected
@@ -0,0 +1,31 @@
+import pytest
+
+from backend.formats import FormatHandler, register_format_handler, get_format_handler
+
+
+def test_handler_must_implement_detect_and_extract():
+    class DetectOnly(FormatHandler):
+        name = "detect_only"
+
+        def detect(self, tables, scanner):
+            return 0.5
+
+    with pytest.raises(TypeError):
+        DetectOnly()
+
+
+def test_register_replaces_handler_with_same_name():
+    class Custom(FormatHandler):
+        name = "custom"
+
+        def detect(self, tables, scanner):
+            return 0.0
+
+        def extract(self, parser, tables, scanner, variation_set):
+            return False
+
+    registry = []
+    first = register_format_handler(Custom(), registry)
+    second = register_format_handler(Custom(), registry)
+    assert registry == [second]
+    assert get_format_handler("custom", registry) is second is not first
@@ -0,0 +1,93 @@
+import io
+import json
+import random
+
+import pytest
+
+from backend.json_stream import iter_json_items
+from backend.parsing import JSONParser
+
+DOCUMENTS = [
+    [],
+    {},
+    [1, -2.5, 1.5e10, 3E-2, 0, True, False, None, "text", "", [1, [2]], {"a": {"b": [1.25]}}],
+    {"first": {"eab_cip_code": "52.0201", "names": ["a", "b"]}, "second": 12345.678, "third": "}]"},
+    [{"quote": "a \"quoted\" \\ string", "unicode": "café ✓", "number": 1234567890123}],
+]
+
+
+def _items(text, chunk_size):
+    return list(iter_json_items(io.StringIO(text), chunk_size=chunk_size))
+
+
+def _expected_items(document):
+    if isinstance(document, dict):
+        return list(document.items())
+    return [(None, item) for item in document]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64 * 1024])
+def test_items_match_json_loads_at_any_chunk_size(document, chunk_size):
+    for text in (json.dumps(document), json.dumps(document, indent=2)):
+        assert _items(text, chunk_size) == _expected_items(document)
+
+
+def test_numbers_cut_at_chunk_boundaries():
+    rng = random.Random(46)
+    numbers = [rng.choice([rng.randint(-10 ** 12, 10 ** 12), rng.uniform(-1e6, 1e6), rng.uniform(0, 1) * 1e-8])
+               for _ in range(200)]
+    text = json.dumps(numbers)
+    # Chunk sizes that end chunks mid-number, after a "." or an "e", or just before a sign
+    for chunk_size in range(1, 24):
+        assert [value for _, value in _items(text, chunk_size)] == numbers
+
+
+def test_whitespace_and_empty_containers():
+    assert _items("  \n [ ] \n", 1) == []
+    assert _items("\t{ }", 2) == []
+    assert _items(' [ 1 ,\n 2 ] ', 1) == [(None, 1), (None, 2)]
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "42",
+    '"string"',
+    "[1, 2",
+    "[1 2]",
+    "[1,]",
+    '{"a" 1}',
+    '{"a": 1,}',
+    "{1: 2}",
+    '[{"a": }]',
+    '["unterminated]',
+])
+@pytest.mark.parametrize("chunk_size", [1, 4, 64 * 1024])
+def test_malformed_documents_raise_value_error(text, chunk_size):
+    with pytest.raises(ValueError):
+        _items(text, chunk_size)
+
+
+def _write_json(tmp_path, name, items):
+    path = tmp_path / name
+    path.write_text(json.dumps(items))
+    return str(path)
+
+
+def test_import_keeps_whole_items_by_default(tmp_path):
+    item = {"eab_cip_code": "52.02", "program_name": "Business", "tuition": 1000, "campus": "Main"}
+    parsed = JSONParser().parse_json_file(_write_json(tmp_path, "programs.json", [item, {"program_name": "No code"}]))
+
+    assert parsed["type"] == "programs"
+    assert parsed["by_cip_code"] == {"52.02": [item]}
+
+
+def test_projection_keeps_items_without_prompt_fields_whole(tmp_path):
+    known = {"eab_cip_code": "52.02", "program_name": "Business", "tuition": 1000}
+    unfamiliar = {"eab_cip_code": "11.07", "title": "Computer Science", "summary": "Programming"}
+    parser = JSONParser(fields={"programs": ["program_name", "description"]})
+    parsed = parser.parse_json_file(_write_json(tmp_path, "programs.json", [known, unfamiliar]))
+
+    assert parsed["by_cip_code"]["52.02"] == [{"eab_cip_code": "52.02", "program_name": "Business"}]
+    assert parsed["by_cip_code"]["11.07"] == [unfamiliar]
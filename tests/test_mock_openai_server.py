@@ -0,0 +1,57 @@
+import json
+import urllib.request
+
+import pytest
+
+from backend.mock_openai_server import MockOpenAIServer
+
+
+@pytest.fixture
+def server():
+    with MockOpenAIServer(latency_mean=0, latency_jitter=0, completion_tokens=20) as mock:
+        yield mock
+
+
+def post(server, body):
+    request = urllib.request.Request(f"{server.base_url}/chat/completions", data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, response.read().decode()
+
+
+def stream_events(text):
+    return [line[len("data: "):] for line in text.splitlines() if line.startswith("data: ")]
+
+
+def test_completion(server):
+    status, text = post(server, {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hello"}]})
+
+    payload = json.loads(text)
+    assert status == 200
+    assert payload["choices"][0]["message"]["content"]
+    assert payload["usage"]["completion_tokens"] > 0
+
+
+@pytest.mark.parametrize("stream_options", [None, {}, {"include_usage": False}])
+def test_stream_without_usage(server, stream_options):
+    status, text = post(server, {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}],
+                                 "stream": True, "stream_options": stream_options})
+
+    events = stream_events(text)
+    assert status == 200
+    assert events[-1] == "[DONE]"
+    assert not any(json.loads(event).get("usage") for event in events[:-1])
+
+
+def test_stream_with_usage(server):
+    _, text = post(server, {"model": "gpt-4o", "messages": [{"role": "user", "content": "Hi"}],
+                            "stream": True, "stream_options": {"include_usage": True}})
+
+    events = stream_events(text)
+    assert json.loads(events[-2])["usage"]["completion_tokens"] > 0
+
+
+def test_null_messages(server):
+    status, _ = post(server, {"model": "gpt-4o", "messages": None})
+
+    assert status == 200
@@ -0,0 +1,79 @@
+import time
+import threading
+
+from backend.circuit_breaker import CircuitOpenError
+from backend.output_generator import OutputGenerator
+
+
+class OpenCircuitAI:
+    """Fake AIIntegration whose circuit is open for the first open_seconds"""
+
+    def __init__(self, open_seconds):
+        self.open_until = time.perf_counter() + open_seconds
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_draft(self, original_copy, instruction_set, variation_levels, json_data, metadata=None):
+        with self.lock:
+            self.calls += 1
+        remaining = self.open_until - time.perf_counter()
+        if remaining > 0:
+            raise CircuitOpenError("circuit open", retry_after=remaining)
+        return "draft"
+
+
+def variation_set(levels):
+    return {
+        "variables": ["GPA Range", "Distance"],
+        "levels": {
+            "GPA Range": [{"value": f"GPA {i}", "data": str(i)} for i in range(levels)],
+            "Distance": [{"value": "Near", "data": "1"}, {"value": "Far", "data": "2"}]
+        }
+    }
+
+
+def test_concurrent_variations_share_one_pause(tmp_path):
+    generator = OutputGenerator(OpenCircuitAI(open_seconds=0.5), output_dir=str(tmp_path))
+
+    results = generator.generate_all_variations("copy", {"partner_name": "Test"}, variation_set(4), {},
+                                                concurrency=4)
+
+    assert results["success"] == 8
+    assert not results["aborted"]
+    # One 1s pause (the minimum wait) for all four threads, not one per thread
+    assert 0.9 <= results["paused_seconds"] < 2.0
+    assert results["elapsed_seconds"] < 2.5
+
+
+class InstantAI:
+    def generate_draft(self, original_copy, instruction_set, variation_levels, json_data, metadata=None):
+        return f"draft for {variation_levels}"
+
+
+def test_variations_with_matching_name_prefixes_get_distinct_files(tmp_path):
+    # Level values that agree in their first 10 characters used to produce the same filename
+    variations = {
+        "variables": ["Academic Field of Interest"],
+        "levels": {"Academic Field of Interest": [{"value": f"Engineering Technology {i}", "data": ""}
+                                                  for i in range(12)]}
+    }
+    output_dir = tmp_path / "output"
+    generator = OutputGenerator(InstantAI(), output_dir=str(output_dir))
+
+    results = generator.generate_all_variations("copy", {"partner_name": "Test"}, variations, {}, concurrency=4)
+
+    filenames = [variation["filename"] for variation in results["variations"]]
+    assert results["success"] == 12
+    assert len(set(filenames)) == 12
+    assert sorted(filenames) == sorted(path.name for path in output_dir.iterdir())
+
+
+def test_existing_output_file_is_not_overwritten(tmp_path):
+    generator = OutputGenerator(InstantAI(), output_dir=str(tmp_path))
+    (tmp_path / "Test_Var_1_20260101_000000.md").write_text("earlier run")
+
+    filepath = generator._write_new_file("Test_Var_1_20260101_000000.md", "this run")
+
+    assert (tmp_path / "Test_Var_1_20260101_000000.md").read_text() == "earlier run"
+    assert filepath.endswith("Test_Var_1_20260101_000000_2.md")
+    assert open(filepath).read() == "this run"
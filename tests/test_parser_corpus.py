@@ -0,0 +1,50 @@
+from benchmarks.parser_corpus import diff_variation_sets
+
+
+def _set(variables, levels):
+    return {"variables": variables, "levels": levels}
+
+
+def test_identical_sets_are_exact():
+    expected = _set(["GPA"], {"GPA": [{"data": "1", "value": "3.0"}, {"data": "2", "value": "3.5"}]})
+    diff = diff_variation_sets(expected, expected)
+    assert diff["exact"]
+    assert diff["levels"] == {}
+    assert diff["accuracy"] == 1.0
+
+
+def test_changed_missing_and_extra_levels():
+    expected = _set(["GPA"], {"GPA": [{"data": "1", "value": "3.0"},
+                                      {"data": "2", "value": "3.5"},
+                                      {"data": "3", "value": "4.0"}]})
+    actual = _set(["GPA"], {"GPA": [{"data": "1", "value": "3.0"},
+                                    {"data": "2", "value": "3.6"},
+                                    {"data": "4", "value": "2.5"}]})
+    diff = diff_variation_sets(expected, actual)
+
+    # Level 2 keeps its data ID with another value, so it is changed rather than missing and extra
+    assert diff["levels"]["GPA"] == {
+        "missing": [{"data": "3", "value": "4.0"}],
+        "extra": [{"data": "4", "value": "2.5"}],
+        "changed": [{"data": "2", "expected": "3.5", "actual": "3.6"}]
+    }
+    assert diff["expected_levels"] == 3
+    assert diff["matched_levels"] == 1
+    assert diff["accuracy"] == round(1 / 3, 4)
+
+
+def test_variable_differences():
+    expected = _set(["GPA", "Grade"], {"GPA": [{"data": "1", "value": "3.0"}], "Grade": []})
+    actual = _set(["Grade", "GPA", "Distance"], {"GPA": [{"data": "1", "value": "3.0"}]})
+    diff = diff_variation_sets(expected, actual)
+    assert not diff["exact"]
+    assert diff["missing_variables"] == []
+    assert diff["extra_variables"] == ["Distance"]
+    assert diff["variable_order_changed"]
+
+
+def test_empty_expected_set():
+    diff = diff_variation_sets(_set([], {}), _set(["GPA"], {}))
+    assert diff["missing_variables"] == []
+    assert diff["extra_variables"] == ["GPA"]
+    assert diff["accuracy"] == 1.0
@@ -0,0 +1,133 @@
+import io
+import os
+import json
+
+import pytest
+
+from backend import parser_pool
+from backend.memory import MemoryLimitError
+from backend.parsing import PDFParser
+from backend.parser_pool import ParserPool, ParserPoolTimeoutError, ParserWorkerError, dispatch_parse
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+EXAMPLE_PDF = os.path.join(EXAMPLES_DIR, "South Carolina Variation List.pdf")
+EXPECTED_JSON = os.path.join(EXAMPLES_DIR, "expected", "South Carolina Variation List.json")
+NOT_A_PDF = os.path.join(EXAMPLES_DIR, "sample_variation_definition.pdf")
+
+
+@pytest.fixture
+def pool():
+    pool = ParserPool(workers=1, max_queue=0, job_timeout=60, parser_options={"cache": False})
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_worker_errors_keep_their_type(pool):
+    with pytest.raises(ParserWorkerError) as excinfo:
+        pool.parse(NOT_A_PDF)
+
+    assert excinfo.value.error_type
+    assert excinfo.value.error_type != "ParserWorkerError"
+    assert pool.status()["stats"]["failed"] == 1
+
+
+def test_large_streams_are_spooled_to_a_removed_temporary_file(pool, tmp_path, monkeypatch):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    monkeypatch.setattr("tempfile.tempdir", str(spool_dir))
+    monkeypatch.setattr(parser_pool, "get_parser_pool", lambda logger=None: pool)
+    monkeypatch.setattr(parser_pool, "PARSER_POOL_PIPE_MAX_BYTES", 1024)
+    sources = []
+    parse = pool.parse
+    monkeypatch.setattr(pool, "parse", lambda source, *args: sources.append(source) or parse(source, *args))
+
+    with open(EXAMPLE_PDF, 'rb') as f:
+        upload = io.BytesIO(f.read())
+    variation_set, timing = dispatch_parse(PDFParser(cache=False), upload, timed=True)
+
+    with open(EXPECTED_JSON) as f:
+        assert variation_set == json.load(f)
+    assert timing is not None
+    # The worker was sent a path in the spool directory, which is gone afterwards
+    assert len(sources) == 1 and os.path.dirname(sources[0]) == str(spool_dir)
+    assert os.listdir(spool_dir) == []
+
+
+class RecordingPool:
+    """Stand-in pool recording what dispatch_parse sends a worker"""
+
+    def __init__(self):
+        self.sources = []
+
+    def parse(self, source, format_type=None, timed=False):
+        self.sources.append(source)
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return f.read(), None
+        return source, None
+
+
+def test_small_uploads_and_files_on_disk_skip_the_spool(tmp_path, monkeypatch):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    monkeypatch.setattr("tempfile.tempdir", str(spool_dir))
+    pool = RecordingPool()
+    monkeypatch.setattr(parser_pool, "get_parser_pool", lambda logger=None: pool)
+    monkeypatch.setattr(parser_pool, "PARSER_POOL_PIPE_MAX_BYTES", 1024)
+    parser = PDFParser(cache=False)
+
+    # Small bytes and streams go through the pipe, from the stream's current position
+    assert dispatch_parse(parser, b"%PDF-small")[0] == b"%PDF-small"
+    upload = io.BytesIO(b"header%PDF-small")
+    upload.seek(6)
+    assert dispatch_parse(parser, upload)[0] == b"%PDF-small"
+
+    # A file opened from disk is sent by its path
+    with open(EXAMPLE_PDF, 'rb') as f:
+        dispatch_parse(parser, f)
+    assert pool.sources[-1] == EXAMPLE_PDF
+
+    # Anything larger than the pipe limit is spooled and sent by path
+    large = b"%PDF-" + b"x" * 2048
+    assert dispatch_parse(parser, large)[0] == large
+    assert isinstance(pool.sources[-1], str) and os.path.dirname(pool.sources[-1]) == str(spool_dir)
+    assert os.listdir(spool_dir) == []
+
+
+def test_memory_limit_error_survives_the_pool():
+    pool = ParserPool(workers=1, max_queue=0, job_timeout=60,
+                      parser_options={"cache": False, "low_memory": True, "max_rss_mb": 1})
+    try:
+        with pytest.raises(MemoryLimitError):
+            pool.parse(EXAMPLE_PDF)
+        assert pool.status()["stats"]["failed"] == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_hung_job_times_out_and_worker_is_replaced(tmp_path):
+    # Opening a named pipe with no writer blocks, so the worker hangs on this job
+    hanging_pdf = str(tmp_path / "hangs.pdf")
+    os.mkfifo(hanging_pdf)
+    pool = ParserPool(workers=1, max_queue=0, job_timeout=2, parser_options={"cache": False})
+    pool.start()
+    try:
+        hung_worker = pool._idle.queue[0]
+
+        with pytest.raises(ParserPoolTimeoutError):
+            pool.parse(hanging_pdf)
+
+        status = pool.status()
+        assert status["stats"]["timed_out"] == 1
+        assert status["stats"]["restarted"] == 1
+        assert status["idle"] == 1 and status["busy"] == 0
+        assert not hung_worker.process.is_alive()
+
+        # The replacement worker takes the next job
+        with pytest.raises(ParserWorkerError):
+            pool.parse(NOT_A_PDF)
+        assert pool._idle.queue[0] is not hung_worker
+    finally:
+        pool.shutdown()
@@ -0,0 +1,84 @@
+import io
+import os
+
+import pytest
+
+from backend import parser_pool
+from backend.memory import MemoryLimitError
+from backend.parsing import PDFParser
+from backend.timing import StageTimer
+from benchmarks.parser_corpus import run_file
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+EXAMPLE_PDF = os.path.join(EXAMPLES_DIR, "South Carolina Variation List.pdf")
+
+
+@pytest.fixture
+def serial_pages():
+    return PDFParser(extraction_workers=1, cache=False).extract_pdf(EXAMPLE_PDF).pages
+
+
+@pytest.mark.parametrize("as_source", [
+    lambda data: data,
+    lambda data: io.BytesIO(data),
+], ids=["bytes", "stream"])
+def test_parallel_extraction_of_in_memory_sources_matches_serial(serial_pages, as_source):
+    with open(EXAMPLE_PDF, 'rb') as f:
+        source = as_source(f.read())
+    parser = PDFParser(extraction_workers=2, cache=False)
+
+    pages = parser.extract_pdf(source).pages
+
+    assert parser._extraction_pool is not None
+    assert parser._extraction_pool._mp_context.get_start_method() == "spawn"
+    assert pages == serial_pages
+
+
+def test_table_prefilter_counts_reach_the_timing_report():
+    parser = PDFParser(extraction_workers=1, cache=False, table_prefilter=True)
+    timer = StageTimer()
+
+    parser.parse_variation_pdf(EXAMPLE_PDF, timer=timer)
+
+    counts = timer.report()["counts"]
+    stats = parser.extract_pdf(EXAMPLE_PDF).table_stats()
+    assert counts == stats
+    assert counts["pages"] == 8
+    assert counts["table_pages_scanned"] + counts["table_pages_skipped"] == 8
+
+    # Counters from worker timers add up like stage timings
+    merged = StageTimer()
+    merged.merge(timer)
+    merged.merge(timer)
+    assert merged.counts["pages"] == 16
+
+
+def test_corpus_harness_reports_table_prefilter_counts():
+    parser = PDFParser(extraction_workers=1, cache=False, table_prefilter=True)
+
+    result = run_file(parser, EXAMPLE_PDF, None, 1)
+
+    assert result["error"] is None
+    assert result["table_stats"]["pages"] == 8
+    assert result["table_stats"]["table_pages_scanned"] + result["table_stats"]["table_pages_skipped"] == 8
+
+
+def test_memory_limit_error_keeps_its_type():
+    parser = PDFParser(extraction_workers=1, cache=False, low_memory=True, max_rss_mb=1)
+
+    with pytest.raises(MemoryLimitError):
+        parser.parse_variation_pdf(EXAMPLE_PDF)
+    with pytest.raises(MemoryLimitError):
+        parser.extract_pdf(EXAMPLE_PDF)
+
+
+def test_api_answers_413_for_the_memory_limit(monkeypatch):
+    from backend import api
+
+    monkeypatch.setattr(api, "parser", PDFParser(extraction_workers=1, cache=False, low_memory=True, max_rss_mb=1))
+    monkeypatch.setattr(parser_pool, "get_parser_pool", lambda logger=None: None)
+
+    response = api.app.test_client().post("/api/parse", json={"pdf_path": EXAMPLE_PDF})
+
+    assert response.status_code == 413
+    assert "memory limit" in response.get_json()["error"]
@@ -0,0 +1,47 @@
+from backend.prompt_budget import PromptDataReducer
+
+LONG_TEXT = " ".join(f"word{i}" for i in range(400))
+
+
+def program(name, description=LONG_TEXT):
+    return {"program_name": name, "degree_type": "BS", "description": description,
+            "career_paths": ["Analyst"], "eab_cip_code": "52.0201"}
+
+
+def test_field_tightened_on_several_passes_is_reported_once():
+    reducer = PromptDataReducer(token_budget=60, max_items=5, max_field_chars=1000, max_list_items=5)
+
+    programs, clubs, report = reducer.reduce([program("Business")], [], "Business")
+
+    assert len(programs) == 1
+    assert len(programs[0]["description"]) < 200
+    assert report["reduced"]
+    assert report["truncated_fields"] == 1
+
+
+def test_truncations_in_dropped_items_are_not_reported():
+    reducer = PromptDataReducer(token_budget=400, max_items=5, max_field_chars=1000, max_list_items=5)
+    programs_in = [program("Business"), program("Nursing"), program("History")]
+
+    programs, _, report = reducer.reduce(programs_in, [], "Business")
+
+    assert programs[0]["program_name"] == "Business"
+    assert report["truncated_fields"] == len(programs)
+
+
+def test_unknown_item_shapes_pass_through():
+    reducer = PromptDataReducer(token_budget=1000)
+    item = {"eab_cip_code": "52.0201", "title": "Accounting", "summary": "Numbers"}
+
+    programs, _, _ = reducer.reduce([item], [], "Accounting")
+
+    assert programs == [item]
+
+
+def test_zero_budget_disables_reduction():
+    items = [program("Business")]
+
+    programs, _, report = PromptDataReducer(token_budget=0).reduce(items, [], "Business")
+
+    assert programs is items
+    assert not report["reduced"]
@@ -0,0 +1,39 @@
+import os
+
+from backend import parse_cache
+from backend.parsing import PDFParser
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+EXAMPLE_PDF = os.path.join(EXAMPLES_DIR, "South Carolina Variation List.pdf")
+
+
+def test_batch_force_extracts_again_despite_the_parse_cache(tmp_path, monkeypatch):
+    # Imported here so the script's module-level parser logs into the test's log directory
+    import run_parser
+
+    monkeypatch.setattr(parse_cache, "PARSE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(run_parser, "_batch_parsers", {})
+    extractions = []
+    get_extraction = PDFParser._get_extraction
+
+    def counting_get_extraction(self, *args):
+        extractions.append(args)
+        return get_extraction(self, *args)
+
+    monkeypatch.setattr(PDFParser, "_get_extraction", counting_get_extraction)
+    output_dir = str(tmp_path / "batch")
+
+    records = run_parser.parse_batch([EXAMPLE_PDF], output_dir, workers=1)
+    assert [record["status"] for record in records] == ["ok"]
+    assert len(extractions) == 1
+
+    # Without the manifest the input is parsed again, but the parse cache answers
+    os.remove(os.path.join(output_dir, "manifest.json"))
+    run_parser.parse_batch([EXAMPLE_PDF], output_dir, workers=1)
+    assert len(extractions) == 1
+
+    # --force skips both the manifest and the parse cache
+    records = run_parser.parse_batch([EXAMPLE_PDF], output_dir, workers=1, force=True)
+    assert [record["status"] for record in records] == ["ok"]
+    assert len(extractions) == 2
+    assert records[0]["table_stats"]["pages"] == 8
@@ -0,0 +1,53 @@
+import random
+
+from backend.similarity import SimilarityIndex, is_similar_field
+
+WORDS = ["health", "sciences", "business", "management", "arts", "visual", "and", "of", "studies",
+         "engineering", "technology", "biomedical", "biological", "communication", "ab", "abc", "x"]
+
+
+def random_name(rng):
+    name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+    if rng.random() < 0.3:
+        # Cut mid-word so substring matches that do not fall on word boundaries are exercised
+        name = name[rng.randint(0, len(name) // 2):]
+    return name.upper() if rng.random() < 0.2 else name
+
+
+def test_is_similar_matches_the_pairwise_predicate():
+    rng = random.Random(11)
+    for _ in range(300):
+        names = [random_name(rng) for _ in range(rng.randint(0, 12))]
+        index = SimilarityIndex(names)
+        for _ in range(20):
+            query = random_name(rng)
+            expected = any(is_similar_field(query, name) for name in names)
+            assert index.is_similar(query) == expected, (query, names)
+
+
+def test_contains_and_contained_in_match_substring_scans():
+    rng = random.Random(12)
+    for _ in range(300):
+        names = [name for name in (random_name(rng) for _ in range(rng.randint(1, 10))) if name]
+        index = SimilarityIndex(names)
+        for _ in range(20):
+            text = random_name(rng).lower()
+            assert index.contains(text) == any(text in name.lower() for name in names)
+            assert index.contained_in(text) == any(name.lower() in text for name in names)
+
+
+def test_empty_names():
+    index = SimilarityIndex(["", None, "Health"])
+
+    assert len(index) == 1
+    assert not index.is_similar("")
+    assert not SimilarityIndex().is_similar("Health")
+    assert not is_similar_field("", "Health")
+
+
+def test_shared_significant_words():
+    index = SimilarityIndex(["Visual and Performing Arts"])
+
+    # Two shared words longer than three characters make names similar; "and" does not count
+    assert index.is_similar("Performing and Visual Media")
+    assert not index.is_similar("Visual and Digital Media")
@@ -0,0 +1,81 @@
+import random
+
+from backend.variation_set import VariationSet, normalize_value
+
+VALUES = ["Business", "business", "  Business ", "Nursing", "NURSING", "Health Sciences", "health  sciences",
+          "Arts", "Default", "3.0-3.5", "Engineering"]
+DATA_IDS = ["Default", "1", "2", "3", "10", "52.0201", "x"]
+
+
+def scan_by_data(levels, data):
+    """The pairwise predicate the index replaces: first level with an equal data ID"""
+    return next((level for level in levels if str(level.get("data")) == str(data)), None)
+
+
+def scan_by_value(levels, value):
+    """The pairwise predicate the index replaces: first level with an equal normalized value"""
+    return next((level for level in levels if normalize_value(level.get("value", "")) == normalize_value(value)), None)
+
+
+def scan_next_numeric_id(levels):
+    return max([int(level["data"]) for level in levels if str(level["data"]).isdigit()], default=0) + 1
+
+
+def test_lookups_match_linear_scans_through_random_edits():
+    rng = random.Random(7)
+    for _ in range(50):
+        variation_set = VariationSet()
+        variation_set.add_variable("Field")
+        for _ in range(40):
+            operation = rng.random()
+            if operation < 0.5:
+                variation_set.add_level("Field", rng.choice(VALUES), rng.choice(DATA_IDS),
+                                        unique_by=rng.choice(["data", "value"]))
+            elif operation < 0.8:
+                variation_set.update_value("Field", rng.choice(DATA_IDS), rng.choice(VALUES))
+            elif variation_set.levels("Field"):
+                level = rng.choice(variation_set.levels("Field"))
+                variation_set.set_level_value("Field", level, rng.choice(VALUES))
+
+            levels = variation_set.levels("Field")
+            for data in DATA_IDS:
+                assert variation_set.find_by_data("Field", data) is scan_by_data(levels, data)
+            for value in VALUES:
+                assert variation_set.find_by_value("Field", value) is scan_by_value(levels, value)
+            assert variation_set.next_numeric_id("Field") == scan_next_numeric_id(levels)
+
+
+def test_duplicates_are_skipped():
+    variation_set = VariationSet()
+    variation_set.add_variable("Field")
+
+    assert variation_set.add_level("Field", "Business", "1") is not None
+    assert variation_set.add_level("Field", "Other", "1") is None
+    assert variation_set.add_level("Field", " BUSINESS ", "2", unique_by="value") is None
+    assert variation_set.add_level("Field", "Nursing", "2", unique_by="value") is not None
+    assert variation_set.to_dict() == {
+        "variables": ["Field"],
+        "levels": {"Field": [{"value": "Business", "data": "1"}, {"value": "Nursing", "data": "2"}]}
+    }
+
+
+def test_wrapped_dict_is_updated_in_place_and_set_levels_reindexes():
+    data = {"variables": ["GPA"], "levels": {"GPA": [{"value": "High", "data": "1"}]}}
+    variation_set = VariationSet.from_dict(data)
+    assert variation_set.find_by_data("GPA", "1")["value"] == "High"
+
+    variation_set.set_levels("GPA", [{"value": "Low", "data": "7"}])
+    variation_set.add_level("GPA", "Mid", "8")
+
+    assert data["levels"]["GPA"] == [{"value": "Low", "data": "7"}, {"value": "Mid", "data": "8"}]
+    assert variation_set.find_by_data("GPA", "1") is None
+    assert variation_set.next_numeric_id("GPA") == 9
+
+
+def test_unknown_variable():
+    variation_set = VariationSet()
+
+    assert variation_set.find_by_data("Missing", "1") is None
+    assert variation_set.find_by_value("Missing", "x") is None
+    assert variation_set.next_numeric_id("Missing") == 1
+    assert variation_set.total_variations() == 1